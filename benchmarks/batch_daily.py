@@ -0,0 +1,74 @@
+"""Compares the throughput of creating daily Items month by month with
+`create_daily_items` against a single `create_daily_items_batch` call, with
+the NetCDFs served over HTTP from a local directory.
+
+Usage:
+    python benchmarks/batch_daily.py [--months N] [--prefetch N]
+        [--nc-dir DIR]
+
+The test data holds a single prelim month, so it is repeated N times; COGs
+are recreated for each repetition.
+"""
+import argparse
+import time
+from tempfile import TemporaryDirectory
+from typing import Callable, List
+
+from pystac import Item
+
+from stactools.nclimgrid import daily_stac
+from stactools.nclimgrid.constants import Status
+from tests.http_server import serve_directory
+
+YEAR_MONTH = (2022, 1)
+
+
+def timed(create: Callable[[str], List[Item]]) -> float:
+    with TemporaryDirectory() as temp_dir:
+        start = time.perf_counter()
+        items = create(temp_dir)
+        elapsed = time.perf_counter() - start
+    return len(items) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--prefetch",
+                        type=int,
+                        default=daily_stac.BATCH_PREFETCH)
+    parser.add_argument("--nc-dir", default="tests/test-data/netcdf/daily")
+    args = parser.parse_args()
+
+    year, month = YEAR_MONTH
+    units = [(year, month, Status.PRELIM)] * args.months
+    with serve_directory(args.nc_dir) as server:
+
+        def per_month(base_cog_href: str) -> List[Item]:
+            items = []
+            for unit_year, unit_month, status in units:
+                items.extend(
+                    daily_stac.create_daily_items(unit_year,
+                                                  unit_month,
+                                                  status,
+                                                  base_cog_href,
+                                                  base_nc_href=server.url))
+            return items
+
+        def batch(base_cog_href: str) -> List[Item]:
+            return list(
+                daily_stac.create_daily_items_batch(units,
+                                                    base_cog_href,
+                                                    base_nc_href=server.url,
+                                                    prefetch=args.prefetch))
+
+        per_month_rate = timed(per_month)
+        batch_rate = timed(batch)
+
+    print(f"per month: {per_month_rate:.2f} items/s")
+    print(f"batch: {batch_rate:.2f} items/s "
+          f"({batch_rate / per_month_rate:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compares creating a month of daily Items from COGs served over HTTP with
+the run's filesystems kept alive and shared (see `utils.FilesystemPool`)
+against closing connections after each request, as when every href opens a
+session of its own.
+
+Usage:
+    python benchmarks/pooled_filesystems.py [--days N] [--repeat N]
+
+The test data holds a single scaled day, so its COGs are copied for each
+day of the month; the COGs already exist, so only they, the COG manifest and
+the slice hashes are read.
+"""
+import argparse
+import os
+import shutil
+import time
+from tempfile import TemporaryDirectory
+from typing import Tuple
+
+from stactools.nclimgrid import daily_stac
+from stactools.nclimgrid.constants import VARIABLES
+from stactools.nclimgrid.utils import KEEPALIVE_TIMEOUT, configure_filesystems
+from tests.http_server import serve_directory
+
+YEAR_MONTH = (1951, 1)
+COG_TEMPLATE = "tests/test-data/cog/daily/{var}-195101-grd-scaled-01.tif"
+
+
+def timed(cog_dir: str, repeat: int,
+          keepalive_timeout: float) -> Tuple[float, int]:
+    configure_filesystems(keepalive_timeout=keepalive_timeout)
+    year, month = YEAR_MONTH
+    with serve_directory(cog_dir) as server:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            daily_stac.create_daily_items(year, month, "scaled", server.url)
+        elapsed = time.perf_counter() - start
+        connections = server.connections
+    return elapsed / repeat, connections // repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as cog_dir:
+        for var in VARIABLES:
+            for day in range(1, args.days + 1):
+                shutil.copy(
+                    COG_TEMPLATE.format(var=var),
+                    os.path.join(cog_dir,
+                                 f"{var}-195101-grd-scaled-{day:02d}.tif"))
+
+        per_href, per_href_connections = timed(cog_dir, args.repeat, 0)
+        pooled, pooled_connections = timed(cog_dir, args.repeat,
+                                           KEEPALIVE_TIMEOUT)
+    configure_filesystems()
+
+    print(f"per href: {per_href:.2f} s/month, "
+          f"{per_href_connections} connections")
+    print(f"pooled: {pooled:.2f} s/month, {pooled_connections} connections "
+          f"({per_href / pooled:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
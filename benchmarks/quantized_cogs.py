@@ -0,0 +1,70 @@
+"""Compares the size of float32 and quantized int16 COGs of each variable, and
+reports the round-trip error of the quantized values.
+
+Usage:
+    python benchmarks/quantized_cogs.py [--nc-dir DIR] [--index N]
+
+The NetCDF directory must hold a NetCDF file per variable, named as NOAA names
+them, e.g., "prcp-202201-grd-prelim.nc" or "nclimgrid_prcp.nc".
+"""
+import argparse
+import glob
+import os
+from tempfile import TemporaryDirectory
+
+import numpy
+import rasterio
+
+from stactools.nclimgrid.constants import VARIABLES
+from stactools.nclimgrid.manifest import cog_ncs_if_changed
+
+
+def find_nc(nc_dir: str, var: str) -> str:
+    paths = glob.glob(os.path.join(nc_dir, f"*{var}*.nc"))
+    if len(paths) != 1:
+        raise ValueError(f"Expected one {var} NetCDF in '{nc_dir}'.")
+    return paths[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--nc-dir",
+        default="tests/test-data/netcdf/daily/beta/by-month/2022/01")
+    parser.add_argument("--index", type=int, default=1)
+    args = parser.parse_args()
+
+    total_float = total_quantized = 0
+    with TemporaryDirectory() as temp_dir:
+        for var in VARIABLES:
+            nc_path = find_nc(args.nc_dir, var)
+            float_path = os.path.join(temp_dir, f"{var}-float.tif")
+            quantized_path = os.path.join(temp_dir, f"{var}-int16.tif")
+            cog_ncs_if_changed({var: nc_path}, float_path, [var], args.index)
+            cog_ncs_if_changed({var: nc_path},
+                               quantized_path, [var],
+                               args.index,
+                               quantized=True)
+
+            with rasterio.open(float_path) as dataset:
+                expected = dataset.read(1, masked=True).astype(numpy.float64)
+            with rasterio.open(quantized_path) as dataset:
+                unpacked = dataset.read(1, masked=True).astype(numpy.float64)
+                unpacked = unpacked * dataset.scales[0] + dataset.offsets[0]
+            error = numpy.ma.abs(unpacked - expected)
+
+            float_size = os.path.getsize(float_path)
+            quantized_size = os.path.getsize(quantized_path)
+            total_float += float_size
+            total_quantized += quantized_size
+            print(f"{var}: {float_size} -> {quantized_size} bytes "
+                  f"({100 * (1 - quantized_size / float_size):.1f}% smaller), "
+                  f"max error {error.max():.4f}, "
+                  f"rms error {numpy.sqrt((error**2).mean()):.4f}")
+
+    print(f"total: {total_float} -> {total_quantized} bytes "
+          f"({100 * (1 - total_quantized / total_float):.1f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compares the files per second written by pystac's normalize_hrefs and
+save with `save.save_collection` for a large daily Collection.
+
+Usage:
+    python benchmarks/save_collection.py [--num-items N] [--max-workers N]
+"""
+import argparse
+import os
+import time
+from tempfile import TemporaryDirectory
+
+from pystac import CatalogType, Collection
+
+from stactools.nclimgrid import constants, daily_stac
+from stactools.nclimgrid.save import MAX_WORKERS, save_collection
+
+
+def create_collection(num_items: int) -> Collection:
+    """Creates a daily Collection of copies of a single test Item."""
+    item = daily_stac.create_daily_items(2022,
+                                         1,
+                                         constants.Status.PRELIM,
+                                         "tests/test-data/cog/daily",
+                                         day=1)[0]
+    items = []
+    for i in range(num_items):
+        clone = item.clone()
+        clone.id = f"{item.id}-{i:06d}"
+        items.append(clone)
+    return daily_stac.daily_collection(items)
+
+
+def pystac_save(collection: Collection, destination: str) -> None:
+    collection.catalog_type = CatalogType.SELF_CONTAINED
+    collection.set_self_href(destination)
+    collection.normalize_hrefs(destination)
+    collection.save()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-items", type=int, default=5000)
+    parser.add_argument("--max-workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    num_files = args.num_items + 1
+    with TemporaryDirectory() as temp_dir:
+        for name, save in [
+            ("save_collection",
+             lambda c, d: save_collection(c, d, args.max_workers)),
+            ("pystac", pystac_save),
+        ]:
+            collection = create_collection(args.num_items)
+            start = time.perf_counter()
+            save(collection, os.path.join(temp_dir, name))
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {num_files} files in {elapsed:.2f}s "
+                  f"({num_files / elapsed:.0f} files/s)")
+
+
+if __name__ == "__main__":
+    main()
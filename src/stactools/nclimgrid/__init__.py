@@ -1,10 +1,5 @@
 import stactools.core
 
-from stactools.nclimgrid.daily_stac import (create_daily_collection,
-                                            create_daily_items)
-from stactools.nclimgrid.monthly_stac import (create_monthly_collection,
-                                              create_monthly_items)
-
 __all__ = [
     'create_daily_items', 'create_daily_collection', 'create_monthly_items',
     'create_monthly_collection'
@@ -13,6 +8,18 @@ __all__ = [
 stactools.core.use_fsspec()
 
 
+def __getattr__(name):
+    # the Item builders import xarray and NetCDF libraries, so are imported on
+    # first use rather than when the plugin is registered
+    if name in ['create_daily_items', 'create_daily_collection']:
+        from stactools.nclimgrid import daily_stac
+        return getattr(daily_stac, name)
+    if name in ['create_monthly_items', 'create_monthly_collection']:
+        from stactools.nclimgrid import monthly_stac
+        return getattr(monthly_stac, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def register_plugin(registry):
     from stactools.nclimgrid import commands
     registry.register_subcommand(commands.create_nclimgrid_command)
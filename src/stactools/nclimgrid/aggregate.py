@@ -0,0 +1,375 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from functools import lru_cache, partial
+from itertools import islice
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Tuple,
+                    TypeVar, Union)
+
+import numpy
+import rasterio
+import xarray
+from rasterio.features import geometry_mask
+from rasterio.transform import Affine
+from rasterio.windows import Window
+from shapely.geometry import box, mapping
+from stactools.core.io import ReadHrefModifier
+
+from stactools.nclimgrid import daily_stac, monthly_stac
+from stactools.nclimgrid.constants import (NODATA, SHAPE, TRANSFORM, VARIABLES,
+                                           Status)
+from stactools.nclimgrid.errors import BadInput
+from stactools.nclimgrid.signing import cache_read_href_modifier
+from stactools.nclimgrid.timeseries import MAX_WORKERS, modify_href, nc_href
+from stactools.nclimgrid.utils import generate_years_months, open_nc
+
+# number of time slices read and reduced together; bounds memory use to
+# BATCH_SIZE slices of the area's bounding window per variable
+BATCH_SIZE = 32
+MASK_CACHE_SIZE = 128
+
+# (row start, row stop, column start, column stop) of a grid window
+Bounds = Tuple[int, int, int, int]
+Geometry = Union[Dict[str, Any], List[float]]
+AreaMeans = Iterator[Tuple[datetime, Dict[str, float]]]
+
+T = TypeVar("T")
+
+
+def area_mask(geometry: Geometry) -> Tuple[Bounds, numpy.ndarray]:
+    """Rasterizes a geometry against the NClimGrid grid. Masks are cached, so
+    repeated aggregations over the same area rasterize it only once.
+
+    Args:
+        geometry (Geometry): GeoJSON geometry dictionary in WGS84, or a
+            [west, south, east, north] bounding box
+
+    Returns:
+        Tuple[Bounds, numpy.ndarray]: grid window bounding the area, and the
+            read-only boolean mask of pixels in the area within the window
+    """
+    if isinstance(geometry, (list, tuple)):
+        geometry = mapping(box(*geometry))
+    return _area_mask(json.dumps(geometry, sort_keys=True))
+
+
+@lru_cache(maxsize=MASK_CACHE_SIZE)
+def _area_mask(geometry_json: str) -> Tuple[Bounds, numpy.ndarray]:
+    geometry = json.loads(geometry_json)
+    # small areas may not contain any pixel centers
+    for all_touched in [False, True]:
+        mask = geometry_mask([geometry],
+                             out_shape=(SHAPE[1], SHAPE[0]),
+                             transform=Affine(*TRANSFORM),
+                             all_touched=all_touched,
+                             invert=True)
+        if mask.any():
+            break
+    else:
+        raise BadInput("Geometry does not intersect the NClimGrid grid")
+
+    rows = numpy.flatnonzero(mask.any(axis=1))
+    cols = numpy.flatnonzero(mask.any(axis=0))
+    bounds = (int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1)
+    window_mask = mask[bounds[0]:bounds[1], bounds[2]:bounds[3]]
+    window_mask.flags.writeable = False
+    return bounds, window_mask
+
+
+def masked_means(batch: numpy.ndarray, mask: numpy.ndarray) -> numpy.ndarray:
+    """Computes the mean of the masked pixels of each slice in a batch,
+    excluding NaN and nodata (-999) values.
+
+    Args:
+        batch (numpy.ndarray): 3D array of slices with dimensions (time, row,
+            column)
+        mask (numpy.ndarray): 2D boolean mask of pixels to include
+
+    Returns:
+        numpy.ndarray: mean of each slice, NaN if no pixels are valid
+    """
+    values = batch[:, mask].astype(numpy.float64)
+    valid = numpy.isfinite(values) & (values != NODATA)
+    sums = numpy.where(valid, values, 0).sum(axis=1)
+    counts = valid.sum(axis=1)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def read_nc_window(ds: xarray.Dataset, var: str, bounds: Bounds,
+                   indices: List[int]) -> numpy.ndarray:
+    """Reads a grid window from time slices of a NetCDF variable.
+
+    Args:
+        ds (xarray.Dataset): opened NetCDF
+        var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
+        bounds (Bounds): grid window, with row 0 at the northern edge
+        indices (List[int]): 1-based indices into the NetCDF timestack
+
+    Returns:
+        numpy.ndarray: 3D array with dimensions (time, row, column)
+    """
+    row_start, row_stop, col_start, col_stop = bounds
+    # NetCDF latitudes may be ascending, i.e., row 0 at the southern edge
+    ascending = ds["lat"].values[0] < ds["lat"].values[-1]
+    lat = slice(row_start, row_stop)
+    if ascending:
+        lat = slice(SHAPE[1] - row_stop, SHAPE[1] - row_start)
+    values = ds[var].isel(time=[index - 1 for index in indices],
+                          lat=lat,
+                          lon=slice(col_start, col_stop)).values
+    if ascending:
+        values = values[:, ::-1, :]
+    return values
+
+
+def read_cog_window(cog_href: str, bounds: Bounds) -> numpy.ndarray:
+    """Reads a grid window from a COG.
+
+    Args:
+        cog_href (str): COG location
+        bounds (Bounds): grid window
+
+    Returns:
+        numpy.ndarray: 2D array with dimensions (row, column)
+    """
+    row_start, row_stop, col_start, col_stop = bounds
+    with rasterio.open(cog_href) as dataset:
+        return dataset.read(1,
+                            window=Window.from_slices((row_start, row_stop),
+                                                      (col_start, col_stop)))
+
+
+def batched(values: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Splits values into lists of at most size values.
+
+    Args:
+        values (Iterable[T]): values to split
+        size (int): maximum batch size
+
+    Returns:
+        Iterator[List[T]]: batches of values
+    """
+    iterator = iter(values)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def monthly_area_means(geometry: Geometry,
+                       start_yyyymm: str,
+                       end_yyyymm: str,
+                       base_cog_href: Optional[str] = None,
+                       base_nc_href: Optional[str] = None,
+                       variables: Optional[List[str]] = None,
+                       read_href_modifier: Optional[ReadHrefModifier] = None,
+                       batch_size: int = BATCH_SIZE,
+                       max_workers: int = MAX_WORKERS) -> AreaMeans:
+    """Computes the monthly mean of each variable over an area, from either
+    the monthly NetCDF archive or monthly COGs. Only the window bounding the
+    area is read, and results are generated as each batch of months is
+    reduced, so memory use does not grow with the length of the date range.
+
+    Args:
+        geometry (Geometry): GeoJSON geometry dictionary in WGS84, or a
+            [west, south, east, north] bounding box
+        start_yyyymm (str): start month in YYYYMM format
+        end_yyyymm (str): end month in YYYYMM format
+        base_cog_href (Optional[str]): COG storage location, used if
+            base_nc_href is not supplied
+        base_nc_href (Optional[str]): optional href to the base of a NetCDF
+            directory structure
+        variables (Optional[List[str]]): weather variables to aggregate,
+            defaults to all variables
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        batch_size (int): number of months read and reduced together
+        max_workers (int): maximum number of COGs read concurrently
+
+    Returns:
+        AreaMeans: iterator of the time and mean of each variable
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    if not (base_cog_href or base_nc_href):
+        raise BadInput("Either base_cog_href or base_nc_href is required")
+    variables = variables or VARIABLES
+    bounds, mask = area_mask(geometry)
+    indices = monthly_stac.month_indices(start_yyyymm, end_yyyymm)
+
+    def nc_means(base_nc_href: str) -> AreaMeans:
+        with ExitStack() as stack:
+            datasets = {
+                var:
+                stack.enter_context(
+                    open_nc(
+                        modify_href(
+                            nc_href(base_nc_href, f"nclimgrid_{var}.nc"),
+                            read_href_modifier)))
+                for var in variables
+            }
+            for batch in batched(indices, batch_size):
+                means = {
+                    var:
+                    masked_means(
+                        read_nc_window(datasets[var], var, bounds,
+                                       [idx for _, _, idx in batch]), mask)
+                    for var in variables
+                }
+                yield from batch_results(
+                    [datetime(year, month, 1) for year, month, _ in batch],
+                    means)
+
+    def cog_means(base_cog_href: str) -> AreaMeans:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch in batched(indices, batch_size):
+                means = dict()
+                for var in variables:
+                    cog_hrefs = [
+                        modify_href(
+                            monthly_stac.get_cog_href(year, month, var,
+                                                      base_cog_href),
+                            read_href_modifier) for year, month, _ in batch
+                    ]
+                    means[var] = masked_means(
+                        numpy.stack(
+                            list(
+                                executor.map(
+                                    partial(read_cog_window, bounds=bounds),
+                                    cog_hrefs))), mask)
+                yield from batch_results(
+                    [datetime(year, month, 1) for year, month, _ in batch],
+                    means)
+
+    if base_nc_href:
+        return nc_means(base_nc_href)
+    return cog_means(base_cog_href or "")
+
+
+def daily_area_means(geometry: Geometry,
+                     start_yyyymm: str,
+                     end_yyyymm: str,
+                     scaled_or_prelim: Union[str, Status],
+                     base_cog_href: Optional[str] = None,
+                     base_nc_href: Optional[str] = None,
+                     variables: Optional[List[str]] = None,
+                     read_href_modifier: Optional[ReadHrefModifier] = None,
+                     batch_size: int = BATCH_SIZE,
+                     max_workers: int = MAX_WORKERS) -> AreaMeans:
+    """Computes the daily mean of each variable over an area, from either the
+    daily NetCDF files or daily COGs. Only the window bounding the area is
+    read, and results are generated as each batch of days is reduced, so
+    memory use does not grow with the length of the date range. When reading
+    NetCDFs, days without preliminary data are NaN.
+
+    Args:
+        geometry (Geometry): GeoJSON geometry dictionary in WGS84, or a
+            [west, south, east, north] bounding box
+        start_yyyymm (str): start month in YYYYMM format
+        end_yyyymm (str): end month in YYYYMM format
+        scaled_or_prelim (Union[str, Status]): either a string ("scaled" or
+            "prelim") or enumeration specifying whether to read final or
+            preliminary data
+        base_cog_href (Optional[str]): COG storage location, used if
+            base_nc_href is not supplied
+        base_nc_href (Optional[str]): optional href to the base of a NetCDF
+            directory structure
+        variables (Optional[List[str]]): weather variables to aggregate,
+            defaults to all variables
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        batch_size (int): number of days read and reduced together
+        max_workers (int): maximum number of COGs read concurrently
+
+    Returns:
+        AreaMeans: iterator of the time and mean of each variable
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    if not (base_cog_href or base_nc_href):
+        raise BadInput("Either base_cog_href or base_nc_href is required")
+    variables = variables or VARIABLES
+    status = Status(scaled_or_prelim)
+    bounds, mask = area_mask(geometry)
+    years_months = generate_years_months(start_yyyymm, end_yyyymm)
+
+    def nc_means(base_nc_href: str) -> AreaMeans:
+        for year, month in years_months:
+            with ExitStack() as stack:
+                datasets = {
+                    var:
+                    stack.enter_context(
+                        open_nc(
+                            modify_href(
+                                nc_href(
+                                    base_nc_href,
+                                    daily_stac.daily_nc_href(
+                                        year, month, status, var)),
+                                read_href_modifier)))
+                    for var in variables
+                }
+                # each NetCDF holds consecutive days from the start of the
+                # month, e.g., only the days published so far for "prelim"
+                # data, so the days read are those held by all of them
+                num_days = min(ds.sizes["time"] for ds in datasets.values())
+                for batch in batched(range(1, num_days + 1), batch_size):
+                    means = {
+                        var:
+                        masked_means(
+                            read_nc_window(datasets[var], var, bounds, batch),
+                            mask)
+                        for var in variables
+                    }
+                    yield from batch_results(
+                        [datetime(year, month, day) for day in batch], means)
+
+    def cog_days(base_cog_href: str) -> Iterator[Tuple[int, int, int]]:
+        for year, month in years_months:
+            num_days = daily_stac.num_valid_days(
+                year,
+                month,
+                status,
+                base_cog_href,
+                read_href_modifier=read_href_modifier)
+            for day in range(1, num_days + 1):
+                yield year, month, day
+
+    def cog_means(base_cog_href: str) -> AreaMeans:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch in batched(cog_days(base_cog_href), batch_size):
+                means = dict()
+                for var in variables:
+                    cog_hrefs = [
+                        modify_href(
+                            daily_stac.get_cog_href(year, month, day, var,
+                                                    status, base_cog_href),
+                            read_href_modifier) for year, month, day in batch
+                    ]
+                    means[var] = masked_means(
+                        numpy.stack(
+                            list(
+                                executor.map(
+                                    partial(read_cog_window, bounds=bounds),
+                                    cog_hrefs))), mask)
+                yield from batch_results([datetime(*day) for day in batch],
+                                         means)
+
+    if base_nc_href:
+        return nc_means(base_nc_href)
+    return cog_means(base_cog_href or "")
+
+
+def batch_results(times: List[datetime],
+                  means: Dict[str, numpy.ndarray]) -> AreaMeans:
+    """Splits the means of a batch of time slices into results for each time.
+
+    Args:
+        times (List[datetime]): time of each slice in the batch
+        means (Dict[str, numpy.ndarray]): mean of each slice, keyed by
+            variable
+
+    Returns:
+        AreaMeans: iterator of the time and mean of each variable
+    """
+    for i, time in enumerate(times):
+        yield time, {var: float(values[i]) for var, values in means.items()}
@@ -1,12 +1,18 @@
+import csv
+import json
 import logging
 import os
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import click
-from pystac import CatalogType
+import fsspec
+from pystac import Item
 
-from stactools.nclimgrid import daily_stac, monthly_stac
-from stactools.nclimgrid.constants import Status
+from stactools.nclimgrid.constants import (ANNUAL, CONNECTION_LIMIT,
+                                           KEEPALIVE_TIMEOUT, NORMALS_END_YEAR,
+                                           NORMALS_START_YEAR, POLL_INTERVAL,
+                                           SEASONS, VARIABLES, Status)
+from stactools.nclimgrid.errors import BadInput, ExistError
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +24,23 @@ def create_nclimgrid_command(cli):
         "nclimgrid",
         short_help=("Commands for working with stactools-nclimgrid"),
     )
-    def nclimgrid():
-        pass
+    @click.option("--keepalive_timeout",
+                  type=float,
+                  default=KEEPALIVE_TIMEOUT,
+                  help="seconds an idle HTTP connection is kept open for "
+                  "reuse, or 0 to close connections after each request")
+    @click.option("--connection_limit",
+                  type=int,
+                  default=CONNECTION_LIMIT,
+                  help="maximum number of simultaneous HTTP connections, or 0 "
+                  "for no limit")
+    def nclimgrid(keepalive_timeout: float, connection_limit: int):
+        # commands import the data libraries only when run, so that help and
+        # plugin registration stay fast
+        if (keepalive_timeout, connection_limit) != (KEEPALIVE_TIMEOUT,
+                                                     CONNECTION_LIMIT):
+            from stactools.nclimgrid.utils import configure_filesystems
+            configure_filesystems(keepalive_timeout, connection_limit)
 
     @nclimgrid.command("create-daily-collection",
                        short_help="Create a daily NClimGrid STAC collection")
@@ -32,14 +53,48 @@ def create_nclimgrid_command(cli):
     @click.option("--base_nc_href",
                   type=str,
                   help="option to create COGs from NetCDFs found at this href")
+    @click.option(
+        "--skip_unchanged",
+        is_flag=True,
+        help="option to not recreate COGs with unchanged source data")
+    @click.option("--pipelined",
+                  is_flag=True,
+                  help="option to run Item creation as concurrent stages")
+    @click.option("--shard",
+                  type=str,
+                  help="option to process only shard i of N, e.g., 2/4")
+    @click.option("--multiband",
+                  is_flag=True,
+                  help="option to store all variables in one COG per Item")
+    @click.option("--quantized",
+                  is_flag=True,
+                  help="option to store variables as int16 with a scale and "
+                  "offset")
+    @click.option("--changed_only",
+                  is_flag=True,
+                  help="option to create COGs and Items only for days whose "
+                  "source data has changed since the last run")
+    @click.option("--index",
+                  type=str,
+                  help="option to record the Items in a SQLite index at this "
+                  "local path")
     def create_daily_collection_command(destination: str,
                                         start_yyyymm: str,
                                         end_yyyymm: str,
                                         scaled_or_prelim: str,
                                         base_cog_href: str,
-                                        base_nc_href: Optional[str] = None):
+                                        base_nc_href: Optional[str] = None,
+                                        skip_unchanged: bool = False,
+                                        pipelined: bool = False,
+                                        shard: Optional[str] = None,
+                                        multiband: bool = False,
+                                        quantized: bool = False,
+                                        changed_only: bool = False,
+                                        index: Optional[str] = None):
         """Create a STAC collection of daily NClimGrid data with optional COG
-        creation from NetCDF data.
+        creation from NetCDF data. With --changed_only, the Collection holds
+        only the Items of days whose data has changed, and nothing is saved
+        if no day has changed.
 
         \b
         DESTINATION (str): An HREF for the Collection JSON
@@ -49,18 +104,32 @@ def create_nclimgrid_command(cli):
         BASE_COG_HREF (str): Flat file COG location (COGs are existing or,
                              optionally, created from NetCDF data)
         """
-        collection = daily_stac.create_daily_collection(
-            start_yyyymm,
-            end_yyyymm,
-            scaled_or_prelim,
-            base_cog_href,
-            base_nc_href=base_nc_href)
+        from stactools.nclimgrid import daily_stac
+        from stactools.nclimgrid.save import save_collection
+        from stactools.nclimgrid.utils import parse_shard
+
+        try:
+            collection = daily_stac.create_daily_collection(
+                start_yyyymm,
+                end_yyyymm,
+                scaled_or_prelim,
+                base_cog_href,
+                base_nc_href=base_nc_href,
+                skip_unchanged=skip_unchanged,
+                pipelined=pipelined,
+                shard=parse_shard(shard) if shard else None,
+                multiband=multiband,
+                quantized=quantized,
+                changed_only=changed_only,
+                index_path=index)
+        except ExistError:
+            if not changed_only:
+                raise
+            logger.info("No daily data has changed; nothing saved")
+            return
 
-        collection.catalog_type = CatalogType.SELF_CONTAINED
-        collection.set_self_href(destination)
-        collection.normalize_hrefs(destination)
         collection.validate()
-        collection.save()
+        save_collection(collection, destination)
 
     @nclimgrid.command(
         "create-daily-item",
@@ -76,13 +145,37 @@ def create_nclimgrid_command(cli):
     @click.option("--base_nc_href",
                   type=str,
                   help="option to create COGs from NetCDFs found at this href")
+    @click.option(
+        "--skip_unchanged",
+        is_flag=True,
+        help="option to not recreate COGs with unchanged source data")
+    @click.option("--range_read/--no_range_read",
+                  default=True,
+                  help="option to read only the day's data from remote "
+                  "NetCDFs rather than downloading them (default)")
+    @click.option("--multiband",
+                  is_flag=True,
+                  help="option to store all variables in one COG per Item")
+    @click.option("--quantized",
+                  is_flag=True,
+                  help="option to store variables as int16 with a scale and "
+                  "offset")
+    @click.option("--index",
+                  type=str,
+                  help="option to record the Items in a SQLite index at this "
+                  "local path")
     def create_daily_item_command(destination: str,
                                   year: int,
                                   month: int,
                                   day: int,
                                   scaled_or_prelim: str,
                                   base_cog_href: str,
-                                  base_nc_href: Optional[str] = None):
+                                  base_nc_href: Optional[str] = None,
+                                  skip_unchanged: bool = False,
+                                  range_read: bool = True,
+                                  multiband: bool = False,
+                                  quantized: bool = False,
+                                  index: Optional[str] = None):
         """Create a STAC Item for a single day of daily NClimGrid data with
         optional COG creation from NetCDF data.
 
@@ -96,12 +189,19 @@ def create_nclimgrid_command(cli):
         BASE_COG_HREF (str): Flat file COG location (COGs are existing or,
                              optionally, created from NetCDF data)
         """
+        from stactools.nclimgrid import daily_stac
+
         item = daily_stac.create_daily_items(year,
                                              month,
                                              scaled_or_prelim,
                                              base_cog_href,
                                              base_nc_href=base_nc_href,
-                                             day=day)[0]
+                                             day=day,
+                                             skip_unchanged=skip_unchanged,
+                                             range_read=range_read,
+                                             multiband=multiband,
+                                             quantized=quantized,
+                                             index_path=index)[0]
 
         item_path = os.path.join(destination, f"{item.id}.json")
         item.set_self_href(item_path)
@@ -119,11 +219,42 @@ def create_nclimgrid_command(cli):
     @click.option("--base_nc_href",
                   type=str,
                   help="option to create COGs from NetCDFs found at this href")
+    @click.option(
+        "--skip_unchanged",
+        is_flag=True,
+        help="option to not recreate COGs with unchanged source data")
+    @click.option("--range_read",
+                  is_flag=True,
+                  help="option to read only required data from remote NetCDFs")
+    @click.option("--pipelined",
+                  is_flag=True,
+                  help="option to run Item creation as concurrent stages")
+    @click.option("--shard",
+                  type=str,
+                  help="option to process only shard i of N, e.g., 2/4")
+    @click.option("--multiband",
+                  is_flag=True,
+                  help="option to store all variables in one COG per Item")
+    @click.option("--quantized",
+                  is_flag=True,
+                  help="option to store variables as int16 with a scale and "
+                  "offset")
+    @click.option("--index",
+                  type=str,
+                  help="option to record the Items in a SQLite index at this "
+                  "local path")
     def create_monthly_collection_command(destination: str,
                                           start_yyyymm: str,
                                           end_yyyymm: str,
                                           base_cog_href: str,
-                                          base_nc_href: Optional[str] = None):
+                                          base_nc_href: Optional[str] = None,
+                                          skip_unchanged: bool = False,
+                                          range_read: bool = False,
+                                          pipelined: bool = False,
+                                          shard: Optional[str] = None,
+                                          multiband: bool = False,
+                                          quantized: bool = False,
+                                          index: Optional[str] = None):
         """Create a STAC Collection of monthly NClimGrid data with optional COG
         creation from NetCDF data.
 
@@ -134,14 +265,25 @@ def create_nclimgrid_command(cli):
         BASE_COG_HREF (str): Flat file COG location (COGs are existing or,
                              optionally, created from NetCDF data)
         """
+        from stactools.nclimgrid import monthly_stac
+        from stactools.nclimgrid.save import save_collection
+        from stactools.nclimgrid.utils import parse_shard
+
         collection = monthly_stac.create_monthly_collection(
-            start_yyyymm, end_yyyymm, base_cog_href, base_nc_href=base_nc_href)
+            start_yyyymm,
+            end_yyyymm,
+            base_cog_href,
+            base_nc_href=base_nc_href,
+            skip_unchanged=skip_unchanged,
+            range_read=range_read,
+            pipelined=pipelined,
+            shard=parse_shard(shard) if shard else None,
+            multiband=multiband,
+            quantized=quantized,
+            index_path=index)
 
-        collection.catalog_type = CatalogType.SELF_CONTAINED
-        collection.set_self_href(destination)
-        collection.normalize_hrefs(destination)
         collection.validate()
-        collection.save()
+        save_collection(collection, destination)
 
     @nclimgrid.command(
         "create-monthly-item",
@@ -153,10 +295,33 @@ def create_nclimgrid_command(cli):
     @click.option("--base_nc_href",
                   type=str,
                   help="option to create COGs from NetCDFs found at this href")
+    @click.option(
+        "--skip_unchanged",
+        is_flag=True,
+        help="option to not recreate COGs with unchanged source data")
+    @click.option("--range_read",
+                  is_flag=True,
+                  help="option to read only required data from remote NetCDFs")
+    @click.option("--multiband",
+                  is_flag=True,
+                  help="option to store all variables in one COG per Item")
+    @click.option("--quantized",
+                  is_flag=True,
+                  help="option to store variables as int16 with a scale and "
+                  "offset")
+    @click.option("--index",
+                  type=str,
+                  help="option to record the Items in a SQLite index at this "
+                  "local path")
     def create_monthly_item_command(destination: str,
                                     yyyymm: str,
                                     base_cog_href: str,
-                                    base_nc_href: Optional[str] = None):
+                                    base_nc_href: Optional[str] = None,
+                                    skip_unchanged: bool = False,
+                                    range_read: bool = False,
+                                    multiband: bool = False,
+                                    quantized: bool = False,
+                                    index: Optional[str] = None):
         """Create a STAC Item for a single month of monthly NClimGrid data with
         optional COG creation from NetCDF data.
 
@@ -167,14 +332,424 @@ def create_nclimgrid_command(cli):
         BASE_COG_HREF (str): Flat file COG location (COGs are existing or,
                              optionally, created from NetCDF data)
         """
+        from stactools.nclimgrid import monthly_stac
+
         item = monthly_stac.create_monthly_items(yyyymm,
                                                  yyyymm,
                                                  base_cog_href,
-                                                 base_nc_href=base_nc_href)[0]
+                                                 base_nc_href=base_nc_href,
+                                                 skip_unchanged=skip_unchanged,
+                                                 range_read=range_read,
+                                                 multiband=multiband,
+                                                 quantized=quantized,
+                                                 index_path=index)[0]
 
         item_path = os.path.join(destination, f"{item.id}.json")
         item.set_self_href(item_path)
         item.validate()
         item.save_object()
 
+    @nclimgrid.command(
+        "watch-daily",
+        short_help="Create daily NClimGrid STAC items as new days arrive",
+    )
+    @click.argument("destination", type=str)
+    @click.argument("base_cog_href", type=str)
+    @click.argument("base_nc_href", type=str)
+    @click.option("--yyyymm",
+                  type=str,
+                  help="option to watch this month rather than the current "
+                  "month")
+    @click.option("--interval",
+                  type=float,
+                  default=POLL_INTERVAL,
+                  help="seconds between polls of the NetCDF files")
+    @click.option("--max_polls",
+                  type=int,
+                  help="option to stop after this many polls")
+    @click.option(
+        "--skip_unchanged",
+        is_flag=True,
+        help="option to not recreate COGs with unchanged source data")
+    @click.option("--multiband",
+                  is_flag=True,
+                  help="option to store all variables in one COG per Item")
+    @click.option("--quantized",
+                  is_flag=True,
+                  help="option to store variables as int16 with a scale and "
+                  "offset")
+    @click.option("--index",
+                  type=str,
+                  help="option to record the Items in a SQLite index at this "
+                  "local path")
+    def watch_daily_command(destination: str,
+                            base_cog_href: str,
+                            base_nc_href: str,
+                            yyyymm: Optional[str] = None,
+                            interval: float = POLL_INTERVAL,
+                            max_polls: Optional[int] = None,
+                            skip_unchanged: bool = False,
+                            multiband: bool = False,
+                            quantized: bool = False,
+                            index: Optional[str] = None):
+        """Poll the preliminary daily NetCDF files of a month, which NOAA
+        updates in place, and create COGs and STAC Items for only the days
+        that have become valid since the last poll.
+
+        \b
+        DESTINATION (str): A directory where the STAC Item JSON files will be
+                           saved
+        BASE_COG_HREF (str): Flat file COG location
+        BASE_NC_HREF (str): Local path or URL to the base of the NetCDF
+                            directory structure
+        """
+        from stactools.nclimgrid.utils import generate_years_months
+        from stactools.nclimgrid.watch import DailyWatcher
+
+        year, month = None, None
+        if yyyymm:
+            [[year, month]] = generate_years_months(yyyymm, yyyymm)
+
+        def save_items(items: List[Item]) -> None:
+            for item in items:
+                item.set_self_href(os.path.join(destination,
+                                                f"{item.id}.json"))
+                item.save_object()
+            logger.info(f"Saved {len(items)} new daily Items")
+
+        watcher = DailyWatcher(base_cog_href,
+                               base_nc_href,
+                               skip_unchanged=skip_unchanged,
+                               multiband=multiband,
+                               quantized=quantized,
+                               index_path=index)
+        watcher.watch(save_items,
+                      interval=interval,
+                      year=year,
+                      month=month,
+                      max_polls=max_polls)
+
+    @nclimgrid.command(
+        "merge-items",
+        short_help="Merge NClimGrid STAC items into a single collection",
+    )
+    @click.argument("destination", type=str)
+    @click.argument("sources", type=str, nargs=-1, required=True)
+    @click.option("--index",
+                  type=str,
+                  help="option to record the Items in a SQLite index at this "
+                  "local path")
+    def merge_items_command(destination: str,
+                            sources: List[str],
+                            index: Optional[str] = None):
+        """Merge STAC Items from Collections (e.g., created with the --shard
+        option), directories of Item JSON files, or NDJSON files into a single
+        self-contained STAC Collection. Items are deduplicated by id, with
+        "scaled" Items preferred over "prelim" Items. COGs are not read.
+
+        \b
+        DESTINATION (str): A directory where the merged Collection will be
+                           saved
+        SOURCES (str): HREFs of Collection JSON files, Item directories, or
+                       NDJSON files
+        """
+        from stactools.nclimgrid.merge import merge_items
+
+        merge_items(list(sources), destination, index_path=index)
+
+    @nclimgrid.command(
+        "create-daily-rollup-collection",
+        short_help="Create a STAC collection of monthly rollups of daily data",
+    )
+    @click.argument("destination", type=str)
+    @click.argument("start_yyyymm", type=str)
+    @click.argument("end_yyyymm", type=str)
+    @click.argument("scaled_or_prelim",
+                    type=click.Choice([status.value for status in Status]))
+    @click.argument("base_cog_href", type=str)
+    @click.argument("base_nc_href", type=str)
+    def create_daily_rollup_collection_command(
+            destination: str, start_yyyymm: str, end_yyyymm: str,
+            scaled_or_prelim: str, base_cog_href: str, base_nc_href: str):
+        """Create a STAC Collection of monthly total precipitation, mean
+        temperatures, and valid day counts, computed from daily NClimGrid
+        NetCDF data and stored as COGs.
+
+        \b
+        DESTINATION (str): An HREF for the Collection JSON
+        START_YYYYMM (str): Start month in "YYYYMM" format
+        END_YYYYMM (str): End month in "YYYYMM" format
+        SCALED_OR_PRELIM (str): Choice of "scaled" or "prelim" data
+        BASE_COG_HREF (str): Flat file COG location
+        BASE_NC_HREF (str): Base HREF of the daily NetCDF directory structure
+        """
+        from stactools.nclimgrid import rollup
+        from stactools.nclimgrid.save import save_collection
+
+        collection = rollup.create_daily_rollup_collection(
+            start_yyyymm, end_yyyymm, scaled_or_prelim, base_cog_href,
+            base_nc_href)
+
+        collection.validate()
+        save_collection(collection, destination)
+
+    @nclimgrid.command(
+        "create-seasonal-rollup-collection",
+        short_help="Create a STAC collection of seasonal and annual rollups "
+        "of monthly data",
+    )
+    @click.argument("destination", type=str)
+    @click.argument("start_year", type=int)
+    @click.argument("end_year", type=int)
+    @click.argument("base_cog_href", type=str)
+    @click.argument("base_nc_href", type=str)
+    @click.option("--period",
+                  "periods",
+                  type=click.Choice(list(SEASONS) + [ANNUAL]),
+                  multiple=True,
+                  help="option to roll up only this season or the whole year "
+                  "(repeatable)")
+    def create_seasonal_rollup_collection_command(
+            destination: str,
+            start_year: int,
+            end_year: int,
+            base_cog_href: str,
+            base_nc_href: str,
+            periods: Optional[List[str]] = None):
+        """Create a STAC Collection of seasonal and annual total
+        precipitation, mean temperatures, and valid month counts, computed from
+        the monthly NClimGrid NetCDF data and stored as COGs.
+
+        \b
+        DESTINATION (str): An HREF for the Collection JSON
+        START_YEAR (int): First year
+        END_YEAR (int): Last year
+        BASE_COG_HREF (str): Flat file COG location
+        BASE_NC_HREF (str): Base HREF of the monthly NetCDF files
+        """
+        from stactools.nclimgrid import rollup
+        from stactools.nclimgrid.save import save_collection
+
+        collection = rollup.create_seasonal_rollup_collection(
+            start_year,
+            end_year,
+            base_cog_href,
+            base_nc_href,
+            periods=list(periods) if periods else None)
+
+        collection.validate()
+        save_collection(collection, destination)
+
+    @nclimgrid.command(
+        "create-normals-collection",
+        short_help="Create a STAC collection of monthly NClimGrid normals",
+    )
+    @click.argument("destination", type=str)
+    @click.argument("base_cog_href", type=str)
+    @click.argument("base_nc_href", type=str)
+    @click.option("--start_year",
+                  type=int,
+                  default=NORMALS_START_YEAR,
+                  show_default=True,
+                  help="first year of the normals period")
+    @click.option("--end_year",
+                  type=int,
+                  default=NORMALS_END_YEAR,
+                  show_default=True,
+                  help="last year of the normals period")
+    @click.option("--month",
+                  "months",
+                  type=click.IntRange(1, 12),
+                  multiple=True,
+                  help="option to compute normals for only this calendar "
+                  "month (repeatable)")
+    def create_normals_collection_command(destination: str,
+                                          base_cog_href: str,
+                                          base_nc_href: str,
+                                          start_year: int = NORMALS_START_YEAR,
+                                          end_year: int = NORMALS_END_YEAR,
+                                          months: Optional[List[int]] = None):
+        """Create a STAC Collection of monthly normals computed from the
+        monthly NClimGrid NetCDF data and stored as COGs. Running totals are
+        stored with the COGs, so re-running after new months are published,
+        or with a new normals period, reads only the months that change.
+
+        \b
+        DESTINATION (str): An HREF for the Collection JSON
+        BASE_COG_HREF (str): Flat file COG and normals state location
+        BASE_NC_HREF (str): Base HREF of the monthly NetCDF files
+        """
+        from stactools.nclimgrid import normals
+        from stactools.nclimgrid.save import save_collection
+
+        collection = normals.create_normals_collection(
+            base_cog_href,
+            base_nc_href,
+            start_year=start_year,
+            end_year=end_year,
+            months=list(months) if months else None)
+
+        collection.validate()
+        save_collection(collection, destination)
+
+    @nclimgrid.command(
+        "point-timeseries",
+        short_help="Extract NClimGrid time series at points",
+    )
+    @click.argument("destination", type=str)
+    @click.argument("start_yyyymm", type=str)
+    @click.argument("end_yyyymm", type=str)
+    @click.option("--point",
+                  "points",
+                  type=(float, float),
+                  multiple=True,
+                  required=True,
+                  help="longitude and latitude of a point (repeatable)")
+    @click.option("--daily",
+                  "scaled_or_prelim",
+                  type=click.Choice([status.value for status in Status]),
+                  help="option to extract daily scaled or prelim data rather "
+                  "than monthly data")
+    @click.option("--base_cog_href",
+                  type=str,
+                  help="option to read data from COGs found at this href")
+    @click.option("--base_nc_href",
+                  type=str,
+                  help="option to read data from NetCDFs found at this href")
+    @click.option("--variable",
+                  "variables",
+                  type=click.Choice(VARIABLES),
+                  multiple=True,
+                  help="option to extract only this variable (repeatable)")
+    def point_timeseries_command(destination: str,
+                                 start_yyyymm: str,
+                                 end_yyyymm: str,
+                                 points: List[Tuple[float, float]],
+                                 scaled_or_prelim: Optional[str] = None,
+                                 base_cog_href: Optional[str] = None,
+                                 base_nc_href: Optional[str] = None,
+                                 variables: Optional[List[str]] = None):
+        """Extract monthly or daily time series of NClimGrid data at points to
+        a CSV file.
+
+        \b
+        DESTINATION (str): An HREF for the CSV file
+        START_YYYYMM (str): Start month in "YYYYMM" format
+        END_YYYYMM (str): End month in "YYYYMM" format
+        """
+        from stactools.nclimgrid import timeseries
+
+        lons = [lon for lon, _ in points]
+        lats = [lat for _, lat in points]
+        if scaled_or_prelim:
+            dataset = timeseries.daily_point_timeseries(
+                lons,
+                lats,
+                start_yyyymm,
+                end_yyyymm,
+                scaled_or_prelim,
+                base_cog_href=base_cog_href,
+                base_nc_href=base_nc_href,
+                variables=list(variables) if variables else None)
+        else:
+            dataset = timeseries.monthly_point_timeseries(
+                lons,
+                lats,
+                start_yyyymm,
+                end_yyyymm,
+                base_cog_href=base_cog_href,
+                base_nc_href=base_nc_href,
+                variables=list(variables) if variables else None)
+
+        with fsspec.open(destination, "w") as f:
+            dataset.to_dataframe().to_csv(f)
+
+    @nclimgrid.command(
+        "area-timeseries",
+        short_help="Aggregate NClimGrid time series over an area",
+    )
+    @click.argument("destination", type=str)
+    @click.argument("start_yyyymm", type=str)
+    @click.argument("end_yyyymm", type=str)
+    @click.option("--geometry",
+                  "geometry_href",
+                  type=str,
+                  help="href of a GeoJSON geometry or Feature defining the "
+                  "area")
+    @click.option("--bbox",
+                  type=(float, float, float, float),
+                  help="west, south, east, and north bounds of the area")
+    @click.option(
+        "--daily",
+        "scaled_or_prelim",
+        type=click.Choice([status.value for status in Status]),
+        help="option to aggregate daily scaled or prelim data rather "
+        "than monthly data")
+    @click.option("--base_cog_href",
+                  type=str,
+                  help="option to read data from COGs found at this href")
+    @click.option("--base_nc_href",
+                  type=str,
+                  help="option to read data from NetCDFs found at this href")
+    @click.option("--variable",
+                  "variables",
+                  type=click.Choice(VARIABLES),
+                  multiple=True,
+                  help="option to aggregate only this variable (repeatable)")
+    def area_timeseries_command(destination: str,
+                                start_yyyymm: str,
+                                end_yyyymm: str,
+                                geometry_href: Optional[str] = None,
+                                bbox: Optional[Tuple[float, float, float,
+                                                     float]] = None,
+                                scaled_or_prelim: Optional[str] = None,
+                                base_cog_href: Optional[str] = None,
+                                base_nc_href: Optional[str] = None,
+                                variables: Optional[List[str]] = None):
+        """Compute monthly or daily area means of NClimGrid data over a
+        polygon or bounding box, writing a CSV file as results are computed.
+
+        \b
+        DESTINATION (str): An HREF for the CSV file
+        START_YYYYMM (str): Start month in "YYYYMM" format
+        END_YYYYMM (str): End month in "YYYYMM" format
+        """
+        from stactools.nclimgrid import aggregate
+
+        geometry: aggregate.Geometry
+        if geometry_href:
+            with fsspec.open(geometry_href, "r") as f:
+                geojson = json.load(f)
+            if geojson.get("type") == "Feature":
+                geojson = geojson["geometry"]
+            geometry = geojson
+        elif bbox:
+            geometry = list(bbox)
+        else:
+            raise BadInput("Either --geometry or --bbox is required")
+
+        variables = list(variables) if variables else VARIABLES
+        if scaled_or_prelim:
+            results = aggregate.daily_area_means(geometry,
+                                                 start_yyyymm,
+                                                 end_yyyymm,
+                                                 scaled_or_prelim,
+                                                 base_cog_href=base_cog_href,
+                                                 base_nc_href=base_nc_href,
+                                                 variables=variables)
+        else:
+            results = aggregate.monthly_area_means(geometry,
+                                                   start_yyyymm,
+                                                   end_yyyymm,
+                                                   base_cog_href=base_cog_href,
+                                                   base_nc_href=base_nc_href,
+                                                   variables=variables)
+
+        with fsspec.open(destination, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time"] + variables)
+            for time, means in results:
+                writer.writerow([time.isoformat()] +
+                                [means[var] for var in variables])
+
     return nclimgrid
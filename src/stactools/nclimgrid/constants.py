@@ -3,7 +3,6 @@ from enum import Enum
 
 from pystac import Link, Provider, ProviderRole
 from pystac.extensions.scientific import Publication
-from shapely.geometry import box, mapping
 
 
 class Status(Enum):
@@ -12,10 +11,18 @@ class Status(Enum):
 
 
 VARIABLES = ["prcp", "tavg", "tmax", "tmin"]
+NODATA = -999
 MONTHLY_START = datetime(1895, 1, 1)
 
 WGS84_BBOX = [-124.7083, 24.5417, -67.0000, 49.3750]
-WGS84_GEOMETRY = mapping(box(*WGS84_BBOX))
+# counterclockwise polygon of WGS84_BBOX, as shapely.geometry.mapping(box())
+WGS84_GEOMETRY = {
+    "type":
+    "Polygon",
+    "coordinates":
+    (((-67.0000, 24.5417), (-67.0000, 49.3750), (-124.7083, 49.3750),
+      (-124.7083, 24.5417), (-67.0000, 24.5417)), )
+}
 
 COG_ASSET_TITLE = {
     "prcp": "Precipitation COG",
@@ -23,6 +30,22 @@ COG_ASSET_TITLE = {
     "tmax": "Maximum temperature COG",
     "tmin": "Minimum temperature COG"
 }
+MULTIBAND_COG_ASSET_KEY = "cog"
+MULTIBAND_COG_ASSET_TITLE = "Precipitation and temperature COG"
+BAND_DESCRIPTION = {
+    "prcp": "Precipitation",
+    "tavg": "Average temperature",
+    "tmax": "Maximum temperature",
+    "tmin": "Minimum temperature"
+}
+
+# int16 packing of quantized COGs, where value = packed * scale + offset:
+# temperatures to 0.01 degC, and precipitation from 0 to 3276.7 mm in
+# 0.05 mm steps
+QUANTIZED_DTYPE = "int16"
+QUANTIZED_NODATA = -32768
+QUANTIZED_SCALE = {"prcp": 0.05, "tavg": 0.01, "tmax": 0.01, "tmin": 0.01}
+QUANTIZED_OFFSET = {"prcp": 1638.35, "tavg": 0.0, "tmax": 0.0, "tmin": 0.0}
 
 LICENSE = "proprietary"
 LICENSE_LINK = Link(
@@ -40,6 +63,13 @@ PROVIDERS = [
              url=("https://www.ncei.noaa.gov/access/metadata/landing-page/bin/"
                   "iso?id=gov.noaa.ncdc:C00332"))
 ]
+# seconds an idle HTTP connection is kept open for reuse (0 to close)
+KEEPALIVE_TIMEOUT = 15.0
+# maximum number of simultaneous HTTP connections (0 for no limit)
+CONNECTION_LIMIT = 100
+# seconds between polls of the daily preliminary NetCDF sources
+POLL_INTERVAL = 15 * 60
+
 EPSG = 4326
 SHAPE = [1385, 596]
 TRANSFORM = [
@@ -98,3 +128,69 @@ MONTHLY_DATA_PUBLICATIONS = [
         " Climate Divisions, Journal of Applied Meteorology and Climatology, "
         "53(5), 1232-1251."))
 ]
+
+# months of each season, with December taken from the previous year
+SEASONS = {
+    "djf": [12, 1, 2],
+    "mam": [3, 4, 5],
+    "jja": [6, 7, 8],
+    "son": [9, 10, 11]
+}
+ANNUAL = "annual"
+# rollup asset key -> variable, or None for the count of valid time slices
+ROLLUP_VARIABLES = {
+    "prcp-total": "prcp",
+    "tavg-mean": "tavg",
+    "tmax-mean": "tmax",
+    "tmin-mean": "tmin",
+    "valid-count": None
+}
+ROLLUP_ASSET_TITLE = {
+    "prcp-total": "Total precipitation COG",
+    "tavg-mean": "Mean average temperature COG",
+    "tmax-mean": "Mean maximum temperature COG",
+    "tmin-mean": "Mean minimum temperature COG",
+    "valid-count": "Count of time slices with valid data for all variables COG"
+}
+MONTHLY_ROLLUP_COLLECTION_ID = "nclimgrid-daily-monthly-rollups"
+MONTHLY_ROLLUP_COLLECTION_TITLE = (
+    "NOAA U.S. Climate Gridded Dataset Monthly Rollups of Daily Data")
+MONTHLY_ROLLUP_COLLECTION_DESCRIPTION = (
+    "Monthly total precipitation, mean average, maximum, and minimum "
+    "temperature, and counts of days with valid data, computed from the NOAA "
+    "Daily U.S. Climate Gridded Dataset (NClimGrid-d) in a 1/24 degree "
+    "lat/lon (nominal 5x5 kilometer) grid for the Continental United States. "
+    "Totals and means are computed over the days with valid data.")
+SEASONAL_ROLLUP_COLLECTION_ID = "nclimgrid-monthly-seasonal-rollups"
+SEASONAL_ROLLUP_COLLECTION_TITLE = (
+    "NOAA U.S. Climate Gridded Dataset Seasonal and Annual Rollups of Monthly "
+    "Data")
+SEASONAL_ROLLUP_COLLECTION_DESCRIPTION = (
+    "Seasonal (December-February, March-May, June-August, and "
+    "September-November) and annual total precipitation, mean average, "
+    "maximum, and minimum temperature, and counts of months with valid data, "
+    "computed from the NOAA Monthly U.S. Climate Gridded Dataset (NClimGrid) "
+    "in a 1/24 degree lat/lon (nominal 5x5 kilometer) grid for the "
+    "Continental United States. Totals and means are computed over the months "
+    "with valid data.")
+
+# default climatological normals period, in years
+NORMALS_START_YEAR = 1991
+NORMALS_END_YEAR = 2020
+NORMALS_ASSET_TITLE = {
+    "prcp-normal": "Normal monthly precipitation COG",
+    "tavg-normal": "Normal average temperature COG",
+    "tmax-normal": "Normal maximum temperature COG",
+    "tmin-normal": "Normal minimum temperature COG",
+    "valid-count": "Count of years with valid data for all variables COG"
+}
+NORMALS_COLLECTION_ID = "nclimgrid-monthly-normals"
+NORMALS_COLLECTION_TITLE = (
+    "NOAA U.S. Climate Gridded Dataset Monthly Normals")
+NORMALS_COLLECTION_DESCRIPTION = (
+    "Monthly climatological normals of precipitation and average, maximum, "
+    "and minimum temperature, i.e., the mean of each calendar month's values "
+    "over a period of years (by default 1991-2020), computed from the NOAA "
+    "Monthly U.S. Climate Gridded Dataset (NClimGrid) in a 1/24 degree "
+    "lat/lon (nominal 5x5 kilometer) grid for the Continental United States. "
+    "Means are computed over the years with valid data.")
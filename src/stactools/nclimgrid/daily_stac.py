@@ -1,25 +1,50 @@
-import itertools as it
 import os
+import shutil
 from calendar import monthrange
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime, timezone
+from functools import partial
 from posixpath import join as urljoin
 from tempfile import TemporaryDirectory
-from typing import Dict, List, Optional, Union
+from typing import (Deque, Dict, Iterable, Iterator, List, Optional, Tuple,
+                    Union)
 from urllib.parse import urlparse
 
 import xarray
 from pystac import Collection, Extent, Item
-from pystac.extensions.item_assets import AssetDefinition, ItemAssetsExtension
+from pystac.extensions.eo import EOExtension
+from pystac.extensions.item_assets import ItemAssetsExtension
 from pystac.extensions.projection import ProjectionExtension
+from pystac.extensions.raster import RasterExtension
 from stactools.core.io import ReadHrefModifier
-from stactools.core.utils import href_exists
 
 from stactools.nclimgrid import constants
 from stactools.nclimgrid.constants import VARIABLES, Status
-from stactools.nclimgrid.errors import (CogCreationError, ExistError,
-                                        MaybeAsyncError)
-from stactools.nclimgrid.utils import (cog_nc, create_cog_asset, download_nc,
-                                       generate_years_months)
+from stactools.nclimgrid.errors import BadInput, ExistError, MaybeAsyncError
+from stactools.nclimgrid.index import ItemIndex, add_to_index
+from stactools.nclimgrid.manifest import (CogManifest, SliceHashes,
+                                          cog_ncs_if_changed)
+from stactools.nclimgrid.memory import MemoryMonitor, monitor_stage
+from stactools.nclimgrid.pipeline import (ItemUnit, SharedScratch,
+                                          StageFunction, encode_cogs,
+                                          run_pipeline, store_cogs)
+from stactools.nclimgrid.signing import cache_read_href_modifier
+from stactools.nclimgrid.upload import CogUploader
+from stactools.nclimgrid.utils import (REDUCTION_MEMORY_LIMIT,
+                                       create_item_cog_asset, download_nc,
+                                       extract_nc_slices,
+                                       generate_years_months, href_exists,
+                                       item_asset_definitions, nc_slice_hashes,
+                                       nc_time_means, shard_list)
+
+# number of months whose NetCDFs are downloaded ahead of the month being
+# created by create_daily_items_batch
+BATCH_PREFETCH = 1
+
+# year, month, and status of a month of daily Items
+BatchUnit = Tuple[int, int, Union[str, Status]]
 
 
 def create_daily_items(year: int,
@@ -28,13 +53,46 @@ def create_daily_items(year: int,
                        base_cog_href: str,
                        base_nc_href: Optional[str] = None,
                        read_href_modifier: Optional[ReadHrefModifier] = None,
-                       day: Optional[int] = None) -> List[Item]:
+                       day: Optional[int] = None,
+                       skip_unchanged: bool = False,
+                       range_read: bool = True,
+                       multiband: bool = False,
+                       quantized: bool = False,
+                       changed_only: bool = False,
+                       index_path: Optional[str] = None) -> List[Item]:
     """Creates a list of daily Items for a given year and month, with each Item
     containing a COG Asset for each variable. The COG Assets can be created
     during Item creation if an href to the base of a NetCDF directory structure
     is supplied; if not supplied, COGs must already exist. COG storage
     (existing or new) is flat.
 
+    With multiband enabled, each Item instead contains a single COG Asset with
+    a band for each variable, in `VARIABLES` order, so that a quarter as many
+    COGs are stored, checked for existence, and read.
+
+    When creating COGs with skip_unchanged enabled, a manifest of source data
+    and COG hashes is kept at base_cog_href and COGs whose source data has not
+    changed since they were created are not regenerated.
+
+    When creating COGs for remote storage, i.e., base_cog_href is a URL, COGs
+    are created in local scratch space and uploaded concurrently.
+
+    When creating COGs with changed_only enabled, a hash of each day's source
+    data is kept at base_cog_href (see `manifest.SliceHashes`) and only the
+    days whose data is new or has changed since the last run, e.g., days
+    revised in a republished preliminary NetCDF, are returned as Items and
+    have COGs created.
+
+    When creating a single daily Item, only that day's data is read, both to
+    check that the day contains data and to create COGs. From remote NetCDF
+    data with range_read enabled (the default), only that day's time slice is
+    read from each remote NetCDF rather than downloading each NetCDF in its
+    entirety.
+
+    The read_href_modifier is memoized (see `CachedReadHrefModifier`), so an
+    href signer that appends a token is called once per storage prefix rather
+    than once per href.
+
     Args:
         year (int): year of interest (1951 to present)
         month (int): month for which to create daily Items
@@ -47,64 +105,146 @@ def create_daily_items(year: int,
         read_href_modifier (Optional[ReadHrefModifier]): argument to modify
             remote hrefs
         day (Optional[int]): option to create a single daily Item for this day
+        skip_unchanged (bool): option to skip creating COGs whose source data
+            is unchanged since the COG was last created
+        range_read (bool): option to read only the time slice for the
+            requested day from remote NetCDF files when creating a single
+            daily Item, rather than downloading the month's NetCDF files
+        multiband (bool): option to store all variables in a single COG per
+            day rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
+        changed_only (bool): option to create COGs and Items only for days
+            whose source data has changed since the last run
+        index_path (Optional[str]): optional local path of a SQLite index
+            in which to record the Items (see `index.ItemIndex`)
 
     Returns:
         List[Item]: List of daily Items
     """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
     status = Status(scaled_or_prelim)
 
-    # if cogging and NetCDF data is remote:
-    #   -> download NetCDFs and and return their local paths
-    #   -> create items, cogging on the fly
-    if base_nc_href and urlparse(base_nc_href).scheme:
-        with TemporaryDirectory() as temp_dir:
-            nc_local_paths = get_remote_ncs(
-                base_nc_href,
-                temp_dir,
-                year,
-                month,
-                status,
-                read_href_modifier=read_href_modifier)
+    manifest = None
+    if base_nc_href and skip_unchanged:
+        manifest = CogManifest.from_base_cog_href(
+            base_cog_href, read_href_modifier=read_href_modifier)
+
+    slice_hashes = None
+    if base_nc_href and changed_only:
+        slice_hashes = SliceHashes.from_base_cog_href(
+            base_cog_href, read_href_modifier=read_href_modifier)
+
+    uploader = None
+    if base_nc_href and urlparse(base_cog_href).scheme:
+        uploader = CogUploader()
+
+    # record created COGs in the manifest, even if creation fails partway
+    # through the month, so that a re-run can pick up where it left off
+    try:
+        # if cogging a single day and NetCDF data is remote and range read:
+        #   -> read the day's time slices and return their local paths
+        #   -> create item, cogging on the fly
+        if (base_nc_href and urlparse(base_nc_href).scheme and day
+                and range_read):
+            with TemporaryDirectory() as temp_dir:
+                nc_local_paths = get_remote_nc_slices(
+                    base_nc_href,
+                    temp_dir,
+                    year,
+                    month,
+                    day,
+                    status,
+                    read_href_modifier=read_href_modifier)
+                items = daily_items(year,
+                                    month,
+                                    status,
+                                    base_cog_href,
+                                    nc_local_paths=nc_local_paths,
+                                    day=day,
+                                    manifest=manifest,
+                                    slice_hashes=slice_hashes,
+                                    uploader=uploader,
+                                    nc_first_day=day,
+                                    multiband=multiband,
+                                    quantized=quantized)
+        # if cogging and NetCDF data is remote:
+        #   -> download NetCDFs and and return their local paths
+        #   -> create items, cogging on the fly
+        elif base_nc_href and urlparse(base_nc_href).scheme:
+            with TemporaryDirectory() as temp_dir:
+                nc_local_paths = get_remote_ncs(
+                    base_nc_href,
+                    temp_dir,
+                    year,
+                    month,
+                    status,
+                    read_href_modifier=read_href_modifier)
+                items = daily_items(year,
+                                    month,
+                                    status,
+                                    base_cog_href,
+                                    nc_local_paths=nc_local_paths,
+                                    day=day,
+                                    manifest=manifest,
+                                    slice_hashes=slice_hashes,
+                                    uploader=uploader,
+                                    multiband=multiband,
+                                    quantized=quantized)
+        # if cogging and NetCDF data is local:
+        #   -> return local NetCDF paths
+        #   -> create items, cogging on the fly
+        elif base_nc_href:
+            nc_local_paths = get_local_ncs(base_nc_href, year, month, status)
             items = daily_items(year,
                                 month,
                                 status,
                                 base_cog_href,
                                 nc_local_paths=nc_local_paths,
-                                day=day)
-    # if cogging and NetCDF data is local:
-    #   -> return local NetCDF paths
-    #   -> create items, cogging on the fly
-    elif base_nc_href:
-        nc_local_paths = get_local_ncs(base_nc_href, year, month, status)
-        items = daily_items(year,
-                            month,
-                            status,
-                            base_cog_href,
-                            nc_local_paths=nc_local_paths,
-                            day=day)
-    # if not cogging:
-    #   -> the cogs are assumed to already exist at base_cog_href
-    #   -> create items, checking for cog existence for each asset
-    else:
-        items = daily_items(year,
-                            month,
-                            status,
-                            base_cog_href,
-                            day=day,
-                            read_href_modifier=read_href_modifier)
-
+                                day=day,
+                                manifest=manifest,
+                                slice_hashes=slice_hashes,
+                                uploader=uploader,
+                                multiband=multiband,
+                                quantized=quantized)
+        # if not cogging:
+        #   -> the cogs are assumed to already exist at base_cog_href
+        #   -> create items, checking for cog existence for each asset
+        else:
+            items = daily_items(year,
+                                month,
+                                status,
+                                base_cog_href,
+                                day=day,
+                                read_href_modifier=read_href_modifier,
+                                multiband=multiband,
+                                quantized=quantized)
+    finally:
+        if manifest:
+            manifest.save()
+        if slice_hashes:
+            slice_hashes.save()
+        if uploader:
+            uploader.close()
+
+    add_to_index(index_path, items)
     return items
 
 
 # create daily items, cogging as we go, with option to limit to a single day
-def daily_items(
-        year: int,
-        month: int,
-        status: Status,
-        base_cog_href: str,
-        nc_local_paths: Optional[Dict[str, str]] = None,
-        day: Optional[int] = None,
-        read_href_modifier: Optional[ReadHrefModifier] = None) -> List[Item]:
+def daily_items(year: int,
+                month: int,
+                status: Status,
+                base_cog_href: str,
+                nc_local_paths: Optional[Dict[str, str]] = None,
+                day: Optional[int] = None,
+                read_href_modifier: Optional[ReadHrefModifier] = None,
+                manifest: Optional[CogManifest] = None,
+                slice_hashes: Optional[SliceHashes] = None,
+                uploader: Optional[CogUploader] = None,
+                nc_first_day: int = 1,
+                multiband: bool = False,
+                quantized: bool = False) -> List[Item]:
     """Creates the list of daily items for the supplied month. If an integer
     day is supplied, the list will contain a single item for that day.
 
@@ -120,31 +260,39 @@ def daily_items(
         day (Optional[int]): option to create a single daily Item for this day
         read_href_modifier (Optional[ReadHrefModifier]): argument to modify
             remote hrefs
+        manifest (Optional[CogManifest]): optional manifest used to skip
+            creating COGs whose source data is unchanged. Updated, but not
+            saved, as COGs are created.
+        slice_hashes (Optional[SliceHashes]): optional record of each day's
+            source data hashes, used to skip days whose data is unchanged.
+            Updated, but not saved, once the day's COGs are created.
+        uploader (Optional[CogUploader]): optional uploader used to create
+            COGs in local scratch space and upload them to base_cog_href
+        nc_first_day (int): day of the month stored in the first time slice
+            of the local NetCDF files, e.g., when the files hold only the time
+            slices of the requested day
+        multiband (bool): option to store all variables in a single COG per
+            day rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
 
     Returns:
         List[Item]: List of daily Items
     """
     items = []
 
-    # if "prelim", not all days contain data
-    if status is Status.PRELIM:
-        if nc_local_paths:
-            num_days = num_nc_prelim_days(nc_local_paths)
-        else:
-            num_days = num_cog_prelim_days(
-                year,
-                month,
-                base_cog_href,
-                read_href_modifier=read_href_modifier)
-        if num_days == 0:
-            raise ExistError(
-                f"No 'prelim days found in month {year}{month:02d}.")
-    else:
-        num_days = monthrange(year, month)[1]
-
     # set start and end days to handle a single day or an entire month
     if day:
-        if day > num_days:
+        # check only the requested day's data rather than the whole month
+        if not day_is_valid(year,
+                            month,
+                            day,
+                            status,
+                            base_cog_href,
+                            nc_local_paths=nc_local_paths,
+                            read_href_modifier=read_href_modifier,
+                            nc_first_day=nc_first_day,
+                            multiband=multiband):
             raise ExistError(
                 f"Data for day {day} in month {year}{month:02d} does not exist."
             )
@@ -152,39 +300,181 @@ def daily_items(
         end_day = day
     else:
         start_day = 1
-        end_day = num_days
+        end_day = num_valid_days(year,
+                                 month,
+                                 status,
+                                 base_cog_href,
+                                 nc_local_paths=nc_local_paths,
+                                 read_href_modifier=read_href_modifier,
+                                 nc_first_day=nc_first_day,
+                                 multiband=multiband)
+
+    day_hashes = None
+    if nc_local_paths and slice_hashes:
+        day_hashes = nc_day_hashes(nc_local_paths,
+                                   start_day - nc_first_day + 1,
+                                   end_day - nc_first_day + 1)
+    created_hashes = dict()
 
     # an item for each day
     for item_day in range(start_day, end_day + 1):
         item = daily_base_item(year, month, item_day, status)
-        # a COG asset for each variable
-        for var in VARIABLES:
-            cog_href = get_cog_href(year, month, item_day, var, status,
-                                    base_cog_href)
-
-            # create cog if cogging
+        if slice_hashes and day_hashes:
+            hashes = day_hashes[item_day - start_day]
+            if not slice_hashes.is_changed(item.id, hashes):
+                continue
+            created_hashes[item.id] = hashes
+        statistics: Dict[str, Dict[str, float]] = dict()
+        # a COG asset for each variable, or for all variables if multiband
+        cog_hrefs = get_cog_hrefs(year, month, item_day, status, base_cog_href,
+                                  multiband)
+        for cog_href, variables in cog_hrefs.items():
+            # create cog if cogging and the source data has changed
             if nc_local_paths:
-                if cog_nc(nc_local_paths[var], cog_href, var, item_day):
-                    raise CogCreationError(
-                        f"Failed to create '{cog_href}' for year {year}, month {month}, "
-                        f"day {item_day} from '{nc_local_paths[var]}'.")
-
-            # check that cog exists
-            cog_href_mod = cog_href
-            if read_href_modifier:
-                cog_href_mod = read_href_modifier(cog_href)
-            if not href_exists(cog_href_mod):
-                raise ExistError(f"'{cog_href}' does not exist.")
-
-            cog_key, cog_asset = create_cog_asset(cog_href, var)
+                cog_path = cog_href
+                if uploader:
+                    cog_path = uploader.scratch_path(cog_href)
+                created, cog_statistics = cog_ncs_if_changed(
+                    nc_local_paths,
+                    cog_href,
+                    variables,
+                    item_day - nc_first_day + 1,
+                    manifest=manifest,
+                    cog_path=cog_path,
+                    quantized=quantized)
+                statistics.update(cog_statistics)
+                if created and uploader:
+                    uploader.submit(cog_path, cog_href)
+
+            # check that cog exists; uploaded cogs exist once uploads complete
+            if not uploader:
+                cog_href_mod = cog_href
+                if read_href_modifier:
+                    cog_href_mod = read_href_modifier(cog_href)
+                if not href_exists(cog_href_mod):
+                    raise ExistError(f"'{cog_href}' does not exist.")
+
+            cog_key, cog_asset = create_item_cog_asset(cog_href, variables,
+                                                       statistics, quantized)
             item.assets[cog_key] = cog_asset
 
+        if multiband:
+            EOExtension.add_to(item)
+        if statistics or quantized:
+            RasterExtension.add_to(item)
         item.validate()
         items.append(item)
 
+    if uploader:
+        uploader.wait()
+    # record hashes only once the COGs are stored
+    if slice_hashes:
+        for item_id, hashes in created_hashes.items():
+            slice_hashes.update(item_id, hashes)
+
     return items
 
 
+def num_valid_days(year: int,
+                   month: int,
+                   status: Status,
+                   base_cog_href: str,
+                   nc_local_paths: Optional[Dict[str, str]] = None,
+                   read_href_modifier: Optional[ReadHrefModifier] = None,
+                   nc_first_day: int = 1,
+                   multiband: bool = False) -> int:
+    """Gets the number of days in the month that contain data. All days
+    contain data for "scaled" data, but only days up to the latest NOAA update
+    contain data for "prelim" data.
+
+    Args:
+        year (int): data year
+        month (int): data month
+        status (Status): enumeration specifying whether final or preliminary
+            data
+        base_cog_href (str): COG storage location
+        nc_local_paths (Optional[Dict[str, str]]): optional dictionary of local
+            paths to each variable; if not supplied, "prelim" days are counted
+            from existing COGs
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        nc_first_day (int): day of the month stored in the first time slice
+            of the local NetCDF files
+        multiband (bool): whether existing COGs store all variables in a
+            single COG per day
+
+    Returns:
+        int: number of days containing data
+    """
+    # if "prelim", not all days contain data
+    if status is Status.PRELIM:
+        if nc_local_paths:
+            num_days = num_nc_prelim_days(nc_local_paths) + nc_first_day - 1
+        else:
+            num_days = num_cog_prelim_days(
+                year,
+                month,
+                base_cog_href,
+                read_href_modifier=read_href_modifier,
+                multiband=multiband)
+        if num_days == 0:
+            raise ExistError(
+                f"No 'prelim days found in month {year}{month:02d}.")
+    else:
+        num_days = monthrange(year, month)[1]
+
+    return num_days
+
+
+def day_is_valid(year: int,
+                 month: int,
+                 day: int,
+                 status: Status,
+                 base_cog_href: str,
+                 nc_local_paths: Optional[Dict[str, str]] = None,
+                 read_href_modifier: Optional[ReadHrefModifier] = None,
+                 nc_first_day: int = 1,
+                 multiband: bool = False) -> bool:
+    """Checks whether a single day contains data, reading only that day's
+    data. All days contain data for "scaled" data, but only days up to the
+    latest NOAA update contain data for "prelim" data.
+
+    Args:
+        year (int): data year
+        month (int): data month
+        day (int): data day
+        status (Status): enumeration specifying whether final or preliminary
+            data
+        base_cog_href (str): COG storage location
+        nc_local_paths (Optional[Dict[str, str]]): optional dictionary of local
+            paths to each variable; if not supplied, "prelim" data is checked
+            for by the existence of the day's COGs
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        nc_first_day (int): day of the month stored in the first time slice
+            of the local NetCDF files
+        multiband (bool): whether existing COGs store all variables in a
+            single COG per day
+
+    Returns:
+        bool: True if the day contains data
+    """
+    if not 1 <= day <= monthrange(year, month)[1]:
+        return False
+    if status is Status.SCALED:
+        return True
+    if nc_local_paths:
+        return nc_prelim_day_is_valid(nc_local_paths, day - nc_first_day + 1)
+
+    for cog_href in get_cog_hrefs(year, month, day, status, base_cog_href,
+                                  multiband):
+        if read_href_modifier:
+            cog_href = read_href_modifier(cog_href)
+        if not href_exists(cog_href):
+            return False
+    return True
+
+
 def get_cog_href(year: int, month: int, day: int, var: str, status: Status,
                  base_cog_href: str) -> str:
     """Generates a COG href.
@@ -209,6 +499,61 @@ def get_cog_href(year: int, month: int, day: int, var: str, status: Status,
     return cog_href
 
 
+def get_multiband_cog_href(year: int, month: int, day: int, status: Status,
+                           base_cog_href: str) -> str:
+    """Generates the href of a COG with a band for each variable.
+
+    Args:
+        year (int): data year
+        month (int): data month
+        day (int): data day
+        status (Status): enumeration specifying whether final or preliminary
+            data
+        base_cog_href (str): COG storage location
+
+    Returns:
+        str: the COG href
+    """
+    cog_filename = f"{year}{month:02d}-grd-{status.value}-{day:02d}.tif"
+    if urlparse(base_cog_href).scheme:
+        cog_href = urljoin(base_cog_href, cog_filename)
+    else:
+        cog_href = os.path.join(base_cog_href, cog_filename)
+    return cog_href
+
+
+def get_cog_hrefs(year: int,
+                  month: int,
+                  day: int,
+                  status: Status,
+                  base_cog_href: str,
+                  multiband: bool = False) -> Dict[str, List[str]]:
+    """Generates the hrefs of a day's COGs, with the variables stored in the
+    bands of each COG.
+
+    Args:
+        year (int): data year
+        month (int): data month
+        day (int): data day
+        status (Status): enumeration specifying whether final or preliminary
+            data
+        base_cog_href (str): COG storage location
+        multiband (bool): whether all variables are stored in a single COG
+
+    Returns:
+        Dict[str, List[str]]: variables in band order, keyed by COG href
+    """
+    if multiband:
+        return {
+            get_multiband_cog_href(year, month, day, status, base_cog_href):
+            VARIABLES
+        }
+    return {
+        get_cog_href(year, month, day, var, status, base_cog_href): [var]
+        for var in VARIABLES
+    }
+
+
 def daily_base_item(year: int, month: int, day: int, status: Status) -> Item:
     """Creates an Item with all components except Assets.
 
@@ -254,14 +599,20 @@ def daily_base_item(year: int, month: int, day: int, status: Status) -> Item:
     return item
 
 
-def num_nc_prelim_days(nc_local_paths: Dict[str, str]) -> int:
+def num_nc_prelim_days(nc_local_paths: Dict[str, str],
+                       memory_limit: int = REDUCTION_MEMORY_LIMIT) -> int:
     """Get number of days in the month in the NetCDF file that are not populated
     with nodata values (-999). This should be the same number for each variable;
     if not, it is possible the NetCDF files are not from the same NOAA update.
 
+    Variables are checked one at a time, in time chunks (see
+    `utils.nc_time_means`), so memory use is bounded by memory_limit rather
+    than the size of the month.
+
     Args:
         nc_local_paths (Dict[str, str]): local path to each variable's NetCDF
             file
+        memory_limit (int): approximate memory ceiling in bytes
 
     Returns:
         int: number of valid days in the preliminary data timestack
@@ -269,8 +620,10 @@ def num_nc_prelim_days(nc_local_paths: Dict[str, str]) -> int:
     var_valid_days = []
     for var in VARIABLES:
         with xarray.open_dataset(nc_local_paths[var]) as ds:
-            var_mean = ds[var].mean(dim=("lat", "lon"), skipna=True).values
-            var_valid_days.append((var_mean > -900).sum())
+            var_valid_days.append(
+                sum(
+                    int((var_mean > -900).sum())
+                    for var_mean in nc_time_means(ds[var], memory_limit)))
 
     if len(set(var_valid_days)) != 1:
         raise MaybeAsyncError(
@@ -281,11 +634,68 @@ def num_nc_prelim_days(nc_local_paths: Dict[str, str]) -> int:
     return num_valid_days
 
 
-def num_cog_prelim_days(
-        year: int,
-        month: int,
-        base_cog_href: str,
-        read_href_modifier: Optional[ReadHrefModifier] = None) -> int:
+def nc_day_hashes(nc_local_paths: Dict[str, str], start_index: int,
+                  end_index: int) -> List[Dict[str, str]]:
+    """Computes a hash of each variable's data for a range of time slices of
+    the NetCDF files (see `utils.nc_slice_hashes`).
+
+    Args:
+        nc_local_paths (Dict[str, str]): local path to each variable's NetCDF
+            file
+        start_index (int): 1-based index of the first time slice
+        end_index (int): 1-based index of the last time slice
+
+    Returns:
+        List[Dict[str, str]]: hash of each variable's data, keyed by variable
+            name, for each time slice
+    """
+    var_hashes = dict()
+    for var in VARIABLES:
+        with xarray.open_dataset(nc_local_paths[var]) as ds:
+            var_hashes[var] = nc_slice_hashes(
+                ds[var].isel(time=slice(start_index - 1, end_index)))
+
+    return [{
+        var: var_hashes[var][index]
+        for var in VARIABLES
+    } for index in range(end_index - start_index + 1)]
+
+
+def nc_prelim_day_is_valid(nc_local_paths: Dict[str, str], index: int) -> bool:
+    """Checks whether a single time slice of the preliminary NetCDF files is
+    populated with data rather than nodata values (-999), reading only that
+    time slice of each variable.
+
+    Args:
+        nc_local_paths (Dict[str, str]): local path to each variable's NetCDF
+            file
+        index (int): 1-based index into the NetCDF timestacks
+
+    Returns:
+        bool: True if the time slice contains data
+    """
+    var_valid = []
+    for var in VARIABLES:
+        with xarray.open_dataset(nc_local_paths[var]) as ds:
+            if index > ds.sizes["time"]:
+                var_valid.append(False)
+                continue
+            var_mean = ds[var].isel(time=index - 1).mean(skipna=True).values
+            var_valid.append(bool(var_mean > -900))
+
+    if len(set(var_valid)) != 1:
+        raise MaybeAsyncError(
+            "Preliminary data variables differ in whether the day has valid "
+            "data.")
+
+    return var_valid[0]
+
+
+def num_cog_prelim_days(year: int,
+                        month: int,
+                        base_cog_href: str,
+                        read_href_modifier: Optional[ReadHrefModifier] = None,
+                        multiband: bool = False) -> int:
     """Checks for existence of preliminary COGS for each variable for each day
     of the month. Stops when a COG file is not found or all days have been
     checked. If the number of COGS for each variable is not equal, it is
@@ -298,21 +708,26 @@ def num_cog_prelim_days(
         base_cog_href (str): COG storage location
         read_href_modifier (Optional[ReadHrefModifier]): argument to modify
             remote hrefs
+        multiband (bool): whether all variables are stored in a single COG
+            per day, in which case one COG is checked per day
 
     Returns:
         int: number of days where a COG exists for each variable.
     """
     num_month_days = monthrange(year, month)[1]
     num_var_days = {var: 0 for var in VARIABLES}
-    for day, var in it.product(range(1, num_month_days + 1), VARIABLES):
-        cog_href = get_cog_href(year, month, day, var, Status.PRELIM,
-                                base_cog_href)
+    cogs = (
+        (day, cog_href, variables) for day in range(1, num_month_days + 1)
+        for cog_href, variables in get_cog_hrefs(
+            year, month, day, Status.PRELIM, base_cog_href, multiband).items())
+    for day, cog_href, variables in cogs:
         if read_href_modifier:
             cog_href = read_href_modifier(cog_href)
         if not href_exists(cog_href):
             num_month_days = day - 1
             break
-        num_var_days[var] += 1
+        for var in variables:
+            num_var_days[var] += 1
 
     if len(set(num_var_days.values())) != 1:
         raise MaybeAsyncError(
@@ -365,6 +780,53 @@ def get_remote_ncs(
     return nc_local_paths
 
 
+def get_remote_nc_slices(
+        base_nc_href: str,
+        temp_dir: str,
+        year: int,
+        month: int,
+        day: int,
+        status: Status,
+        read_href_modifier: Optional[ReadHrefModifier] = None
+) -> Dict[str, str]:
+    """Reads a single day's time slice from online NetCDF files for each
+    variable, using range requests, and saves them to local NetCDF files.
+
+    Args:
+        base_nc_href (str): remote url to the base of a NetCDF directory
+            structure
+        temp_dir (str): temporary local directory to store extracted NetCDFs
+            for COG creation
+        year (int): data year
+        month (int): data month
+        day (int): data day
+        status (Status): enumeration specifying whether final or preliminary
+            data
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+
+    Returns:
+        Dict[str, str]: dictionary of the extracted file paths, keyed by
+            variable name
+    """
+    nc_local_paths = dict()
+    for var in VARIABLES:
+        nc_href_end = daily_nc_href(year, month, status, var)
+        nc_remote_url = urljoin(base_nc_href, nc_href_end)
+        if read_href_modifier:
+            nc_remote_url = read_href_modifier(nc_remote_url)
+        nc_local_paths[var] = os.path.join(temp_dir, nc_href_end)
+        # 1970 and later, each variable is in a separate file
+        # Pre-1970, all variables are in a single file
+        if year >= 1970:
+            extract_nc_slices(nc_remote_url, nc_local_paths[var], [var], [day])
+        elif var == VARIABLES[0]:
+            extract_nc_slices(nc_remote_url, nc_local_paths[var], VARIABLES,
+                              [day])
+
+    return nc_local_paths
+
+
 def get_local_ncs(base_nc_href: str, year: int, month: int,
                   status: Status) -> Dict[str, str]:
     """Generates a dictionary of local NetCDF file paths for each variable
@@ -412,16 +874,309 @@ def daily_nc_href(year: int, month: int, status: Status, variable: str) -> str:
     return href_end
 
 
+def create_daily_items_pipelined(
+        years_months: List[List[int]],
+        scaled_or_prelim: Union[str, Status],
+        base_cog_href: str,
+        base_nc_href: Optional[str] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        skip_unchanged: bool = False,
+        workers: Optional[Dict[str, int]] = None,
+        multiband: bool = False,
+        quantized: bool = False,
+        index_path: Optional[str] = None,
+        monitor: Optional[MemoryMonitor] = None) -> List[Item]:
+    """Creates daily Items for each day in a list of months. NetCDF download,
+    COG creation, COG upload or existence checking, and Item assembly run as
+    concurrent pipeline stages, so network and CPU work overlap across days and
+    months. Produces the same Items as calling `create_daily_items` for each
+    month.
+
+    Args:
+        years_months (List[List[int]]): list of year and month values, e.g.,
+            [[2020, 9], [2020, 10]]
+        scaled_or_prelim (Union[str, Status]): either a string ("scaled" or
+            "prelim") or enumeration specifying whether to generate final
+            or preliminary COG Assets
+        base_cog_href (str): COG storage location
+        base_nc_href (Optional[str]): optional href to the base of a NetCDF
+            directory structure
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        skip_unchanged (bool): option to skip creating COGs whose source data
+            is unchanged since the COG was last created
+        workers (Optional[Dict[str, int]]): optional concurrency limits for the
+            "fetch", "encode", "store", and "assemble" pipeline stages
+        multiband (bool): option to store all variables in a single COG per
+            day rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
+        index_path (Optional[str]): optional local path of a SQLite index
+            in which to record the Items (see `index.ItemIndex`)
+        monitor (Optional[MemoryMonitor]): optional monitor in which to record
+            the peak memory use of each pipeline stage
+
+    Returns:
+        List[Item]: List of daily Items, sorted by id
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    status = Status(scaled_or_prelim)
+
+    manifest = None
+    if base_nc_href and skip_unchanged:
+        manifest = CogManifest.from_base_cog_href(
+            base_cog_href, read_href_modifier=read_href_modifier)
+
+    def fetch(year_month: List[int]) -> List[ItemUnit]:
+        year, month = year_month
+        nc_local_paths = None
+        scratch = None
+        if base_nc_href and urlparse(base_nc_href).scheme:
+            scratch = SharedScratch()
+            nc_local_paths = get_remote_ncs(
+                base_nc_href,
+                scratch.name,
+                year,
+                month,
+                status,
+                read_href_modifier=read_href_modifier)
+        elif base_nc_href:
+            nc_local_paths = get_local_ncs(base_nc_href, year, month, status)
+
+        num_days = num_valid_days(year,
+                                  month,
+                                  status,
+                                  base_cog_href,
+                                  nc_local_paths=nc_local_paths,
+                                  read_href_modifier=read_href_modifier,
+                                  multiband=multiband)
+        if scratch:
+            scratch.retain(num_days)
+
+        units = []
+        for day in range(1, num_days + 1):
+            cog_hrefs = get_cog_hrefs(year, month, day, status, base_cog_href,
+                                      multiband)
+            units.append(
+                ItemUnit((year, month, day),
+                         cog_hrefs,
+                         nc_local_paths=nc_local_paths,
+                         nc_index=day,
+                         scratch=scratch))
+        return units
+
+    def assemble(unit: ItemUnit) -> List[Item]:
+        year, month, day = unit.key
+        item = daily_base_item(year, month, day, status)
+        for cog_href, variables in unit.cog_hrefs.items():
+            cog_key, cog_asset = create_item_cog_asset(cog_href, variables,
+                                                       unit.statistics,
+                                                       quantized)
+            item.assets[cog_key] = cog_asset
+        if multiband:
+            EOExtension.add_to(item)
+        if unit.statistics or quantized:
+            RasterExtension.add_to(item)
+        item.validate()
+        return [item]
+
+    with TemporaryDirectory() as temp_dir:
+        # if cogging and COG storage is remote, upload COGs from temp_dir
+        upload_dir = None
+        if base_nc_href and urlparse(base_cog_href).scheme:
+            upload_dir = temp_dir
+        stages: List[Tuple[str, StageFunction]] = [
+            ("fetch", fetch),
+            ("encode",
+             partial(encode_cogs,
+                     manifest=manifest,
+                     upload_dir=upload_dir,
+                     quantized=quantized)),
+            ("store", partial(store_cogs,
+                              read_href_modifier=read_href_modifier)),
+            ("assemble", assemble),
+        ]
+        try:
+            items = run_pipeline(years_months,
+                                 stages,
+                                 workers=workers,
+                                 monitor=monitor)
+        finally:
+            if manifest:
+                manifest.save()
+
+    add_to_index(index_path, items)
+    return sorted(items, key=lambda item: item.id)
+
+
+def create_daily_items_batch(
+        units: Iterable[BatchUnit],
+        base_cog_href: str,
+        base_nc_href: Optional[str] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        skip_unchanged: bool = False,
+        multiband: bool = False,
+        quantized: bool = False,
+        changed_only: bool = False,
+        index_path: Optional[str] = None,
+        prefetch: int = BATCH_PREFETCH,
+        monitor: Optional[MemoryMonitor] = None) -> Iterator[Item]:
+    """Creates daily Items for a batch of months, each with its own status,
+    generating each month's Items as soon as they are created. Produces the
+    same Items as calling `create_daily_items` for each month, but with setup
+    done once for the whole batch rather than once per month: a single
+    scratch directory, COG uploader and its thread pool, COG manifest, slice
+    hash record, SQLite index connection, and memoized read_href_modifier are
+    shared by all months, and HTTP sessions are reused through the shared
+    filesystem pool (see `utils.FilesystemPool`).
+
+    When NetCDF data is remote, the next prefetch months' NetCDFs are
+    downloaded while the current month's COGs are created, and each month's
+    downloads are removed once its Items are created, so scratch space holds
+    at most prefetch + 1 months of NetCDFs.
+
+    The manifest and slice hashes are saved, and uploads completed, once the
+    batch finishes or the generator is closed.
+
+    Args:
+        units (Iterable[BatchUnit]): year, month, and status ("scaled" or
+            "prelim", or the enumeration) of each month to create
+        base_cog_href (str): COG storage location
+        base_nc_href (Optional[str]): optional href to the base of a NetCDF
+            directory structure
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        skip_unchanged (bool): option to skip creating COGs whose source data
+            is unchanged since the COG was last created
+        multiband (bool): option to store all variables in a single COG per
+            day rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
+        changed_only (bool): option to create COGs and Items only for days
+            whose source data has changed since the last run
+        index_path (Optional[str]): optional local path of a SQLite index
+            in which to record the Items (see `index.ItemIndex`)
+        prefetch (int): number of months whose remote NetCDFs are downloaded
+            ahead of the month being created
+        monitor (Optional[MemoryMonitor]): optional monitor in which to record
+            the peak memory use of the "fetch" (NetCDF download) and "encode"
+            (COG and Item creation) stages
+
+    Returns:
+        Iterator[Item]: daily Items, in unit order and then day order
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    remote_nc = bool(base_nc_href and urlparse(base_nc_href).scheme)
+    # hrefs of existing COGs are modified only when not cogging
+    cog_href_modifier = None if base_nc_href else read_href_modifier
+
+    manifest = None
+    if base_nc_href and skip_unchanged:
+        manifest = CogManifest.from_base_cog_href(
+            base_cog_href, read_href_modifier=read_href_modifier)
+
+    slice_hashes = None
+    if base_nc_href and changed_only:
+        slice_hashes = SliceHashes.from_base_cog_href(
+            base_cog_href, read_href_modifier=read_href_modifier)
+
+    with ExitStack() as stack:
+        temp_dir = stack.enter_context(TemporaryDirectory())
+        uploader = None
+        if base_nc_href and urlparse(base_cog_href).scheme:
+            uploader = stack.enter_context(CogUploader())
+        item_index = None
+        if index_path:
+            item_index = stack.enter_context(ItemIndex(index_path))
+        executor = stack.enter_context(
+            ThreadPoolExecutor(max_workers=max(1, prefetch)))
+
+        def fetch(unit_dir: str, year: int, month: int,
+                  status: Status) -> Optional[Dict[str, str]]:
+            with monitor_stage(monitor, "fetch"):
+                if base_nc_href and remote_nc:
+                    return get_remote_ncs(
+                        base_nc_href,
+                        unit_dir,
+                        year,
+                        month,
+                        status,
+                        read_href_modifier=read_href_modifier)
+                if base_nc_href:
+                    return get_local_ncs(base_nc_href, year, month, status)
+                return None
+
+        # months are fetched in order, up to prefetch months ahead
+        pending: Deque[Tuple[int, int, Status, str, Future]] = deque()
+        work = enumerate(units)
+
+        def submit_next() -> None:
+            for i, (year, month, scaled_or_prelim) in work:
+                status = Status(scaled_or_prelim)
+                unit_dir = os.path.join(temp_dir, str(i))
+                pending.append((year, month, status, unit_dir,
+                                executor.submit(fetch, unit_dir, year, month,
+                                                status)))
+                return
+
+        try:
+            for _ in range(max(0, prefetch) + 1):
+                submit_next()
+            while pending:
+                year, month, status, unit_dir, future = pending.popleft()
+                submit_next()
+                nc_local_paths = future.result()
+                try:
+                    with monitor_stage(monitor, "encode"):
+                        items = daily_items(
+                            year,
+                            month,
+                            status,
+                            base_cog_href,
+                            nc_local_paths=nc_local_paths,
+                            read_href_modifier=cog_href_modifier,
+                            manifest=manifest,
+                            slice_hashes=slice_hashes,
+                            uploader=uploader,
+                            multiband=multiband,
+                            quantized=quantized)
+                finally:
+                    shutil.rmtree(unit_dir, ignore_errors=True)
+                if item_index:
+                    item_index.add(items)
+                yield from items
+        finally:
+            if manifest:
+                manifest.save()
+            if slice_hashes:
+                slice_hashes.save()
+
+
 def create_daily_collection(
         start_yyyymm: str,
         end_yyyymm: str,
         scaled_or_prelim: Union[str, Status],
         base_cog_href: str,
         base_nc_href: Optional[str] = None,
-        read_href_modifier: Optional[ReadHrefModifier] = None) -> Collection:
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        skip_unchanged: bool = False,
+        pipelined: bool = False,
+        workers: Optional[Dict[str, int]] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        multiband: bool = False,
+        quantized: bool = False,
+        changed_only: bool = False,
+        index_path: Optional[str] = None,
+        monitor: Optional[MemoryMonitor] = None) -> Collection:
     """Create a collection of daily Items for each month in the range from
     start_month to end_month.
 
+    With changed_only, COGs and Items are created only for the days whose
+    source data has changed since the last run (see `create_daily_items`),
+    so the Collection holds only those Items, e.g., for merging into the
+    existing Collection with `merge.merge_items`. ExistError is raised if no
+    day has changed.
+
     Args:
         start_yyyymm (str): start month in YYYYMM format
         end_yyyymm (str): end month in YYYYMM format
@@ -433,24 +1188,83 @@ def create_daily_collection(
             directory structure
         read_href_modifier (Optional[ReadHrefModifier]): argument to modify
             remote hrefs
+        skip_unchanged (bool): option to skip creating COGs whose source data
+            is unchanged since the COG was last created
+        pipelined (bool): option to create Items with concurrent pipeline
+            stages (see `create_daily_items_pipelined`) rather than one month
+            at a time (see `create_daily_items_batch`)
+        workers (Optional[Dict[str, int]]): optional concurrency limits for
+            the pipeline stages
+        shard (Optional[Tuple[int, int]]): optional 1-based shard index and
+            number of shards. Only the months in the shard are processed (see
+            `utils.shard_list`); shard Collections can be combined with
+            `merge.merge_items`.
+        multiband (bool): option to store all variables in a single COG per
+            day rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
+        changed_only (bool): option to create COGs and Items only for days
+            whose source data has changed since the last run. Not supported
+            with pipelined.
+        index_path (Optional[str]): optional local path of a SQLite index
+            in which to record the Items (see `index.ItemIndex`)
+        monitor (Optional[MemoryMonitor]): optional monitor in which to record
+            the peak memory use of each stage of Item creation
 
     Returns:
         Collection: STAC Collection with Items for each day between the start
             and end months
     """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
     years_months = generate_years_months(start_yyyymm, end_yyyymm)
+    if shard:
+        years_months = shard_list(years_months, shard)
     status = Status(scaled_or_prelim)
+    if pipelined and changed_only:
+        raise BadInput("changed_only is not supported with pipelined")
+
+    if pipelined:
+        items = create_daily_items_pipelined(
+            years_months,
+            status,
+            base_cog_href,
+            base_nc_href=base_nc_href,
+            read_href_modifier=read_href_modifier,
+            skip_unchanged=skip_unchanged,
+            workers=workers,
+            multiband=multiband,
+            quantized=quantized,
+            index_path=index_path,
+            monitor=monitor)
+    else:
+        items = list(
+            create_daily_items_batch([(year, month, status)
+                                      for year, month in years_months],
+                                     base_cog_href,
+                                     base_nc_href=base_nc_href,
+                                     read_href_modifier=read_href_modifier,
+                                     skip_unchanged=skip_unchanged,
+                                     multiband=multiband,
+                                     quantized=quantized,
+                                     changed_only=changed_only,
+                                     index_path=index_path,
+                                     monitor=monitor))
+    if changed_only and not items:
+        raise ExistError(
+            f"No daily data has changed from {start_yyyymm} to {end_yyyymm}.")
+
+    return daily_collection(items)
+
+
+def daily_collection(items: List[Item]) -> Collection:
+    """Creates a daily Collection containing the supplied Items.
 
-    items = []
-    for year, month in years_months:
-        items.extend(
-            create_daily_items(year,
-                               month,
-                               status,
-                               base_cog_href,
-                               base_nc_href=base_nc_href,
-                               read_href_modifier=read_href_modifier))
+    Args:
+        items (List[Item]): daily Items
 
+    Returns:
+        Collection: STAC Collection with the Items
+    """
     extent = Extent.from_items(items)
 
     collection = Collection(
@@ -464,13 +1278,10 @@ def create_daily_collection(
     )
     collection.add_items(items)
 
-    item_assets = dict()
-    for key, asset in items[0].get_assets().items():
-        asset_as_dict = asset.to_dict()
-        asset_as_dict.pop("href")
-        item_assets[key] = AssetDefinition(asset_as_dict)
     item_assets_ext = ItemAssetsExtension.ext(collection, add_if_missing=True)
-    item_assets_ext.item_assets = item_assets
+    item_assets_ext.item_assets = item_asset_definitions(items[0])
+    if EOExtension.has_extension(items[0]):
+        EOExtension.add_to(collection)
 
     collection_projection = ProjectionExtension.summaries(collection,
                                                           add_if_missing=True)
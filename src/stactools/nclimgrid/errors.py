@@ -13,3 +13,11 @@ class BadInput(Exception):
 
 class CogCreationError(Exception):
     """COG creation failed."""
+
+
+class CogUploadError(Exception):
+    """COG upload failed."""
+
+
+class DownloadError(Exception):
+    """Download failed or downloaded file is incomplete."""
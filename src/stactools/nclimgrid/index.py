@@ -0,0 +1,299 @@
+import sqlite3
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from pystac import Item
+from pystac.utils import str_to_datetime
+
+from stactools.nclimgrid.constants import Status
+from stactools.nclimgrid.utils import generate_years_months
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    cadence TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    status TEXT,
+    updated TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_dates ON items (cadence, start_date, status);
+CREATE TABLE IF NOT EXISTS assets (
+    item_id TEXT NOT NULL REFERENCES items (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    href TEXT NOT NULL,
+    PRIMARY KEY (item_id, key)
+);
+"""
+
+UPSERT_ITEM = """
+INSERT INTO items (id, cadence, start_date, end_date, status, updated)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    cadence = excluded.cadence,
+    start_date = excluded.start_date,
+    end_date = excluded.end_date,
+    status = excluded.status,
+    updated = excluded.updated
+"""
+
+# Item rows and asset rows, as stored in the index
+ItemRows = Tuple[Tuple[str, str, str, str, Optional[str], str],
+                 List[Tuple[str, str, str]]]
+
+
+class ItemIndex:
+    """Local SQLite index of NClimGrid Items, recording each Item's id,
+    cadence ("daily" or "monthly"), dates, status ("scaled" or "prelim"
+    for daily Items), asset hrefs, and when it was last indexed. Answers
+    questions such as which days exist, with which status, and which are
+    missing, without reading Item JSON or checking for COGs.
+
+    Items are upserted by id in bulk, one transaction per call to `add`. Use
+    as a context manager to close the database connection.
+
+    Args:
+        path (str): local path of the SQLite database, created if it does
+            not exist
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "ItemIndex":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        self.connection.close()
+
+    def add(self, items: Iterable[Union[Item, Dict[str, Any]]]) -> int:
+        """Adds Items to the index, replacing any indexed Items with the same
+        ids.
+
+        Args:
+            items (Iterable[Union[Item, Dict[str, Any]]]): Items or Item JSON
+                dictionaries
+
+        Returns:
+            int: number of Items added
+        """
+        return self.add_rows(item_rows(item) for item in items)
+
+    def add_rows(self, rows: Iterable[ItemRows]) -> int:
+        """Adds Items to the index from their rows (see `item_rows`).
+
+        Args:
+            rows (Iterable[ItemRows]): Item and asset rows of each Item
+
+        Returns:
+            int: number of Items added
+        """
+        item_rows_list = []
+        asset_rows_list = []
+        for item_row, asset_rows in rows:
+            item_rows_list.append(item_row)
+            asset_rows_list.extend(asset_rows)
+        with self.connection:
+            self.connection.executemany("DELETE FROM assets WHERE item_id = ?",
+                                        [(item_row[0], )
+                                         for item_row in item_rows_list])
+            self.connection.executemany(UPSERT_ITEM, item_rows_list)
+            self.connection.executemany(
+                "INSERT INTO assets (item_id, key, href) VALUES (?, ?, ?)",
+                asset_rows_list)
+        return len(item_rows_list)
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Looks up an indexed Item.
+
+        Args:
+            item_id (str): Item id
+
+        Returns:
+            Optional[Dict[str, Any]]: the Item's id, cadence, start_date,
+                end_date, status, updated time, and asset hrefs keyed by asset
+                key, or None if the Item is not indexed
+        """
+        row = self.connection.execute(
+            "SELECT id, cadence, start_date, end_date, status, updated "
+            "FROM items WHERE id = ?", (item_id, )).fetchone()
+        if row is None:
+            return None
+        record = dict(
+            zip([
+                "id", "cadence", "start_date", "end_date", "status", "updated"
+            ], row))
+        record["assets"] = dict(
+            self.connection.execute(
+                "SELECT key, href FROM assets WHERE item_id = ? ORDER BY key",
+                (item_id, )))
+        return record
+
+    def ids(self,
+            cadence: str,
+            start: Optional[date] = None,
+            end: Optional[date] = None,
+            status: Optional[Union[str, Status]] = None,
+            preferred: bool = False) -> List[str]:
+        """Lists the ids of indexed Items, in date order.
+
+        Args:
+            cadence (str): "daily" or "monthly"
+            start (Optional[date]): optional earliest Item start date
+            end (Optional[date]): optional latest Item start date
+            status (Optional[Union[str, Status]]): optional daily Item status
+            preferred (bool): option to list only one Item per date,
+                preferring "scaled" to "prelim" Items
+
+        Returns:
+            List[str]: Item ids
+        """
+        where, parameters = self._where(cadence, start, end, status)
+        if preferred:
+            query = (f"SELECT id FROM (SELECT id, start_date, ROW_NUMBER() "
+                     f"OVER (PARTITION BY start_date ORDER BY status = "
+                     f"'{Status.SCALED.value}' DESC, id) AS preference "
+                     f"FROM items {where}) WHERE preference = 1 "
+                     f"ORDER BY start_date, id")
+        else:
+            query = f"SELECT id FROM items {where} ORDER BY start_date, id"
+        return [row[0] for row in self.connection.execute(query, parameters)]
+
+    def statuses(self,
+                 start: Optional[date] = None,
+                 end: Optional[date] = None) -> Dict[date, List[str]]:
+        """Finds the statuses of the indexed daily Items for each day.
+
+        Args:
+            start (Optional[date]): optional first day
+            end (Optional[date]): optional last day
+
+        Returns:
+            Dict[date, List[str]]: statuses of each indexed day, sorted
+        """
+        where, parameters = self._where("daily", start, end)
+        statuses: Dict[date, List[str]] = dict()
+        for start_date, status in self.connection.execute(
+                f"SELECT start_date, status FROM items {where} "
+                f"ORDER BY start_date, status", parameters):
+            statuses.setdefault(date.fromisoformat(start_date),
+                                []).append(status)
+        return statuses
+
+    def missing_days(
+            self,
+            start: date,
+            end: date,
+            status: Optional[Union[str, Status]] = None) -> List[date]:
+        """Finds the days in a date range without an indexed daily Item.
+
+        Args:
+            start (date): first day
+            end (date): last day
+            status (Optional[Union[str, Status]]): optional status the daily
+                Items must have
+
+        Returns:
+            List[date]: days without an Item, in date order
+        """
+        where, parameters = self._where("daily", start, end, status)
+        rows = self.connection.execute(
+            f"WITH RECURSIVE days (day) AS (SELECT date(?) UNION ALL "
+            f"SELECT date(day, '+1 day') FROM days WHERE day < date(?)) "
+            f"SELECT day FROM days WHERE day NOT IN "
+            f"(SELECT start_date FROM items {where}) ORDER BY day",
+            [start.isoformat(), end.isoformat()] + parameters)
+        return [date.fromisoformat(row[0]) for row in rows]
+
+    def missing_months(self, start_yyyymm: str,
+                       end_yyyymm: str) -> List[Tuple[int, int]]:
+        """Finds the months in a month range without an indexed monthly Item.
+
+        Args:
+            start_yyyymm (str): start month in YYYYMM format
+            end_yyyymm (str): end month in YYYYMM format
+
+        Returns:
+            List[Tuple[int, int]]: years and months without an Item, in order
+        """
+        years_months = generate_years_months(start_yyyymm, end_yyyymm)
+        start = date(years_months[0][0], years_months[0][1], 1)
+        end = date(years_months[-1][0], years_months[-1][1], 1)
+        where, parameters = self._where("monthly", start, end)
+        indexed = {
+            row[0]
+            for row in self.connection.execute(
+                f"SELECT start_date FROM items {where}", parameters)
+        }
+        return [(year, month) for year, month in years_months
+                if date(year, month, 1).isoformat() not in indexed]
+
+    def _where(
+            self,
+            cadence: str,
+            start: Optional[date] = None,
+            end: Optional[date] = None,
+            status: Optional[Union[str,
+                                   Status]] = None) -> Tuple[str, List[str]]:
+        clauses = ["cadence = ?"]
+        parameters = [cadence]
+        if start:
+            clauses.append("start_date >= ?")
+            parameters.append(start.isoformat())
+        if end:
+            clauses.append("start_date <= ?")
+            parameters.append(end.isoformat())
+        if status:
+            clauses.append("status = ?")
+            parameters.append(Status(status).value)
+        return "WHERE " + " AND ".join(clauses), parameters
+
+
+def item_rows(item: Union[Item, Dict[str, Any]]) -> ItemRows:
+    """Extracts the index rows of an Item.
+
+    Args:
+        item (Union[Item, Dict[str, Any]]): Item or Item JSON dictionary
+
+    Returns:
+        ItemRows: Item row and asset rows
+    """
+    item_dict = item.to_dict(
+        include_self_link=False) if isinstance(item, Item) else item
+    properties = item_dict["properties"]
+    start = str_to_datetime(
+        properties.get("start_datetime") or properties["datetime"]).date()
+    end = str_to_datetime(
+        properties.get("end_datetime") or properties["datetime"]).date()
+    cadence = "daily" if start == end else "monthly"
+    statuses = [
+        status.value for status in Status
+        if status.value in item_dict["id"].split("-")
+    ]
+    updated = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    item_row = (item_dict["id"], cadence, start.isoformat(), end.isoformat(),
+                statuses[0] if statuses else None, updated)
+    asset_rows = [(item_dict["id"], key, asset["href"])
+                  for key, asset in item_dict["assets"].items()]
+    return item_row, asset_rows
+
+
+def add_to_index(index_path: Optional[str],
+                 items: Iterable[Union[Item, Dict[str, Any]]]) -> None:
+    """Records Items in a SQLite index, if an index path is supplied.
+
+    Args:
+        index_path (Optional[str]): optional local path of the SQLite index
+        items (Iterable[Union[Item, Dict[str, Any]]]): Items or Item JSON
+            dictionaries
+    """
+    if index_path:
+        with ItemIndex(index_path) as item_index:
+            item_index.add(items)
@@ -0,0 +1,344 @@
+import json
+import os
+from posixpath import join as urljoin
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy
+from stactools.core.io import ReadHrefModifier
+
+from stactools.nclimgrid.constants import (QUANTIZED_NODATA, QUANTIZED_OFFSET,
+                                           QUANTIZED_SCALE)
+from stactools.nclimgrid.errors import CogCreationError
+from stactools.nclimgrid.utils import (band_statistics, cog_bands, hash_array,
+                                       hash_file, href_exists, href_info,
+                                       open_href, quantize, read_nc_band)
+
+MANIFEST_FILENAME = "nclimgrid-cog-manifest.json"
+SLICE_HASHES_FILENAME = "nclimgrid-slice-hashes.json"
+
+
+class CogManifest:
+    """Sidecar record of the source data hash, COG hash, and COG size for each
+    COG stored at a COG storage location. Used to skip regenerating COGs whose
+    source NetCDF data has not changed since the COG was created.
+
+    Entries are keyed by COG filename, e.g.,
+    {"prcp-202201-grd-prelim-01.tif":
+        {"source": "<sha256>", "cog": "<sha256>", "size": 1234}}
+
+    Args:
+        href (str): manifest location
+        entries (Optional[Dict[str, Dict[str, Any]]]): optional manifest
+            entries
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs when checking that COGs exist
+    """
+
+    def __init__(self,
+                 href: str,
+                 entries: Optional[Dict[str, Dict[str, Any]]] = None,
+                 read_href_modifier: Optional[ReadHrefModifier] = None):
+        self.href = href
+        self.entries = entries or dict()
+        self.read_href_modifier = read_href_modifier
+
+    @classmethod
+    def from_base_cog_href(
+        cls,
+        base_cog_href: str,
+        read_href_modifier: Optional[ReadHrefModifier] = None
+    ) -> "CogManifest":
+        """Reads the manifest stored at a COG storage location. An empty
+        manifest is returned if one does not yet exist.
+
+        Args:
+            base_cog_href (str): COG storage location
+            read_href_modifier (Optional[ReadHrefModifier]): argument to
+                modify remote hrefs
+
+        Returns:
+            CogManifest: the COG manifest
+        """
+        href = sidecar_href(base_cog_href, MANIFEST_FILENAME)
+        return cls(href, read_sidecar(href, read_href_modifier),
+                   read_href_modifier)
+
+    def is_unchanged(self, cog_href: str, source_hash: str) -> bool:
+        """Checks if a COG exists and was created from source data matching
+        the supplied hash. The recorded COG hash is trusted rather than
+        recomputed, so the COG is not read: only its file information (an
+        HTTP HEAD request for online COGs) is fetched, and its size compared
+        with the recorded size.
+
+        Args:
+            cog_href (str): COG location
+            source_hash (str): hash of the NetCDF time slice used to create the
+                COG
+
+        Returns:
+            bool: True if the COG does not need to be regenerated
+        """
+        entry = self.entries.get(os.path.basename(cog_href))
+        if entry is None or entry["source"] != source_hash:
+            return False
+        if self.read_href_modifier:
+            cog_href = self.read_href_modifier(cog_href)
+        info = href_info(cog_href)
+        if info is None:
+            return False
+        # entries recorded before sizes were recorded have no size
+        return "size" not in entry or info.get("size") == entry["size"]
+
+    def update(self,
+               cog_href: str,
+               source_hash: str,
+               cog_path: Optional[str] = None) -> None:
+        """Records the source data hash, COG hash, and COG size for a newly
+        created COG.
+
+        Args:
+            cog_href (str): COG location
+            source_hash (str): hash of the NetCDF time slice used to create the
+                COG
+            cog_path (Optional[str]): optional local copy of the COG to hash,
+                e.g., when the COG has not yet been uploaded to cog_href
+        """
+        cog_path = cog_path or cog_href
+        info = href_info(cog_path)
+        self.entries[os.path.basename(cog_href)] = {
+            "source": source_hash,
+            "cog": hash_file(cog_path),
+            "size": info["size"] if info else None
+        }
+
+    def save(self) -> None:
+        """Writes the manifest to its href."""
+        with open_href(self.href, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+
+class SliceHashes:
+    """Sidecar record of the hash of each variable's source data for each
+    daily Item created from a COG storage location's NetCDF data (see
+    `utils.nc_slice_hashes`). Used to find the days whose data has changed
+    when preliminary NetCDFs are republished with revised days.
+
+    Entries are keyed by Item id, e.g.,
+    {"202201-grd-prelim-01": {"prcp": "<sha256>", "tavg": "<sha256>", ...}}
+    """
+
+    def __init__(self,
+                 href: str,
+                 entries: Optional[Dict[str, Dict[str, str]]] = None):
+        self.href = href
+        self.entries = entries or dict()
+
+    @classmethod
+    def from_base_cog_href(
+        cls,
+        base_cog_href: str,
+        read_href_modifier: Optional[ReadHrefModifier] = None
+    ) -> "SliceHashes":
+        """Reads the slice hashes stored at a COG storage location. No hashes
+        are returned if none have been stored yet.
+
+        Args:
+            base_cog_href (str): COG storage location
+            read_href_modifier (Optional[ReadHrefModifier]): argument to
+                modify remote hrefs
+
+        Returns:
+            SliceHashes: the slice hashes
+        """
+        href = sidecar_href(base_cog_href, SLICE_HASHES_FILENAME)
+        return cls(href, read_sidecar(href, read_href_modifier))
+
+    def is_changed(self, item_id: str, hashes: Dict[str, str]) -> bool:
+        """Checks if an Item's source data differs from the recorded data.
+
+        Args:
+            item_id (str): daily Item id
+            hashes (Dict[str, str]): hash of each variable's source data
+
+        Returns:
+            bool: True if the Item is new or its source data has changed
+        """
+        return self.entries.get(item_id) != hashes
+
+    def update(self, item_id: str, hashes: Dict[str, str]) -> None:
+        """Records the source data hashes of a created Item.
+
+        Args:
+            item_id (str): daily Item id
+            hashes (Dict[str, str]): hash of each variable's source data
+        """
+        self.entries[item_id] = hashes
+
+    def save(self) -> None:
+        """Writes the slice hashes to their href."""
+        with open_href(self.href, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+
+def sidecar_href(base_cog_href: str, filename: str) -> str:
+    """Generates the href of a sidecar file stored with COGs.
+
+    Args:
+        base_cog_href (str): COG storage location
+        filename (str): sidecar filename
+
+    Returns:
+        str: sidecar href
+    """
+    if urlparse(base_cog_href).scheme:
+        return urljoin(base_cog_href, filename)
+    return os.path.join(base_cog_href, filename)
+
+
+def read_sidecar(
+    href: str,
+    read_href_modifier: Optional[ReadHrefModifier] = None
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Reads a JSON sidecar file, if it exists.
+
+    Args:
+        href (str): sidecar href
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+
+    Returns:
+        Optional[Dict[str, Dict[str, Any]]]: sidecar entries, or None if the
+            sidecar does not exist
+    """
+    if read_href_modifier:
+        href = read_href_modifier(href)
+    if not href_exists(href):
+        return None
+    with open_href(href, "r") as f:
+        return json.load(f)
+
+
+def cog_nc_if_changed(
+        nc_path: str,
+        cog_href: str,
+        var: str,
+        index: int,
+        manifest: Optional[CogManifest] = None,
+        cog_path: Optional[str] = None,
+        quantized: bool = False) -> Tuple[bool, Dict[str, float]]:
+    """Creates a COG for a given time index into a NetCDF variable, unless the
+    manifest shows that a COG created from identical source data already
+    exists at cog_href. The time slice is read once; its statistics, its hash,
+    and the COG are all computed from the same in-memory data, and statistics
+    are returned whether or not a COG is created.
+
+    Args:
+        nc_path (str): local path to NetCDF file
+        cog_href (str): COG storage location
+        var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
+        index (int): 1-based index into NetCDF timestack
+        manifest (Optional[CogManifest]): optional manifest of existing COGs,
+            updated if a COG is created
+        cog_path (Optional[str]): optional local path at which to create the
+            COG, e.g., prior to upload to cog_href
+        quantized (bool): option to create an int16 COG (see
+            `utils.quantize`) rather than a float32 COG
+
+    Returns:
+        Tuple[bool, Dict[str, float]]: True if a COG was created, and the band
+            statistics of the COG (see `utils.band_statistics`)
+    """
+    created, statistics = cog_ncs_if_changed({var: nc_path},
+                                             cog_href, [var],
+                                             index,
+                                             manifest=manifest,
+                                             cog_path=cog_path,
+                                             quantized=quantized)
+    return created, statistics[var]
+
+
+def cog_ncs_if_changed(
+        nc_paths: Dict[str, str],
+        cog_href: str,
+        variables: List[str],
+        index: int,
+        manifest: Optional[CogManifest] = None,
+        cog_path: Optional[str] = None,
+        quantized: bool = False) -> Tuple[bool, Dict[str, Dict[str, float]]]:
+    """Creates a COG with a band for each of the given variables, for a given
+    time index into the NetCDF variables, unless the manifest shows that a COG
+    created from identical source data already exists at cog_href. Each
+    variable's time slice is read once; its statistics, the source hash, and
+    the COG are all computed from the same in-memory data. Band descriptions
+    of multiband and quantized COGs are set to the variable names.
+
+    Args:
+        nc_paths (Dict[str, str]): local path to each variable's NetCDF file
+        cog_href (str): COG storage location
+        variables (List[str]): weather variables, in band order
+        index (int): 1-based index into NetCDF timestacks
+        manifest (Optional[CogManifest]): optional manifest of existing COGs,
+            updated if a COG is created
+        cog_path (Optional[str]): optional local path at which to create the
+            COG, e.g., prior to upload to cog_href
+        quantized (bool): option to create an int16 COG (see
+            `utils.quantize`) rather than a float32 COG
+
+    Returns:
+        Tuple[bool, Dict[str, Dict[str, float]]]: True if a COG was created,
+            and the band statistics for each variable
+    """
+    cog_path = cog_path or cog_href
+    arrays = []
+    ascending = []
+    for var in variables:
+        array, south_up = read_nc_band(nc_paths[var], var, index)
+        arrays.append(array)
+        ascending.append(south_up)
+    band_stats = {
+        var: band_statistics(array)
+        for var, array in zip(variables, arrays)
+    }
+    if quantized:
+        # a quantized COG is unchanged if the packed data is unchanged
+        arrays = [
+            quantize(array, var) for var, array in zip(variables, arrays)
+        ]
+
+    source_hash = ""
+    if manifest:
+        # hashed as stored in the NetCDF, so existing manifests stay valid
+        if len(variables) == 1:
+            source_hash = hash_array(arrays[0])
+        else:
+            source_hash = hash_array(numpy.stack(arrays))
+        if manifest.is_unchanged(cog_href, source_hash):
+            return False, band_stats
+
+    bands = [
+        array[::-1, :] if south_up else array
+        for array, south_up in zip(arrays, ascending)
+    ]
+    descriptions = None
+    if quantized or len(variables) > 1:
+        descriptions = variables
+    if quantized:
+        status = cog_bands(
+            bands,
+            cog_path,
+            descriptions=descriptions,
+            nodata=QUANTIZED_NODATA,
+            scales=[QUANTIZED_SCALE[var] for var in variables],
+            offsets=[QUANTIZED_OFFSET[var] for var in variables],
+            predictor=True)
+    else:
+        status = cog_bands(bands, cog_path, descriptions=descriptions)
+    if status:
+        raise CogCreationError(
+            f"Failed to create '{cog_href}' from time index {index} of "
+            f"{sorted(set(nc_paths[var] for var in variables))}.")
+
+    if manifest:
+        manifest.update(cog_href, source_hash, cog_path)
+    return True, band_stats
@@ -0,0 +1,231 @@
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import (Any, Callable, ContextManager, Dict, Iterator, List,
+                    Optional, Set)
+
+# seconds between memory samples taken while stages run
+SAMPLE_INTERVAL = 0.05
+
+PROC_STATUS = "/proc/self/status"
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _status_bytes(field: str) -> Optional[int]:
+    try:
+        with open(PROC_STATUS) as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _max_rss() -> int:
+    try:
+        import resource
+    except ImportError:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes, except on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def current_rss() -> int:
+    """Finds the resident set size of the process.
+
+    Returns:
+        int: resident set size in bytes, or the peak resident set size where
+            the current size is unavailable
+    """
+    rss = _status_bytes("VmRSS:")
+    return _max_rss() if rss is None else rss
+
+
+def peak_rss(reset: bool = False) -> int:
+    """Finds the peak resident set size of the process, optionally resetting
+    the peak to the current resident set size. The peak can only be reset on
+    Linux; elsewhere it is the peak since the process started.
+
+    Args:
+        reset (bool): option to reset the peak after reading it
+
+    Returns:
+        int: peak resident set size in bytes
+    """
+    peak = _status_bytes("VmHWM:")
+    if peak is None:
+        return _max_rss()
+    if reset:
+        try:
+            with open(PROC_CLEAR_REFS, "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+    return peak
+
+
+class StagePeak:
+    """Peak memory growth over a `MemoryMonitor`'s baseline while a stage
+    ran.
+
+    Args:
+        python (int): peak growth in bytes of memory allocated through Python
+            (including NumPy arrays), as traced by tracemalloc
+        rss (int): peak growth in bytes of the resident set size, including
+            native allocations, e.g., by the NetCDF and HDF5 libraries
+    """
+
+    def __init__(self, python: int = 0, rss: int = 0):
+        self.python = python
+        self.rss = rss
+
+    def __repr__(self) -> str:
+        return (f"StagePeak(python={self.python / 2**20:.1f} MiB, "
+                f"rss={self.rss / 2**20:.1f} MiB)")
+
+
+class MemoryMonitor:
+    """Records the peak Python and native memory use of each stage of a
+    pipeline (see `pipeline.run_pipeline`) or of any other named block of
+    work (see `stage`), as growth over the memory in use when the monitor
+    started.
+
+    While started, tracemalloc traces Python allocations and a thread samples
+    memory every SAMPLE_INTERVAL seconds. Each sample takes the traced and
+    resident peaks since the previous sample and resets them, so the peak of
+    every interval is attributed to each stage that ran during it; when
+    stages run concurrently, each stage's peak therefore includes the memory
+    held by the others. On Linux the resident peak is reset through
+    /proc/self/clear_refs so short-lived native spikes are caught; elsewhere
+    the resident peak is the process's peak since it started.
+
+    Use as a context manager, or call `start` and `stop`.
+
+    Args:
+        interval (float): seconds between memory samples
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peaks: Dict[str, StagePeak] = dict()
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = dict()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_tracing = False
+        self._python_baseline = 0
+        self._rss_baseline = 0
+
+    def __enter__(self) -> "MemoryMonitor":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Records the baseline memory use and starts sampling."""
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._python_baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        peak_rss(reset=True)
+        self._rss_baseline = current_rss()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling, and tracing if the monitor started it."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.sample()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """Attributes the peak memory use since the previous sample to the
+        stages running now."""
+        with self._lock:
+            self._sample(set(self._active))
+
+    def _sample(self, stages: Set[str]) -> None:
+        if not tracemalloc.is_tracing():
+            return
+        python = tracemalloc.get_traced_memory()[1] - self._python_baseline
+        tracemalloc.reset_peak()
+        rss = peak_rss(reset=True) - self._rss_baseline
+        for name in stages:
+            peak = self.peaks.setdefault(name, StagePeak())
+            peak.python = max(peak.python, python)
+            peak.rss = max(peak.rss, rss)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Records the memory use of a block of work under a stage name. The
+        same stage may run in a number of threads at once.
+
+        Args:
+            name (str): stage name
+        """
+        with self._lock:
+            self._sample(set(self._active))
+            self._active[name] = self._active.get(name, 0) + 1
+            self.peaks.setdefault(name, StagePeak())
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._sample(set(self._active))
+                self._active[name] -= 1
+                if not self._active[name]:
+                    del self._active[name]
+
+    def wrap(
+            self, name: str,
+            function: Callable[[Any],
+                               List[Any]]) -> Callable[[Any], List[Any]]:
+        """Wraps a pipeline stage function so that its memory use is recorded
+        under the stage name.
+
+        Args:
+            name (str): stage name
+            function (Callable[[Any], List[Any]]): stage function
+
+        Returns:
+            Callable[[Any], List[Any]]: the monitored stage function
+        """
+
+        def monitored(unit: Any) -> List[Any]:
+            with self.stage(name):
+                return function(unit)
+
+        return monitored
+
+
+def monitor_stage(monitor: Optional[MemoryMonitor],
+                  name: str) -> ContextManager[None]:
+    """Records the memory use of a block of work under a stage name, if a
+    monitor is supplied (see `MemoryMonitor.stage`).
+
+    Args:
+        monitor (Optional[MemoryMonitor]): optional memory monitor
+        name (str): stage name
+
+    Returns:
+        ContextManager[None]: context in which to run the block of work
+    """
+    if monitor:
+        return monitor.stage(name)
+    return nullcontext()
@@ -0,0 +1,366 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import fsspec
+from pystac import Item, MediaType, StacIO
+from pystac.utils import (datetime_to_str, is_absolute_href,
+                          make_absolute_href, make_relative_href,
+                          str_to_datetime)
+
+from stactools.nclimgrid import constants, daily_stac, monthly_stac
+from stactools.nclimgrid.constants import Status
+from stactools.nclimgrid.errors import BadInput
+from stactools.nclimgrid.index import ItemIndex, ItemRows, item_rows
+
+COLLECTION_FILENAME = "collection.json"
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+# preference when Items for the same date are found with different statuses
+STATUS_RANK = {Status.SCALED.value: 2, Status.PRELIM.value: 1}
+
+
+class ExtentAccumulator:
+    """Joins Item bounding boxes and datetimes into a Collection extent without
+    creating pystac objects."""
+
+    def __init__(self) -> None:
+        self.bbox: Optional[List[float]] = None
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+
+    def add(self, bbox: List[float], start: datetime, end: datetime) -> None:
+        """Expands the extent to include an Item's bounding box and datetime
+        range.
+
+        Args:
+            bbox (List[float]): Item bounding box
+            start (datetime): Item start datetime
+            end (datetime): Item end datetime
+        """
+        if self.bbox is None:
+            self.bbox = list(bbox)
+        else:
+            self.bbox = [
+                min(self.bbox[0], bbox[0]),
+                min(self.bbox[1], bbox[1]),
+                max(self.bbox[2], bbox[2]),
+                max(self.bbox[3], bbox[3])
+            ]
+        if self.start is None or start < self.start:
+            self.start = start
+        if self.end is None or end > self.end:
+            self.end = end
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Generates the Collection extent JSON dictionary.
+
+        Returns:
+            Dict[str, Any]: Collection extent
+        """
+        if self.bbox is None or self.start is None or self.end is None:
+            raise BadInput("Cannot create an extent without Items.")
+        return {
+            "spatial": {
+                "bbox": [self.bbox]
+            },
+            "temporal": {
+                "interval":
+                [[datetime_to_str(self.start),
+                  datetime_to_str(self.end)]]
+            }
+        }
+
+
+class MergedItem:
+    """The parts of a merged Item needed to deduplicate Items and to create
+    the Collection, so that Item JSON need not be held in memory.
+
+    Args:
+        item_dict (Dict[str, Any]): Item JSON dictionary
+    """
+
+    def __init__(self, item_dict: Dict[str, Any]):
+        self.id = item_dict["id"]
+        self.key, self.rank = item_key(self.id)
+        self.bbox = item_dict["bbox"]
+        properties = item_dict["properties"]
+        self.start = str_to_datetime(
+            properties.get("start_datetime") or properties["datetime"])
+        self.end = str_to_datetime(
+            properties.get("end_datetime") or properties["datetime"])
+
+
+def item_key(item_id: str) -> Tuple[str, int]:
+    """Splits an Item id into a status-independent key and a status rank,
+    e.g., "202201-grd-scaled-01" -> ("202201-grd-01", 2).
+
+    Args:
+        item_id (str): Item id
+
+    Returns:
+        Tuple[str, int]: deduplication key and rank (higher is preferred)
+    """
+    parts = item_id.split("-")
+    rank = max((STATUS_RANK.get(part, 0) for part in parts), default=0)
+    key = "-".join(part for part in parts if part not in STATUS_RANK)
+    return key, rank
+
+
+def merge_items(sources: List[str],
+                destination: str,
+                index_path: Optional[str] = None) -> Dict[str, Any]:
+    """Merges Items from separate jobs, e.g., shards of a Collection build,
+    into a single self-contained Collection.
+
+    Sources are streamed: Item JSON is copied to the destination with updated
+    links one Item at a time, without creating pystac objects or reading COGs.
+    The Collection extent is joined numerically from the Item bounding boxes
+    and datetimes. Items are deduplicated by id, ignoring status, with
+    "scaled" Items preferred over "prelim" Items; for Items of equal status,
+    the Item from the later source is kept.
+
+    Args:
+        sources (List[str]): hrefs of Collection JSON files, directories
+            containing Item JSON files, or NDJSON files of Items. Collection
+            fields, e.g., item_assets, and non-Item links are taken from the
+            first source if it is a Collection, or else generated from the
+            first Item.
+        destination (str): directory in which to save the merged Collection
+        index_path (Optional[str]): optional local path of a SQLite index
+            in which to record the merged Items (see `index.ItemIndex`)
+
+    Returns:
+        Dict[str, Any]: the merged Collection JSON dictionary
+    """
+    collection_dest = os.path.join(destination, COLLECTION_FILENAME)
+    template: Optional[Dict[str, Any]] = None
+    merged: Dict[str, MergedItem] = dict()
+    # dedupe key -> index rows of the merged Item, with absolute asset hrefs
+    index_rows: Dict[str, ItemRows] = dict()
+
+    for source in sources:
+        for stac_dict, href in iter_source(source):
+            if stac_dict.get("type") == "Collection":
+                template = template or stac_dict
+                continue
+            if template is None:
+                template = collection_template(stac_dict)
+            merged_item = MergedItem(stac_dict)
+            existing = merged.get(merged_item.key)
+            if existing and existing.rank > merged_item.rank:
+                continue
+            if existing and existing.id != merged_item.id:
+                remove_item_dir(destination, existing.id)
+            merged[merged_item.key] = merged_item
+            save_item_dict(stac_dict, template, href,
+                           item_dest(destination, merged_item.id),
+                           collection_dest)
+            if index_path:
+                item_row, asset_rows = item_rows(stac_dict)
+                index_rows[merged_item.key] = (item_row, [
+                    (item_id, key,
+                     make_absolute_href(asset_href,
+                                        item_dest(destination,
+                                                  merged_item.id)))
+                    for item_id, key, asset_href in asset_rows
+                ])
+
+    if template is None or not merged:
+        raise BadInput("No Items found to merge.")
+
+    merged_items = sorted(merged.values(), key=lambda item: item.id)
+    extent = ExtentAccumulator()
+    for merged_item in merged_items:
+        extent.add(merged_item.bbox, merged_item.start, merged_item.end)
+    item_links = [
+        item_link(item_dest(destination, merged_item.id), collection_dest)
+        for merged_item in merged_items
+    ]
+
+    collection_dict = merged_collection_dict(template, extent.to_dict(),
+                                             item_links, collection_dest)
+    StacIO.default().save_json(collection_dest, collection_dict)
+    if index_path:
+        with ItemIndex(index_path) as item_index:
+            item_index.add_rows(index_rows.values())
+    return collection_dict
+
+
+def iter_source(source: str) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """Yields the JSON dictionaries in a merge source, with the href used to
+    resolve relative hrefs in each. A Collection source yields the Collection
+    itself followed by its Items; other sources yield only Items.
+
+    Args:
+        source (str): href of a Collection JSON file, a directory containing
+            Item JSON files, or an NDJSON file of Items
+
+    Returns:
+        Iterator[Tuple[Dict[str, Any], str]]: JSON dictionaries and hrefs
+    """
+    stac_io = StacIO.default()
+    if source.endswith(NDJSON_EXTENSIONS):
+        with fsspec.open(source, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line), source
+    elif source.endswith(".json"):
+        collection_dict = stac_io.read_json(source)
+        yield collection_dict, source
+        for link in collection_dict["links"]:
+            if link["rel"] == "item":
+                item_href = make_absolute_href(link["href"], source)
+                yield stac_io.read_json(item_href), item_href
+    else:
+        fs, path = fsspec.core.url_to_fs(source)
+        local = "file" in fs.protocol
+        for json_path in sorted(fs.glob(f"{path}/**/*.json")):
+            item_href = json_path if local else fs.unstrip_protocol(json_path)
+            item_dict = stac_io.read_json(item_href)
+            if item_dict.get("type") == "Feature":
+                yield item_dict, item_href
+
+
+def item_dest(destination: str, item_id: str) -> str:
+    """Gets the location of an Item in a self-contained Collection.
+
+    Args:
+        destination (str): Collection directory
+        item_id (str): Item id
+
+    Returns:
+        str: Item location
+    """
+    return os.path.join(destination, item_id, f"{item_id}.json")
+
+
+def remove_item_dir(destination: str, item_id: str) -> None:
+    """Removes a previously merged Item that has been superseded.
+
+    Args:
+        destination (str): Collection directory
+        item_id (str): Item id
+    """
+    fs, path = fsspec.core.url_to_fs(os.path.join(destination, item_id))
+    fs.rm(path, recursive=True)
+
+
+def save_item_dict(item_dict: Dict[str, Any], collection_dict: Dict[str, Any],
+                   item_href: Optional[str], item_dest: str,
+                   collection_dest: str) -> None:
+    """Saves Item JSON to a new location in a self-contained Collection,
+    replacing its structural links and re-relativizing relative asset hrefs.
+
+    Args:
+        item_dict (Dict[str, Any]): Item JSON dictionary
+        collection_dict (Dict[str, Any]): JSON dictionary of the Collection
+            the Item is merged into
+        item_href (Optional[str]): current Item location, used to resolve
+            relative asset hrefs. Relative asset hrefs are left unchanged if
+            the Item has no location.
+        item_dest (str): new Item location
+        collection_dest (str): Collection location
+    """
+    item_dict["collection"] = collection_dict["id"]
+    for asset in item_dict["assets"].values():
+        if item_href and not is_absolute_href(asset["href"]):
+            asset_href = make_absolute_href(asset["href"], item_href)
+            asset["href"] = make_relative_href(asset_href, item_dest)
+
+    structural_link = {
+        "href": make_relative_href(collection_dest, item_dest),
+        "type": "application/json",
+    }
+    if collection_dict.get("title"):
+        structural_link["title"] = collection_dict["title"]
+    links = [
+        dict(rel=rel, **structural_link)
+        for rel in ["root", "collection", "parent"]
+    ]
+    links.extend(
+        link for link in item_dict["links"]
+        if link["rel"] not in ["root", "collection", "parent", "self"])
+    item_dict["links"] = links
+
+    StacIO.default().save_json(item_dest, item_dict)
+
+
+def collection_template(item_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Generates the JSON dictionary for the NClimGrid Collection that an Item
+    belongs to.
+
+    Args:
+        item_dict (Dict[str, Any]): Item JSON dictionary
+
+    Returns:
+        Dict[str, Any]: Collection JSON dictionary
+    """
+    item = Item.from_dict(item_dict)
+    collection_id = item.collection_id
+    if collection_id is None:
+        # Items not yet in a Collection: daily Items span a single day
+        start = item.common_metadata.start_datetime
+        end = item.common_metadata.end_datetime
+        if start and end and end - start < timedelta(days=1):
+            collection_id = constants.DAILY_COLLECTION_ID
+        else:
+            collection_id = constants.MONTHLY_COLLECTION_ID
+
+    if collection_id == constants.DAILY_COLLECTION_ID:
+        collection = daily_stac.daily_collection([item])
+    elif collection_id == constants.MONTHLY_COLLECTION_ID:
+        collection = monthly_stac.monthly_collection([item])
+    else:
+        raise BadInput(f"'{item.id}' is not an NClimGrid Item.")
+    return collection.to_dict(include_self_link=False)
+
+
+def item_link(item_dest: str, collection_dest: str) -> Dict[str, Any]:
+    """Creates a Collection's link to an Item.
+
+    Args:
+        item_dest (str): Item location
+        collection_dest (str): Collection location
+
+    Returns:
+        Dict[str, Any]: link JSON dictionary
+    """
+    return {
+        "rel": "item",
+        "href": make_relative_href(item_dest, collection_dest),
+        "type": MediaType.GEOJSON
+    }
+
+
+def merged_collection_dict(template: Dict[str, Any], extent: Dict[str, Any],
+                           item_links: List[Dict[str, Any]],
+                           collection_dest: str) -> Dict[str, Any]:
+    """Creates the JSON dictionary of a merged self-contained Collection.
+
+    Args:
+        template (Dict[str, Any]): Collection JSON dictionary from which fields
+            and non-structural links are copied
+        extent (Dict[str, Any]): merged Collection extent
+        item_links (List[Dict[str, Any]]): links to each Item
+        collection_dest (str): Collection location
+
+    Returns:
+        Dict[str, Any]: the Collection JSON dictionary
+    """
+    collection_dict = dict(template)
+    root_link = {
+        "rel": "root",
+        "href": make_relative_href(collection_dest, collection_dest),
+        "type": "application/json",
+    }
+    if template.get("title"):
+        root_link["title"] = template["title"]
+    other_links = [
+        link for link in template["links"]
+        if link["rel"] not in ["root", "self", "parent", "item"]
+    ]
+    collection_dict["links"] = [root_link] + item_links + other_links
+    collection_dict["extent"] = extent
+    return collection_dict
@@ -1,38 +1,74 @@
 import os
 from calendar import monthrange
 from datetime import datetime, timezone
+from functools import partial
 from posixpath import join as urljoin
 from tempfile import TemporaryDirectory
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from dateutil import relativedelta
 from pystac import Collection, Extent, Item
-from pystac.extensions.item_assets import AssetDefinition, ItemAssetsExtension
+from pystac.extensions.eo import EOExtension
+from pystac.extensions.item_assets import ItemAssetsExtension
 from pystac.extensions.projection import ProjectionExtension
+from pystac.extensions.raster import RasterExtension
 from pystac.extensions.scientific import ScientificExtension
 from stactools.core.io import ReadHrefModifier
-from stactools.core.utils import href_exists
 
 from stactools.nclimgrid import constants
 from stactools.nclimgrid.constants import VARIABLES
-from stactools.nclimgrid.errors import CogCreationError, ExistError
-from stactools.nclimgrid.utils import (cog_nc, create_cog_asset, download_nc,
-                                       generate_years_months)
-
-
-def create_monthly_items(
-        start_yyyymm: str,
-        end_yyyymm: str,
-        base_cog_href: str,
-        base_nc_href: Optional[str] = None,
-        read_href_modifier: Optional[ReadHrefModifier] = None) -> List[Item]:
+from stactools.nclimgrid.errors import ExistError
+from stactools.nclimgrid.index import add_to_index
+from stactools.nclimgrid.manifest import CogManifest, cog_ncs_if_changed
+from stactools.nclimgrid.memory import MemoryMonitor
+from stactools.nclimgrid.pipeline import (ItemUnit, SharedScratch,
+                                          StageFunction, encode_cogs,
+                                          run_pipeline, store_cogs)
+from stactools.nclimgrid.signing import cache_read_href_modifier
+from stactools.nclimgrid.upload import CogUploader
+from stactools.nclimgrid.utils import (create_item_cog_asset, download_nc,
+                                       extract_nc_slices,
+                                       generate_years_months, href_exists,
+                                       item_asset_definitions, shard_list)
+
+
+def create_monthly_items(start_yyyymm: str,
+                         end_yyyymm: str,
+                         base_cog_href: str,
+                         base_nc_href: Optional[str] = None,
+                         read_href_modifier: Optional[ReadHrefModifier] = None,
+                         skip_unchanged: bool = False,
+                         range_read: bool = False,
+                         shard: Optional[Tuple[int, int]] = None,
+                         multiband: bool = False,
+                         quantized: bool = False,
+                         index_path: Optional[str] = None) -> List[Item]:
     """Creates a list of monthly Items for a given month range, with each Item
     containing a COG Asset for each variable. The COG Assets can be created
     during Item creation if an href to the base of a NetCDF directory structure
     is supplied; if not supplied, COGs must already exist. COG storage
     (existing or new) is flat.
 
+    With multiband enabled, each Item instead contains a single COG Asset with
+    a band for each variable, in `VARIABLES` order, so that a quarter as many
+    COGs are stored, checked for existence, and read.
+
+    When creating COGs with skip_unchanged enabled, a manifest of source data
+    and COG hashes is kept at base_cog_href and COGs whose source data has not
+    changed since they were created are not regenerated.
+
+    When creating COGs for remote storage, i.e., base_cog_href is a URL, COGs
+    are created in local scratch space and uploaded concurrently.
+
+    When creating COGs from remote NetCDF data with range_read enabled, only
+    the time slices for the requested months are read from each remote NetCDF
+    rather than downloading each NetCDF in its entirety.
+
+    The read_href_modifier is memoized (see `CachedReadHrefModifier`), so an
+    href signer that appends a token is called once per storage prefix rather
+    than once per href.
+
     Args:
         start_yyyymm (str): start month in YYYYMM format
         end_yyyymm (str): end month in YYYYMM format
@@ -41,46 +77,114 @@ def create_monthly_items(
             directory structure
         read_href_modifier (Optional[ReadHrefModifier]): argument to modify
             remote hrefs
+        skip_unchanged (bool): option to skip creating COGs whose source data
+            is unchanged since the COG was last created
+        range_read (bool): option to read only the time slices for the
+            requested months from remote NetCDF files
+        shard (Optional[Tuple[int, int]]): optional 1-based shard index and
+            number of shards. Only the months in the shard are processed (see
+            `utils.shard_list`).
+        multiband (bool): option to store all variables in a single COG per
+            month rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
+        index_path (Optional[str]): optional local path of a SQLite index
+            in which to record the Items (see `index.ItemIndex`)
 
     Returns:
         List[Item]: list of monthly Items
     """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
     indices = month_indices(start_yyyymm, end_yyyymm)
-
-    # if cogging and NetCDF data is remote:
-    #   -> download NetCDFs and and return their local paths
-    #   -> create items, cogging on the fly
-    if base_nc_href and urlparse(base_nc_href).scheme:
-        with TemporaryDirectory() as temp_dir:
-            nc_local_paths = get_remote_ncs(
-                base_nc_href, temp_dir, read_href_modifier=read_href_modifier)
+    if shard:
+        indices = shard_list(indices, shard)
+
+    manifest = None
+    if base_nc_href and skip_unchanged:
+        manifest = CogManifest.from_base_cog_href(
+            base_cog_href, read_href_modifier=read_href_modifier)
+
+    uploader = None
+    if base_nc_href and urlparse(base_cog_href).scheme:
+        uploader = CogUploader()
+
+    # record created COGs in the manifest, even if creation fails partway
+    # through the month range, so that a re-run can pick up where it left off
+    try:
+        # if cogging and NetCDF data is remote and range read:
+        #   -> read the months' time slices and return their local paths
+        #   -> create items, cogging on the fly
+        if base_nc_href and urlparse(base_nc_href).scheme and range_read:
+            with TemporaryDirectory() as temp_dir:
+                nc_local_paths = get_remote_nc_slices(
+                    base_nc_href,
+                    temp_dir, [idx for _, _, idx in indices],
+                    read_href_modifier=read_href_modifier)
+                # the local NetCDFs hold only the requested months, in order
+                slice_indices = [[year, month, i + 1]
+                                 for i, (year, month, _) in enumerate(indices)]
+                items = monthly_items(slice_indices,
+                                      base_cog_href,
+                                      nc_local_paths=nc_local_paths,
+                                      manifest=manifest,
+                                      uploader=uploader,
+                                      multiband=multiband,
+                                      quantized=quantized)
+        # if cogging and NetCDF data is remote:
+        #   -> download NetCDFs and and return their local paths
+        #   -> create items, cogging on the fly
+        elif base_nc_href and urlparse(base_nc_href).scheme:
+            with TemporaryDirectory() as temp_dir:
+                nc_local_paths = get_remote_ncs(
+                    base_nc_href,
+                    temp_dir,
+                    read_href_modifier=read_href_modifier)
+                items = monthly_items(indices,
+                                      base_cog_href,
+                                      nc_local_paths=nc_local_paths,
+                                      manifest=manifest,
+                                      uploader=uploader,
+                                      multiband=multiband,
+                                      quantized=quantized)
+        # if cogging and NetCDF data is local:
+        #   -> return local NetCDF paths
+        #   -> create items, cogging on the fly
+        elif base_nc_href:
+            nc_local_paths = get_local_ncs(base_nc_href)
             items = monthly_items(indices,
                                   base_cog_href,
-                                  nc_local_paths=nc_local_paths)
-    # if cogging and NetCDF data is local:
-    #   -> return local NetCDF paths
-    #   -> create items, cogging on the fly
-    elif base_nc_href:
-        nc_local_paths = get_local_ncs(base_nc_href)
-        items = monthly_items(indices,
-                              base_cog_href,
-                              nc_local_paths=nc_local_paths)
-    # if not cogging:
-    #   -> the cogs are assumed to already exist at base_cog_href
-    #   -> create items, checking for cog existence for each asset
-    else:
-        items = monthly_items(indices,
-                              base_cog_href,
-                              read_href_modifier=read_href_modifier)
-
+                                  nc_local_paths=nc_local_paths,
+                                  manifest=manifest,
+                                  uploader=uploader,
+                                  multiband=multiband,
+                                  quantized=quantized)
+        # if not cogging:
+        #   -> the cogs are assumed to already exist at base_cog_href
+        #   -> create items, checking for cog existence for each asset
+        else:
+            items = monthly_items(indices,
+                                  base_cog_href,
+                                  read_href_modifier=read_href_modifier,
+                                  multiband=multiband,
+                                  quantized=quantized)
+    finally:
+        if manifest:
+            manifest.save()
+        if uploader:
+            uploader.close()
+
+    add_to_index(index_path, items)
     return items
 
 
-def monthly_items(
-        indices: List[List[int]],
-        base_cog_href: str,
-        nc_local_paths: Optional[Dict[str, str]] = None,
-        read_href_modifier: Optional[ReadHrefModifier] = None) -> List[Item]:
+def monthly_items(indices: List[List[int]],
+                  base_cog_href: str,
+                  nc_local_paths: Optional[Dict[str, str]] = None,
+                  read_href_modifier: Optional[ReadHrefModifier] = None,
+                  manifest: Optional[CogManifest] = None,
+                  uploader: Optional[CogUploader] = None,
+                  multiband: bool = False,
+                  quantized: bool = False) -> List[Item]:
     """Creates the list of monthly items using the supplied index list.
 
     Args:
@@ -92,6 +196,15 @@ def monthly_items(
             paths to each variable for creating COGs
         read_href_modifier (Optional[ReadHrefModifier]): argument to modify
             remote hrefs
+        manifest (Optional[CogManifest]): optional manifest used to skip
+            creating COGs whose source data is unchanged. Updated, but not
+            saved, as COGs are created.
+        uploader (Optional[CogUploader]): optional uploader used to create
+            COGs in local scratch space and upload them to base_cog_href
+        multiband (bool): option to store all variables in a single COG per
+            month rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
 
     Returns:
         List[Item]: List of monthly Items
@@ -101,31 +214,50 @@ def monthly_items(
     # an item for each month
     for year, month, idx in indices:
         item = monthly_base_item(year, month)
-        # a COG asset for each variable
-        for var in VARIABLES:
-            cog_href = get_cog_href(year, month, var, base_cog_href)
-
-            # create cog if cogging
+        statistics: Dict[str, Dict[str, float]] = dict()
+        # a COG asset for each variable, or for all variables if multiband
+        cog_hrefs = get_cog_hrefs(year, month, base_cog_href, multiband)
+        for cog_href, variables in cog_hrefs.items():
+            # create cog if cogging and the source data has changed
             if nc_local_paths:
-                if cog_nc(nc_local_paths[var], cog_href, var, idx):
-                    raise CogCreationError(
-                        f"Failed to create '{cog_href}' for year {year}, month "
-                        f"{month}, from '{nc_local_paths[var]}'.")
-
-            # check that cog exists
-            cog_href_mod = cog_href
-            if read_href_modifier:
-                cog_href_mod = read_href_modifier(cog_href)
-            if not href_exists(cog_href_mod):
-                raise ExistError(f"'{cog_href}' does not exist.")
+                cog_path = cog_href
+                if uploader:
+                    cog_path = uploader.scratch_path(cog_href)
+                created, cog_statistics = cog_ncs_if_changed(
+                    nc_local_paths,
+                    cog_href,
+                    variables,
+                    idx,
+                    manifest=manifest,
+                    cog_path=cog_path,
+                    quantized=quantized)
+                statistics.update(cog_statistics)
+                if created and uploader:
+                    uploader.submit(cog_path, cog_href)
+
+            # check that cog exists; uploaded cogs exist once uploads complete
+            if not uploader:
+                cog_href_mod = cog_href
+                if read_href_modifier:
+                    cog_href_mod = read_href_modifier(cog_href)
+                if not href_exists(cog_href_mod):
+                    raise ExistError(f"'{cog_href}' does not exist.")
 
             # add cog asset to item
-            cog_key, cog_asset = create_cog_asset(cog_href, var)
+            cog_key, cog_asset = create_item_cog_asset(cog_href, variables,
+                                                       statistics, quantized)
             item.assets[cog_key] = cog_asset
 
+        if multiband:
+            EOExtension.add_to(item)
+        if statistics or quantized:
+            RasterExtension.add_to(item)
         item.validate()
         items.append(item)
 
+    if uploader:
+        uploader.wait()
+
     return items
 
 
@@ -149,6 +281,49 @@ def get_cog_href(year: int, month: int, var: str, base_cog_href: str) -> str:
     return cog_href
 
 
+def get_multiband_cog_href(year: int, month: int, base_cog_href: str) -> str:
+    """Generates the href of a COG with a band for each variable.
+
+    Args:
+        year (int): data year
+        month (int): data month
+        base_cog_href (str): COG storage location
+
+    Returns:
+        str: the COG href
+    """
+    cog_filename = f"nclimgrid-{year}{month:02d}.tif"
+    if urlparse(base_cog_href).scheme:
+        cog_href = urljoin(base_cog_href, cog_filename)
+    else:
+        cog_href = os.path.join(base_cog_href, cog_filename)
+    return cog_href
+
+
+def get_cog_hrefs(year: int,
+                  month: int,
+                  base_cog_href: str,
+                  multiband: bool = False) -> Dict[str, List[str]]:
+    """Generates the hrefs of a month's COGs, with the variables stored in
+    the bands of each COG.
+
+    Args:
+        year (int): data year
+        month (int): data month
+        base_cog_href (str): COG storage location
+        multiband (bool): whether all variables are stored in a single COG
+
+    Returns:
+        Dict[str, List[str]]: variables in band order, keyed by COG href
+    """
+    if multiband:
+        return {get_multiband_cog_href(year, month, base_cog_href): VARIABLES}
+    return {
+        get_cog_href(year, month, var, base_cog_href): [var]
+        for var in VARIABLES
+    }
+
+
 def monthly_base_item(year: int, month: int) -> Item:
     """Creates an Item with all components except Assets.
 
@@ -244,6 +419,41 @@ def get_remote_ncs(
     return nc_local_paths
 
 
+def get_remote_nc_slices(
+        base_nc_href: str,
+        temp_dir: str,
+        nc_indices: List[int],
+        read_href_modifier: Optional[ReadHrefModifier] = None
+) -> Dict[str, str]:
+    """Reads time slices from remote NetCDF files, using range requests, and
+    saves them to local NetCDF files.
+
+    Args:
+        base_nc_href (str): remote url to the base of a NetCDF directory
+            structure
+        temp_dir (str): temporary local directory to store extracted NetCDFs
+            for COG creation
+        nc_indices (List[int]): 1-based indices into the NetCDF timestacks
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+
+    Returns:
+        Dict[str, str]: dictionary of the extracted file paths, keyed by
+            variable name
+    """
+    nc_local_paths = dict()
+    for var in VARIABLES:
+        nc_filename = f"nclimgrid_{var}.nc"
+        nc_remote_url = urljoin(base_nc_href, nc_filename)
+        if read_href_modifier:
+            nc_remote_url = read_href_modifier(nc_remote_url)
+        nc_local_paths[var] = os.path.join(temp_dir, nc_filename)
+        extract_nc_slices(nc_remote_url, nc_local_paths[var], [var],
+                          nc_indices)
+
+    return nc_local_paths
+
+
 def get_local_ncs(base_nc_href: str) -> Dict[str, str]:
     """Generates a dictionary of local NetCDF file paths for each variable
 
@@ -263,12 +473,159 @@ def get_local_ncs(base_nc_href: str) -> Dict[str, str]:
     return nc_local_paths
 
 
+def create_monthly_items_pipelined(
+        start_yyyymm: str,
+        end_yyyymm: str,
+        base_cog_href: str,
+        base_nc_href: Optional[str] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        skip_unchanged: bool = False,
+        range_read: bool = False,
+        workers: Optional[Dict[str, int]] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        multiband: bool = False,
+        quantized: bool = False,
+        index_path: Optional[str] = None,
+        monitor: Optional[MemoryMonitor] = None) -> List[Item]:
+    """Creates monthly Items for a given month range. NetCDF reads, COG
+    creation, COG upload or existence checking, and Item assembly run as
+    concurrent pipeline stages, so network and CPU work overlap across months.
+    Produces the same Items as `create_monthly_items`.
+
+    Args:
+        start_yyyymm (str): start month in YYYYMM format
+        end_yyyymm (str): end month in YYYYMM format
+        base_cog_href (str): COG storage location
+        base_nc_href (Optional[str]): optional href to the base of a NetCDF
+            directory structure
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        skip_unchanged (bool): option to skip creating COGs whose source data
+            is unchanged since the COG was last created
+        range_read (bool): option to read only the time slices for the
+            requested months from remote NetCDF files
+        workers (Optional[Dict[str, int]]): optional concurrency limits for the
+            "fetch", "encode", "store", and "assemble" pipeline stages
+        shard (Optional[Tuple[int, int]]): optional 1-based shard index and
+            number of shards. Only the months in the shard are processed (see
+            `utils.shard_list`).
+        multiband (bool): option to store all variables in a single COG per
+            month rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
+        index_path (Optional[str]): optional local path of a SQLite index
+            in which to record the Items (see `index.ItemIndex`)
+        monitor (Optional[MemoryMonitor]): optional monitor in which to record
+            the peak memory use of each pipeline stage
+
+    Returns:
+        List[Item]: list of monthly Items, sorted by id
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    indices = month_indices(start_yyyymm, end_yyyymm)
+    if shard:
+        indices = shard_list(indices, shard)
+
+    manifest = None
+    if base_nc_href and skip_unchanged:
+        manifest = CogManifest.from_base_cog_href(
+            base_cog_href, read_href_modifier=read_href_modifier)
+
+    with TemporaryDirectory() as temp_dir:
+        remote_nc = bool(base_nc_href and urlparse(base_nc_href).scheme)
+
+        # the monthly NetCDFs hold all months: unless range reading, download
+        # or locate them once for all months
+        nc_local_paths = None
+        if base_nc_href and remote_nc and not range_read:
+            nc_local_paths = get_remote_ncs(
+                base_nc_href, temp_dir, read_href_modifier=read_href_modifier)
+        elif base_nc_href and not remote_nc:
+            nc_local_paths = get_local_ncs(base_nc_href)
+
+        def fetch(index: List[int]) -> List[ItemUnit]:
+            year, month, idx = index
+            cog_hrefs = get_cog_hrefs(year, month, base_cog_href, multiband)
+            if base_nc_href and remote_nc and range_read:
+                scratch = SharedScratch()
+                scratch.retain(1)
+                month_nc_local_paths = get_remote_nc_slices(
+                    base_nc_href,
+                    scratch.name, [idx],
+                    read_href_modifier=read_href_modifier)
+                return [
+                    ItemUnit((year, month),
+                             cog_hrefs,
+                             nc_local_paths=month_nc_local_paths,
+                             nc_index=1,
+                             scratch=scratch)
+                ]
+            return [
+                ItemUnit((year, month),
+                         cog_hrefs,
+                         nc_local_paths=nc_local_paths,
+                         nc_index=idx)
+            ]
+
+        def assemble(unit: ItemUnit) -> List[Item]:
+            year, month = unit.key
+            item = monthly_base_item(year, month)
+            for cog_href, variables in unit.cog_hrefs.items():
+                cog_key, cog_asset = create_item_cog_asset(
+                    cog_href, variables, unit.statistics, quantized)
+                item.assets[cog_key] = cog_asset
+            if multiband:
+                EOExtension.add_to(item)
+            if unit.statistics or quantized:
+                RasterExtension.add_to(item)
+            item.validate()
+            return [item]
+
+        # if cogging and COG storage is remote, upload COGs from a temporary
+        # directory
+        upload_dir = None
+        if base_nc_href and urlparse(base_cog_href).scheme:
+            upload_dir = os.path.join(temp_dir, "cogs")
+            os.makedirs(upload_dir)
+        stages: List[Tuple[str, StageFunction]] = [
+            ("fetch", fetch),
+            ("encode",
+             partial(encode_cogs,
+                     manifest=manifest,
+                     upload_dir=upload_dir,
+                     quantized=quantized)),
+            ("store", partial(store_cogs,
+                              read_href_modifier=read_href_modifier)),
+            ("assemble", assemble),
+        ]
+        try:
+            items = run_pipeline(indices,
+                                 stages,
+                                 workers=workers,
+                                 monitor=monitor)
+        finally:
+            if manifest:
+                manifest.save()
+
+    add_to_index(index_path, items)
+    return sorted(items, key=lambda item: item.id)
+
+
 def create_monthly_collection(
         start_yyyymm: str,
         end_yyyymm: str,
         base_cog_href: str,
         base_nc_href: Optional[str] = None,
-        read_href_modifier: Optional[ReadHrefModifier] = None) -> Collection:
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        skip_unchanged: bool = False,
+        range_read: bool = False,
+        pipelined: bool = False,
+        workers: Optional[Dict[str, int]] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        multiband: bool = False,
+        quantized: bool = False,
+        index_path: Optional[str] = None,
+        monitor: Optional[MemoryMonitor] = None) -> Collection:
     """Creates a collection of monthly Items for all months in the range from
     start_yyyymm to end_yyyymm.
 
@@ -280,17 +637,71 @@ def create_monthly_collection(
             directory structure
         read_href_modifier (Optional[ReadHrefModifier]): argument to modify
             remote hrefs
+        skip_unchanged (bool): option to skip creating COGs whose source data
+            is unchanged since the COG was last created
+        range_read (bool): option to read only the time slices for the
+            requested months from remote NetCDF files
+        pipelined (bool): option to create Items with concurrent pipeline
+            stages (see `create_monthly_items_pipelined`)
+        workers (Optional[Dict[str, int]]): optional concurrency limits for
+            the pipeline stages
+        shard (Optional[Tuple[int, int]]): optional 1-based shard index and
+            number of shards. Only the months in the shard are processed;
+            shard Collections can be combined with `merge.merge_items`.
+        multiband (bool): option to store all variables in a single COG per
+            month rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
+        index_path (Optional[str]): optional local path of a SQLite index
+            in which to record the Items (see `index.ItemIndex`)
+        monitor (Optional[MemoryMonitor]): optional monitor in which to record
+            the peak memory use of each pipeline stage, if pipelined
 
     Returns:
         Collection: STAC Collection with Items for each month between the start
             and end months
     """
-    items = create_monthly_items(start_yyyymm,
-                                 end_yyyymm,
-                                 base_cog_href,
-                                 base_nc_href=base_nc_href,
-                                 read_href_modifier=read_href_modifier)
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    if pipelined:
+        items = create_monthly_items_pipelined(
+            start_yyyymm,
+            end_yyyymm,
+            base_cog_href,
+            base_nc_href=base_nc_href,
+            read_href_modifier=read_href_modifier,
+            skip_unchanged=skip_unchanged,
+            range_read=range_read,
+            workers=workers,
+            shard=shard,
+            multiband=multiband,
+            quantized=quantized,
+            index_path=index_path,
+            monitor=monitor)
+    else:
+        items = create_monthly_items(start_yyyymm,
+                                     end_yyyymm,
+                                     base_cog_href,
+                                     base_nc_href=base_nc_href,
+                                     read_href_modifier=read_href_modifier,
+                                     skip_unchanged=skip_unchanged,
+                                     range_read=range_read,
+                                     shard=shard,
+                                     multiband=multiband,
+                                     quantized=quantized,
+                                     index_path=index_path)
+
+    return monthly_collection(items)
 
+
+def monthly_collection(items: List[Item]) -> Collection:
+    """Creates a monthly Collection containing the supplied Items.
+
+    Args:
+        items (List[Item]): monthly Items
+
+    Returns:
+        Collection: STAC Collection with the Items
+    """
     extent = Extent.from_items(items)
 
     collection = Collection(
@@ -304,13 +715,10 @@ def create_monthly_collection(
     )
     collection.add_items(items)
 
-    item_assets = dict()
-    for key, asset in items[0].get_assets().items():
-        asset_as_dict = asset.to_dict()
-        asset_as_dict.pop("href")
-        item_assets[key] = AssetDefinition(asset_as_dict)
     item_assets_ext = ItemAssetsExtension.ext(collection, add_if_missing=True)
-    item_assets_ext.item_assets = item_assets
+    item_assets_ext.item_assets = item_asset_definitions(items[0])
+    if EOExtension.has_extension(items[0]):
+        EOExtension.add_to(collection)
 
     scientific = ScientificExtension.ext(collection, add_if_missing=True)
     scientific.doi = constants.MONTHLY_DATA_DOI
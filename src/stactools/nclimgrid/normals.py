@@ -0,0 +1,326 @@
+from calendar import monthrange
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy
+from pystac import Collection, Item
+from stactools.core.io import ReadHrefModifier
+
+from stactools.nclimgrid import constants
+from stactools.nclimgrid.constants import VARIABLES
+from stactools.nclimgrid.manifest import sidecar_href
+from stactools.nclimgrid.rollup import (COUNT_DTYPE, COUNT_KEY,
+                                        RollupAccumulator, RollupUnit,
+                                        cog_href, encode_rollup,
+                                        open_variables, rollup_collection,
+                                        rollup_items, time_chunk_size)
+from stactools.nclimgrid.signing import cache_read_href_modifier
+from stactools.nclimgrid.timeseries import modify_href, nc_href
+from stactools.nclimgrid.utils import (REDUCTION_MEMORY_LIMIT, href_exists,
+                                       open_href)
+
+STATE_FILENAME = "nclimgrid-normals-state-{month:02d}.npz"
+# each encode worker holds a calendar month's running totals and a chunk of
+# time slices, so few run at once by default
+ENCODE_WORKERS = 2
+
+
+class NormalsState:
+    """Sidecar record of the running per-pixel totals (see
+    `rollup.RollupAccumulator`) of a calendar month's values over the years
+    added so far, stored with the normals COGs. Normals are updated by adding
+    the months of new years and subtracting the months of years that leave
+    the normals period, so the rest of the archive is never reread.
+
+    Totals are kept with row 0 at the northern edge of the grid.
+
+    Args:
+        href (str): state file location
+        accumulator (Optional[RollupAccumulator]): optional running totals
+        years (Optional[Set[int]]): years whose month is in the totals
+    """
+
+    def __init__(self,
+                 href: str,
+                 accumulator: Optional[RollupAccumulator] = None,
+                 years: Optional[Set[int]] = None):
+        self.href = href
+        self.accumulator = accumulator or RollupAccumulator()
+        self.years = years or set()
+
+    @classmethod
+    def from_base_cog_href(cls, base_cog_href: str,
+                           month: int) -> "NormalsState":
+        """Reads the state of a calendar month stored at a COG storage
+        location. An empty state is returned if one does not yet exist.
+
+        Args:
+            base_cog_href (str): COG storage location
+            month (int): calendar month
+
+        Returns:
+            NormalsState: the calendar month's normals state
+        """
+        href = sidecar_href(base_cog_href, STATE_FILENAME.format(month=month))
+        if not href_exists(href):
+            return cls(href)
+        accumulator = RollupAccumulator()
+        with open_href(href, "rb") as f:
+            with numpy.load(f) as arrays:
+                years = {int(year) for year in arrays["years"]}
+                if "valid_count" in arrays:
+                    for var in VARIABLES:
+                        accumulator.sums[var] = arrays[f"{var}_sums"]
+                        accumulator.counts[var] = arrays[f"{var}_counts"]
+                    accumulator.valid_count = arrays["valid_count"]
+        return cls(href, accumulator, years)
+
+    def save(self) -> None:
+        """Writes the state to its href."""
+        arrays: Dict[str, Any] = {
+            "years": numpy.array(sorted(self.years), dtype=numpy.int32)
+        }
+        if self.accumulator.valid_count is not None:
+            for var in VARIABLES:
+                arrays[f"{var}_sums"] = self.accumulator.sums[var]
+                arrays[f"{var}_counts"] = self.accumulator.counts[var]
+            arrays["valid_count"] = self.accumulator.valid_count
+        with open_href(self.href, "wb") as f:
+            numpy.savez_compressed(f, **arrays)
+
+    def normals(self) -> Dict[str, numpy.ndarray]:
+        """Computes the normals bands from the running totals: the mean of
+        each variable, NaN where no values are valid, and the number of years
+        in which all variables are valid.
+
+        Returns:
+            Dict[str, numpy.ndarray]: float32 means and the int16 count, keyed
+                by asset key (see `NORMALS_ASSET_TITLE`)
+        """
+        if self.accumulator.valid_count is None:
+            raise ValueError("No years have been added")
+        bands = {
+            f"{var}-normal": mean
+            for var, mean in self.accumulator.means().items()
+        }
+        bands[COUNT_KEY] = self.accumulator.valid_count.astype(COUNT_DTYPE)
+        return bands
+
+
+def month_index(year: int, month: int) -> int:
+    """Finds the 0-based index of a month into the monthly NetCDF timestacks.
+
+    Args:
+        year (int): data year
+        month (int): data month
+
+    Returns:
+        int: months since January 1895
+    """
+    return (year - constants.MONTHLY_START.year) * 12 + month - 1
+
+
+def update_normals(
+        state: NormalsState,
+        month: int,
+        start_year: int,
+        end_year: int,
+        base_nc_href: str,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        memory_limit: int = REDUCTION_MEMORY_LIMIT
+) -> Tuple[List[int], List[int]]:
+    """Updates a calendar month's normals state to cover the years from
+    start_year to end_year that are in the monthly NetCDF archive. Only the
+    months of years that enter or leave the state are read, in chunks of
+    time slices so that memory use stays near memory_limit. Revisions to
+    months already in the state are not picked up; remove the state file to
+    recompute the normals from scratch.
+
+    Args:
+        state (NormalsState): calendar month's normals state, updated in place
+        month (int): calendar month
+        start_year (int): first year of the normals period
+        end_year (int): last year of the normals period
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        memory_limit (int): approximate memory ceiling in bytes
+
+    Returns:
+        Tuple[List[int], List[int]]: years added to and removed from the state
+    """
+    nc_hrefs = {
+        var:
+        modify_href(nc_href(base_nc_href, f"nclimgrid_{var}.nc"),
+                    read_href_modifier)
+        for var in VARIABLES
+    }
+    with ExitStack() as stack:
+        data = open_variables(stack, nc_hrefs)
+        num_months = data[VARIABLES[0]].sizes["time"]
+        lat = data[VARIABLES[0]]["lat"].values
+        years = {
+            year
+            for year in range(start_year, end_year + 1)
+            if 0 <= month_index(year, month) < num_months
+        }
+        added = sorted(years - state.years)
+        removed = sorted(state.years - years)
+
+        chunk_size = time_chunk_size(data, memory_limit)
+        for update_years, subtract in [(removed, True), (added, False)]:
+            for start in range(0, len(update_years), chunk_size):
+                indices = [
+                    month_index(year, month)
+                    for year in update_years[start:start + chunk_size]
+                ]
+                chunks = {
+                    var: values.isel(time=indices).values
+                    for var, values in data.items()
+                }
+                # NetCDF latitudes may be ascending, i.e., row 0 at the
+                # southern edge
+                if lat[0] < lat[-1]:
+                    chunks = {
+                        var: chunk[:, ::-1, :]
+                        for var, chunk in chunks.items()
+                    }
+                state.accumulator.add(chunks, subtract=subtract)
+
+    state.years = years
+    return added, removed
+
+
+def normals_unit(start_year: int, end_year: int, month: int, years: Set[int],
+                 base_cog_href: str) -> RollupUnit:
+    """Creates the work unit for a calendar month's normals.
+
+    Args:
+        start_year (int): first year of the normals period
+        end_year (int): last year of the normals period
+        month (int): calendar month
+        years (Set[int]): years whose month is in the normals
+        base_cog_href (str): COG storage location
+
+    Returns:
+        RollupUnit: pipeline work unit
+    """
+    period = f"{start_year}-{end_year}-{month:02d}"
+    first_year = min(years)
+    last_year = max(years)
+    start = datetime(first_year, month, 1, tzinfo=timezone.utc)
+    end = datetime(last_year,
+                   month,
+                   monthrange(last_year, month)[1],
+                   23,
+                   59,
+                   59,
+                   tzinfo=timezone.utc)
+    return RollupUnit(
+        f"nclimgrid-normals-{period}",
+        start,
+        end, {
+            cog_href(base_cog_href, f"nclimgrid-{key}-{period}.tif"): [key]
+            for key in constants.NORMALS_ASSET_TITLE
+        },
+        titles=constants.NORMALS_ASSET_TITLE)
+
+
+def create_normals_items(
+        base_cog_href: str,
+        base_nc_href: str,
+        start_year: int = constants.NORMALS_START_YEAR,
+        end_year: int = constants.NORMALS_END_YEAR,
+        months: Optional[List[int]] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        workers: Optional[Dict[str, int]] = None) -> List[Item]:
+    """Creates an Item for each calendar month holding the month's normals
+    over a period of years: the mean of each variable and the number of years
+    with valid data for all variables, each stored as a COG.
+
+    The running totals behind each month's normals are stored with the COGs
+    (see `NormalsState`), so re-running as new months are added to the
+    monthly archive, or with a later normals period, reads only the new
+    months and those leaving the period (see `update_normals`). Calendar
+    months with no years in the archive are skipped.
+
+    Args:
+        base_cog_href (str): COG and normals state storage location
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        start_year (int): first year of the normals period
+        end_year (int): last year of the normals period
+        months (Optional[List[int]]): optional calendar months, defaulting to
+            all months
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        workers (Optional[Dict[str, int]]): optional concurrency limits for
+            the "encode", "store", and "assemble" pipeline stages. Calendar
+            months are encoded ENCODE_WORKERS at a time by default.
+
+    Returns:
+        List[Item]: normals Items, sorted by id
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+
+    def encode(month: int,
+               upload_dir: Optional[str] = None) -> List[RollupUnit]:
+        state = NormalsState.from_base_cog_href(base_cog_href, month)
+        update_normals(state,
+                       month,
+                       start_year,
+                       end_year,
+                       base_nc_href,
+                       read_href_modifier=read_href_modifier)
+        state.save()
+        if not state.years:
+            return []
+        unit = normals_unit(start_year, end_year, month, state.years,
+                            base_cog_href)
+        return [encode_rollup(unit, state.normals(), upload_dir)]
+
+    limits = {"encode": ENCODE_WORKERS}
+    limits.update(workers or dict())
+    return rollup_items(months or list(range(1, 13)),
+                        encode,
+                        base_cog_href,
+                        read_href_modifier=read_href_modifier,
+                        workers=limits)
+
+
+def create_normals_collection(
+        base_cog_href: str,
+        base_nc_href: str,
+        start_year: int = constants.NORMALS_START_YEAR,
+        end_year: int = constants.NORMALS_END_YEAR,
+        months: Optional[List[int]] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        workers: Optional[Dict[str, int]] = None) -> Collection:
+    """Creates a Collection of monthly normals over a period of years (see
+    `create_normals_items`).
+
+    Args:
+        base_cog_href (str): COG and normals state storage location
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        start_year (int): first year of the normals period
+        end_year (int): last year of the normals period
+        months (Optional[List[int]]): optional calendar months, defaulting to
+            all months
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        workers (Optional[Dict[str, int]]): optional concurrency limits for
+            the pipeline stages
+
+    Returns:
+        Collection: STAC Collection with a normals Item for each calendar month
+    """
+    items = create_normals_items(base_cog_href,
+                                 base_nc_href,
+                                 start_year=start_year,
+                                 end_year=end_year,
+                                 months=months,
+                                 read_href_modifier=read_href_modifier,
+                                 workers=workers)
+    return rollup_collection(items, constants.NORMALS_COLLECTION_ID,
+                             constants.NORMALS_COLLECTION_TITLE,
+                             constants.NORMALS_COLLECTION_DESCRIPTION)
@@ -0,0 +1,276 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from typing import (Any, Callable, Coroutine, Dict, Iterable, List, Optional,
+                    Tuple)
+
+from stactools.core.io import ReadHrefModifier
+
+from stactools.nclimgrid.errors import CogUploadError, ExistError
+from stactools.nclimgrid.manifest import CogManifest, cog_ncs_if_changed
+from stactools.nclimgrid.memory import MemoryMonitor
+from stactools.nclimgrid.utils import href_exists, upload_cog
+
+# stage name -> default maximum number of concurrent work units
+DEFAULT_WORKERS = {
+    "fetch": 2,
+    "encode": os.cpu_count() or 1,
+    "store": 4,
+    "assemble": 1
+}
+QUEUE_SIZE = 8
+
+_DONE = object()
+
+StageFunction = Callable[[Any], List[Any]]
+
+
+class SharedScratch:
+    """Temporary directory shared by a number of work units, e.g., a month of
+    downloaded NetCDF files shared by the units for each day in the month. The
+    directory is removed once every unit has released it.
+    """
+
+    def __init__(self) -> None:
+        self._temp_dir = TemporaryDirectory()
+        self._lock = threading.Lock()
+        self._count = 0
+        self.name = self._temp_dir.name
+
+    def retain(self, count: int) -> None:
+        """Registers units that must release the directory before it is
+        removed. The directory is removed immediately if count is zero.
+
+        Args:
+            count (int): number of units
+        """
+        with self._lock:
+            self._count += count
+        if count == 0:
+            self.release(0)
+
+    def release(self, count: int = 1) -> None:
+        """Releases the directory for a number of units.
+
+        Args:
+            count (int): number of units
+        """
+        with self._lock:
+            self._count -= count
+            if self._count <= 0:
+                self._temp_dir.cleanup()
+
+
+def run_pipeline(units: Iterable[Any],
+                 stages: List[Tuple[str, StageFunction]],
+                 workers: Optional[Dict[str, int]] = None,
+                 queue_size: int = QUEUE_SIZE,
+                 monitor: Optional[MemoryMonitor] = None) -> List[Any]:
+    """Runs units of work through a sequence of stages. Each stage runs
+    concurrently with the others, with bounded queues between stages, so that,
+    e.g., network-bound downloads and uploads overlap CPU-bound COG encoding.
+
+    Each stage function takes a single unit and returns a list of zero or more
+    units for the next stage. Stage functions are run in a thread pool sized to
+    the stage's concurrency limit.
+
+    Args:
+        units (Iterable[Any]): units of work for the first stage
+        stages (List[Tuple[str, StageFunction]]): stage names and functions
+        workers (Optional[Dict[str, int]]): maximum number of concurrent units
+            for each stage name, overriding DEFAULT_WORKERS
+        queue_size (int): maximum number of units waiting between stages
+        monitor (Optional[MemoryMonitor]): optional monitor in which to record
+            the peak memory use of each stage
+
+    Returns:
+        List[Any]: the units returned by the final stage, in completion order
+    """
+    limits = dict(DEFAULT_WORKERS)
+    if workers:
+        limits.update(workers)
+    if monitor:
+        stages = [(name, monitor.wrap(name, function))
+                  for name, function in stages]
+    return asyncio.run(_run_pipeline(units, stages, limits, queue_size))
+
+
+async def _run_pipeline(units: Iterable[Any],
+                        stages: List[Tuple[str, StageFunction]],
+                        limits: Dict[str, int], queue_size: int) -> List[Any]:
+    queues: List[asyncio.Queue] = [
+        asyncio.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)
+    ]
+    # the final queue collects results and is not bounded
+    queues[-1] = asyncio.Queue()
+
+    async def feed() -> None:
+        for unit in units:
+            await queues[0].put(unit)
+        await queues[0].put(_DONE)
+
+    coroutines = [feed()]
+    for i, (name, function) in enumerate(stages):
+        num_workers = limits.get(name, 1)
+        coroutines.append(
+            _run_stage(function, queues[i], queues[i + 1], num_workers))
+    await _gather_or_cancel(coroutines)
+
+    results = []
+    while True:
+        result = queues[-1].get_nowait()
+        if result is _DONE:
+            break
+        results.append(result)
+    return results
+
+
+async def _run_stage(function: StageFunction, inbox: asyncio.Queue,
+                     outbox: asyncio.Queue, num_workers: int) -> None:
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=num_workers)
+
+    async def worker() -> None:
+        while True:
+            unit = await inbox.get()
+            if unit is _DONE:
+                # let the stage's other workers see the end of input
+                await inbox.put(_DONE)
+                return
+            for result in await loop.run_in_executor(executor, function, unit):
+                await outbox.put(result)
+
+    try:
+        await _gather_or_cancel([worker() for _ in range(num_workers)])
+    finally:
+        # after a failure, units not yet started are cancelled, and units
+        # already running are waited for without blocking the event loop, so
+        # none still write to manifests or scratch directories once the
+        # pipeline has returned
+        executor.shutdown(wait=False, cancel_futures=True)
+        await loop.run_in_executor(None, executor.shutdown)
+    await outbox.put(_DONE)
+
+
+async def _gather_or_cancel(
+        coroutines: List[Coroutine[Any, Any, None]]) -> None:
+    """Runs coroutines concurrently. As soon as one raises an exception, the
+    others are cancelled and the exception is raised.
+
+    Args:
+        coroutines (List[Coroutine[Any, Any, None]]): coroutines to run
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class ItemUnit:
+    """A unit of pipeline work: the COG Assets for a single Item.
+
+    Args:
+        key (Tuple[int, ...]): Item identifier, e.g., (year, month, day)
+        cog_hrefs (Dict[str, List[str]]): COG storage location of each COG,
+            with the variables stored in its bands
+        nc_local_paths (Optional[Dict[str, str]]): optional dictionary of local
+            paths to each variable for creating COGs
+        nc_index (int): 1-based index into the NetCDF timestacks
+        scratch (Optional[SharedScratch]): optional scratch directory holding
+            the NetCDF files, released once the COGs are created
+    """
+
+    def __init__(self,
+                 key: Tuple[int, ...],
+                 cog_hrefs: Dict[str, List[str]],
+                 nc_local_paths: Optional[Dict[str, str]] = None,
+                 nc_index: int = 1,
+                 scratch: Optional[SharedScratch] = None):
+        self.key = key
+        self.cog_hrefs = cog_hrefs
+        self.nc_local_paths = nc_local_paths
+        self.nc_index = nc_index
+        self.scratch = scratch
+        # local COG paths awaiting upload, keyed by COG storage location
+        self.uploads: Dict[str, str] = dict()
+        # band statistics of created COGs, keyed by variable
+        self.statistics: Dict[str, Dict[str, float]] = dict()
+
+
+def encode_cogs(unit: ItemUnit,
+                manifest: Optional[CogManifest] = None,
+                upload_dir: Optional[str] = None,
+                quantized: bool = False) -> List[ItemUnit]:
+    """Pipeline stage that creates the COGs for an Item, if cogging.
+
+    Args:
+        unit (ItemUnit): pipeline work unit
+        manifest (Optional[CogManifest]): optional manifest used to skip
+            creating COGs whose source data is unchanged
+        upload_dir (Optional[str]): optional local directory in which to create
+            COGs for upload to remote storage
+        quantized (bool): option to create int16 COGs (see `utils.quantize`)
+            rather than float32 COGs
+
+    Returns:
+        List[ItemUnit]: the work unit
+    """
+    try:
+        if unit.nc_local_paths:
+            for cog_href, variables in unit.cog_hrefs.items():
+                cog_path = cog_href
+                if upload_dir:
+                    cog_path = os.path.join(upload_dir,
+                                            os.path.basename(cog_href))
+                created, statistics = cog_ncs_if_changed(unit.nc_local_paths,
+                                                         cog_href,
+                                                         variables,
+                                                         unit.nc_index,
+                                                         manifest=manifest,
+                                                         cog_path=cog_path,
+                                                         quantized=quantized)
+                unit.statistics.update(statistics)
+                if created and upload_dir:
+                    unit.uploads[cog_href] = cog_path
+    finally:
+        if unit.scratch:
+            unit.scratch.release()
+    return [unit]
+
+
+def store_cogs(
+        unit: ItemUnit,
+        read_href_modifier: Optional[ReadHrefModifier] = None
+) -> List[ItemUnit]:
+    """Pipeline stage that uploads newly created COGs to remote storage and
+    checks that all other COGs exist.
+
+    Args:
+        unit (ItemUnit): pipeline work unit
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+
+    Returns:
+        List[ItemUnit]: the work unit
+    """
+    for cog_href in unit.cog_hrefs:
+        if cog_href in unit.uploads:
+            cog_path = unit.uploads[cog_href]
+            try:
+                upload_cog(cog_path, cog_href)
+                os.remove(cog_path)
+            except Exception as e:
+                raise CogUploadError(
+                    f"Failed to upload '{cog_path}' to '{cog_href}'.") from e
+        else:
+            cog_href_mod = cog_href
+            if read_href_modifier:
+                cog_href_mod = read_href_modifier(cog_href)
+            if not href_exists(cog_href_mod):
+                raise ExistError(f"'{cog_href}' does not exist.")
+    return [unit]
@@ -0,0 +1,793 @@
+import os
+from calendar import monthrange
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from functools import partial
+from posixpath import join as urljoin
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import numpy
+import xarray
+from pystac import Asset, Collection, Extent, Item, MediaType
+from pystac.extensions.item_assets import ItemAssetsExtension
+from pystac.extensions.projection import ProjectionExtension
+from pystac.extensions.raster import (DataType, NoDataStrings, RasterBand,
+                                      RasterExtension, Statistics)
+from stactools.core.io import ReadHrefModifier
+
+from stactools.nclimgrid import constants
+from stactools.nclimgrid.constants import (ANNUAL, NODATA, ROLLUP_VARIABLES,
+                                           SEASONS, VARIABLES, Status)
+from stactools.nclimgrid.daily_stac import daily_nc_href
+from stactools.nclimgrid.errors import CogCreationError
+from stactools.nclimgrid.pipeline import (ItemUnit, StageFunction,
+                                          run_pipeline, store_cogs)
+from stactools.nclimgrid.signing import cache_read_href_modifier
+from stactools.nclimgrid.timeseries import modify_href, nc_href
+from stactools.nclimgrid.utils import (REDUCTION_MEMORY_LIMIT,
+                                       REDUCTION_OVERHEAD, band_statistics,
+                                       cog_array, generate_years_months,
+                                       item_asset_definitions, open_nc)
+
+PERIODS = list(SEASONS) + [ANNUAL]
+# number of valid time slices is stored as int16, with no nodata value
+COUNT_KEY = "valid-count"
+COUNT_DTYPE = "int16"
+
+
+class RollupAccumulator:
+    """Running per-pixel sums and counts of valid values of each variable,
+    updated one chunk of time slices at a time so that a rollup over any
+    number of time slices holds only a chunk and the running totals in memory.
+    NaN and nodata (-999) values are excluded.
+    """
+
+    def __init__(self) -> None:
+        self.sums: Dict[str, numpy.ndarray] = dict()
+        self.counts: Dict[str, numpy.ndarray] = dict()
+        self.valid_count: Optional[numpy.ndarray] = None
+
+    def add(self,
+            chunks: Dict[str, numpy.ndarray],
+            subtract: bool = False) -> None:
+        """Adds a chunk of time slices of each variable to the running totals.
+
+        Args:
+            chunks (Dict[str, numpy.ndarray]): 3D arrays with dimensions (time,
+                row, column) keyed by variable, all with the same shape
+            subtract (bool): option to remove previously added time slices
+                from the running totals instead, e.g., when a window of time
+                slices moves forward
+        """
+        sign = -1 if subtract else 1
+        all_valid = None
+        for var, chunk in chunks.items():
+            valid = numpy.isfinite(chunk) & (chunk != NODATA)
+            sums = sign * numpy.where(valid, chunk, 0).sum(axis=0,
+                                                           dtype=numpy.float64)
+            counts = sign * valid.sum(axis=0, dtype=numpy.int32)
+            if var in self.sums:
+                self.sums[var] += sums
+                self.counts[var] += counts
+            else:
+                self.sums[var] = sums
+                self.counts[var] = counts
+            all_valid = valid if all_valid is None else all_valid & valid
+        if all_valid is not None:
+            valid_count = sign * all_valid.sum(axis=0, dtype=numpy.int32)
+            if self.valid_count is None:
+                self.valid_count = valid_count
+            else:
+                self.valid_count += valid_count
+
+    def means(self) -> Dict[str, numpy.ndarray]:
+        """Computes the mean of each variable from the running totals, NaN
+        where no values are valid.
+
+        Returns:
+            Dict[str, numpy.ndarray]: float32 means keyed by variable
+        """
+        means = dict()
+        for var, sums in self.sums.items():
+            counts = self.counts[var]
+            with numpy.errstate(invalid="ignore", divide="ignore"):
+                means[var] = numpy.where(counts > 0, sums / counts,
+                                         numpy.nan).astype(numpy.float32)
+        return means
+
+    def rollup(self) -> Dict[str, numpy.ndarray]:
+        """Computes the rollup bands from the running totals: the total
+        precipitation, the mean of each temperature, and the number of time
+        slices in which all variables are valid. Totals and means are NaN
+        where no values are valid.
+
+        Returns:
+            Dict[str, numpy.ndarray]: float32 totals and means and the int16
+                count, keyed by asset key (see `ROLLUP_VARIABLES`)
+        """
+        if self.valid_count is None:
+            raise ValueError("No time slices have been added")
+        means = self.means()
+        bands = dict()
+        for key, var in ROLLUP_VARIABLES.items():
+            if var is None:
+                bands[key] = self.valid_count.astype(COUNT_DTYPE)
+            elif key.endswith("-total"):
+                bands[key] = numpy.where(self.counts[var] > 0, self.sums[var],
+                                         numpy.nan).astype(numpy.float32)
+            else:
+                bands[key] = means[var]
+        return bands
+
+
+def time_chunk_size(data: Dict[str, xarray.DataArray],
+                    memory_limit: int) -> int:
+    """Finds the number of time slices of every variable that can be reduced
+    together within a memory ceiling (see `utils.nc_time_chunks`).
+
+    Args:
+        data (Dict[str, xarray.DataArray]): lazily loaded NetCDF variables
+            with dimensions (time, lat, lon), keyed by variable
+        memory_limit (int): approximate memory ceiling in bytes
+
+    Returns:
+        int: number of time slices, at least one
+    """
+    slice_bytes = sum(values.sizes["lat"] * values.sizes["lon"] *
+                      values.dtype.itemsize * REDUCTION_OVERHEAD
+                      for values in data.values())
+    return max(1, memory_limit // slice_bytes)
+
+
+def north_up(bands: Dict[str, numpy.ndarray],
+             lat: numpy.ndarray) -> Dict[str, numpy.ndarray]:
+    """Flips rollup bands so that row 0 is at the northern edge of the grid.
+
+    Args:
+        bands (Dict[str, numpy.ndarray]): 2D bands in NetCDF row order
+        lat (numpy.ndarray): NetCDF latitudes
+
+    Returns:
+        Dict[str, numpy.ndarray]: 2D bands with row 0 at the northern edge
+    """
+    if lat[0] < lat[-1]:
+        return {
+            key: numpy.ascontiguousarray(band[::-1, :])
+            for key, band in bands.items()
+        }
+    return bands
+
+
+def open_variables(stack: ExitStack,
+                   nc_hrefs: Dict[str, str]) -> Dict[str, xarray.DataArray]:
+    """Opens the NetCDF holding each variable, opening a NetCDF that holds
+    several variables only once.
+
+    Args:
+        stack (ExitStack): stack that closes the NetCDFs
+        nc_hrefs (Dict[str, str]): NetCDF location of each variable
+
+    Returns:
+        Dict[str, xarray.DataArray]: lazily loaded variables
+    """
+    datasets: Dict[str, xarray.Dataset] = dict()
+    data = dict()
+    for var, href in nc_hrefs.items():
+        if href not in datasets:
+            datasets[href] = stack.enter_context(open_nc(href))
+        data[var] = datasets[href][var]
+    return data
+
+
+def daily_rollup(
+        year: int,
+        month: int,
+        status: Status,
+        base_nc_href: str,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        memory_limit: int = REDUCTION_MEMORY_LIMIT
+) -> Dict[str, numpy.ndarray]:
+    """Rolls up a month of daily NetCDF data in a single pass over each
+    variable, reading chunks of days so that memory use stays near
+    memory_limit however many days the month holds. Remote NetCDFs are read
+    with range requests (see `utils.open_nc`), not downloaded.
+
+    Args:
+        year (int): data year
+        month (int): data month
+        status (Status): enumeration specifying whether final or preliminary
+            data
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        memory_limit (int): approximate memory ceiling in bytes
+
+    Returns:
+        Dict[str, numpy.ndarray]: rollup bands keyed by asset key (see
+            `RollupAccumulator.rollup`), with row 0 at the northern edge
+    """
+    nc_hrefs = {
+        var:
+        modify_href(
+            nc_href(base_nc_href, daily_nc_href(year, month, status, var)),
+            read_href_modifier)
+        for var in VARIABLES
+    }
+    with ExitStack() as stack:
+        data = open_variables(stack, nc_hrefs)
+        accumulator = RollupAccumulator()
+        chunk_size = time_chunk_size(data, memory_limit)
+        # "prelim" NetCDFs from different updates may hold different numbers
+        # of days, so only the days held by all of them are rolled up
+        num_days = min(values.sizes["time"] for values in data.values())
+        for start in range(0, num_days, chunk_size):
+            days = slice(start, min(start + chunk_size, num_days))
+            accumulator.add({
+                var: values.isel(time=days).values
+                for var, values in data.items()
+            })
+        return north_up(accumulator.rollup(), data[VARIABLES[0]]["lat"].values)
+
+
+def period_months(year: int, period: str) -> Tuple[int, int]:
+    """Finds the range of 0-based indices into the monthly NetCDF timestacks
+    (months since January 1895) covered by a season or year.
+
+    Args:
+        year (int): data year. Winter ("djf") starts in December of the
+            previous year.
+        period (str): season ("djf", "mam", "jja", or "son") or "annual"
+
+    Returns:
+        Tuple[int, int]: start (inclusive) and end (exclusive) month indices
+    """
+    start = (year - constants.MONTHLY_START.year) * 12
+    if period == ANNUAL:
+        return start, start + 12
+    first_month = SEASONS[period][0]
+    if first_month == 12:
+        return start - 1, start + 2
+    return start + first_month - 1, start + first_month + 2
+
+
+def seasonal_rollups(
+    year: int,
+    base_nc_href: str,
+    periods: List[str],
+    read_href_modifier: Optional[ReadHrefModifier] = None,
+    memory_limit: int = REDUCTION_MEMORY_LIMIT
+) -> Dict[str, Dict[str, numpy.ndarray]]:
+    """Rolls up the seasons and/or the whole of a year from the monthly NetCDF
+    archive in a single pass over the months from December of the previous
+    year to December of the year, adding each chunk of months to every period
+    it overlaps. Months outside the archive are skipped, so the valid-count
+    band gives the number of months that contributed to each pixel.
+
+    Args:
+        year (int): data year
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        periods (List[str]): seasons ("djf", "mam", "jja", or "son") and/or
+            "annual"
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        memory_limit (int): approximate memory ceiling in bytes
+
+    Returns:
+        Dict[str, Dict[str, numpy.ndarray]]: rollup bands keyed by asset key
+            (see `RollupAccumulator.rollup`), with row 0 at the northern edge,
+            keyed by period. Periods with no months in the archive are
+            omitted.
+    """
+    nc_hrefs = {
+        var:
+        modify_href(nc_href(base_nc_href, f"nclimgrid_{var}.nc"),
+                    read_href_modifier)
+        for var in VARIABLES
+    }
+    ranges = {period: period_months(year, period) for period in periods}
+    accumulators = {period: RollupAccumulator() for period in periods}
+    with ExitStack() as stack:
+        data = open_variables(stack, nc_hrefs)
+        num_months = data[VARIABLES[0]].sizes["time"]
+        first = max(0, min(start for start, _ in ranges.values()))
+        last = min(num_months, max(end for _, end in ranges.values()))
+        chunk_size = time_chunk_size(data, memory_limit)
+        for start in range(first, last, chunk_size):
+            stop = min(start + chunk_size, last)
+            chunks = {
+                var: values.isel(time=slice(start, stop)).values
+                for var, values in data.items()
+            }
+            for period, (period_start, period_end) in ranges.items():
+                overlap = slice(
+                    max(period_start, start) - start,
+                    min(period_end, stop) - start)
+                if overlap.start < overlap.stop:
+                    accumulators[period].add({
+                        var: chunk[overlap]
+                        for var, chunk in chunks.items()
+                    })
+        lat = data[VARIABLES[0]]["lat"].values
+
+    return {
+        period: north_up(accumulator.rollup(), lat)
+        for period, accumulator in accumulators.items()
+        if accumulator.valid_count is not None
+    }
+
+
+def month_from_index(index: int) -> Tuple[int, int]:
+    """Finds the year and month of a 0-based index into the monthly NetCDF
+    timestacks (see `period_months`).
+
+    Args:
+        index (int): months since January 1895
+
+    Returns:
+        Tuple[int, int]: year and month
+    """
+    years, month_index = divmod(index, 12)
+    return constants.MONTHLY_START.year + years, month_index + 1
+
+
+class RollupUnit(ItemUnit):
+    """A unit of pipeline work: the COG Assets for a single rollup Item. Each
+    COG holds a single rollup band, named by its asset key.
+
+    Args:
+        item_id (str): Item id
+        start (datetime): first day of the rollup period
+        end (datetime): last day of the rollup period
+        cog_hrefs (Dict[str, List[str]]): COG storage location of each COG,
+            with the asset key of the band it stores
+        titles (Optional[Dict[str, str]]): optional Asset title of each asset
+            key, defaulting to `ROLLUP_ASSET_TITLE`
+    """
+
+    def __init__(self,
+                 item_id: str,
+                 start: datetime,
+                 end: datetime,
+                 cog_hrefs: Dict[str, List[str]],
+                 titles: Optional[Dict[str, str]] = None):
+        super().__init__((start.year, start.month), cog_hrefs)
+        self.item_id = item_id
+        self.start = start
+        self.end = end
+        self.titles = titles or constants.ROLLUP_ASSET_TITLE
+
+
+def cog_href(base_cog_href: str, cog_filename: str) -> str:
+    """Joins a COG filename to a local or remote COG storage location.
+
+    Args:
+        base_cog_href (str): COG storage location
+        cog_filename (str): COG filename
+
+    Returns:
+        str: the COG href
+    """
+    if urlparse(base_cog_href).scheme:
+        return urljoin(base_cog_href, cog_filename)
+    return os.path.join(base_cog_href, cog_filename)
+
+
+def daily_rollup_unit(year: int, month: int, status: Status,
+                      base_cog_href: str) -> RollupUnit:
+    """Creates the work unit for a month's rollup of daily data.
+
+    Args:
+        year (int): data year
+        month (int): data month
+        status (Status): enumeration specifying whether final or preliminary
+            data
+        base_cog_href (str): COG storage location
+
+    Returns:
+        RollupUnit: pipeline work unit
+    """
+    item_id = f"{year}{month:02d}-grd-{status.value}-monthly"
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year,
+                   month,
+                   monthrange(year, month)[1],
+                   23,
+                   59,
+                   59,
+                   tzinfo=timezone.utc)
+    return RollupUnit(
+        item_id, start, end, {
+            cog_href(base_cog_href, f"{key}-{item_id}.tif"): [key]
+            for key in ROLLUP_VARIABLES
+        })
+
+
+def seasonal_rollup_unit(year: int, period: str,
+                         base_cog_href: str) -> RollupUnit:
+    """Creates the work unit for a season's or year's rollup of monthly data.
+
+    Args:
+        year (int): data year
+        period (str): season ("djf", "mam", "jja", or "son") or "annual"
+        base_cog_href (str): COG storage location
+
+    Returns:
+        RollupUnit: pipeline work unit
+    """
+    item_id = f"nclimgrid-{year}-{period}"
+    start_index, end_index = period_months(year, period)
+    start_year, start_month = month_from_index(start_index)
+    end_year, end_month = month_from_index(end_index - 1)
+    start = datetime(start_year, start_month, 1, tzinfo=timezone.utc)
+    end = datetime(end_year,
+                   end_month,
+                   monthrange(end_year, end_month)[1],
+                   23,
+                   59,
+                   59,
+                   tzinfo=timezone.utc)
+    return RollupUnit(
+        item_id, start, end, {
+            cog_href(base_cog_href, f"nclimgrid-{key}-{year}-{period}.tif"):
+            [key]
+            for key in ROLLUP_VARIABLES
+        })
+
+
+def encode_rollup(unit: RollupUnit,
+                  bands: Dict[str, numpy.ndarray],
+                  upload_dir: Optional[str] = None) -> RollupUnit:
+    """Creates the COGs for a rollup Item and records their band statistics.
+
+    Args:
+        unit (RollupUnit): pipeline work unit
+        bands (Dict[str, numpy.ndarray]): rollup bands keyed by asset key
+        upload_dir (Optional[str]): optional local directory in which to create
+            COGs for upload to remote storage
+
+    Returns:
+        RollupUnit: the work unit
+    """
+    for href, (key, ) in unit.cog_hrefs.items():
+        cog_path = href
+        if upload_dir:
+            cog_path = os.path.join(upload_dir, os.path.basename(href))
+        if cog_array(bands[key], cog_path, key):
+            raise CogCreationError(f"Failed to create '{href}'.")
+        unit.statistics[key] = band_statistics(bands[key])
+        if upload_dir:
+            unit.uploads[href] = cog_path
+    return unit
+
+
+def create_rollup_asset(
+        cog_href: str,
+        key: str,
+        title: str,
+        statistics: Optional[Dict[str, float]] = None) -> Tuple[str, Asset]:
+    """Creates a rollup COG Asset. The valid count band is int16; other bands
+    are float32 with NaN nodata.
+
+    Args:
+        cog_href (str): COG location
+        key (str): rollup asset key (see `ROLLUP_VARIABLES`)
+        title (str): Asset title
+        statistics (Optional[Dict[str, float]]): optional band statistics (see
+            `utils.band_statistics`)
+
+    Returns:
+        str: Asset key
+        Asset: STAC Asset
+    """
+    asset = Asset(href=cog_href,
+                  media_type=MediaType.COG,
+                  roles=["data"],
+                  title=title)
+    band = RasterBand.create()
+    if key == COUNT_KEY:
+        band.data_type = DataType(COUNT_DTYPE)
+    else:
+        band.data_type = DataType.FLOAT32
+        band.nodata = NoDataStrings.NAN
+    if statistics:
+        band.statistics = Statistics.create(**statistics)
+    RasterExtension.ext(asset).bands = [band]
+    return key, asset
+
+
+def assemble_rollup(unit: RollupUnit) -> List[Item]:
+    """Pipeline stage that creates a rollup Item from its stored COGs.
+
+    Args:
+        unit (RollupUnit): pipeline work unit
+
+    Returns:
+        List[Item]: the rollup Item
+    """
+    item = Item(id=unit.item_id,
+                properties={
+                    "start_datetime":
+                    unit.start.isoformat().replace("+00:00", "Z"),
+                    "end_datetime":
+                    unit.end.isoformat().replace("+00:00", "Z"),
+                },
+                geometry=constants.WGS84_GEOMETRY,
+                bbox=constants.WGS84_BBOX,
+                datetime=None,
+                stac_extensions=[])
+
+    projection = ProjectionExtension.ext(item, add_if_missing=True)
+    projection.epsg = constants.EPSG
+    projection.shape = constants.SHAPE
+    projection.transform = constants.TRANSFORM
+
+    RasterExtension.add_to(item)
+    for href, (key, ) in unit.cog_hrefs.items():
+        asset_key, asset = create_rollup_asset(href, key, unit.titles[key],
+                                               unit.statistics.get(key))
+        item.assets[asset_key] = asset
+    item.validate()
+    return [item]
+
+
+def rollup_items(units: List[Any],
+                 encode: Callable[..., List[RollupUnit]],
+                 base_cog_href: str,
+                 read_href_modifier: Optional[ReadHrefModifier] = None,
+                 workers: Optional[Dict[str, int]] = None) -> List[Item]:
+    """Runs rollup work through the "encode", "store", and "assemble" pipeline
+    stages (see `pipeline.run_pipeline`).
+
+    Args:
+        units (List[Any]): rollup periods to encode, e.g., years
+        encode (Callable[..., List[RollupUnit]]): stage function that reduces a period and
+            returns its RollupUnits, taking an upload_dir keyword argument
+        base_cog_href (str): COG storage location
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        workers (Optional[Dict[str, int]]): optional concurrency limits for the
+            pipeline stages
+
+    Returns:
+        List[Item]: rollup Items, sorted by id
+    """
+    with TemporaryDirectory() as temp_dir:
+        # if COG storage is remote, upload COGs from a temporary directory
+        upload_dir = None
+        if urlparse(base_cog_href).scheme:
+            upload_dir = temp_dir
+        stages: List[Tuple[str, StageFunction]] = [
+            ("encode", partial(encode, upload_dir=upload_dir)),
+            ("store", partial(store_cogs,
+                              read_href_modifier=read_href_modifier)),
+            ("assemble", assemble_rollup),
+        ]
+        items = run_pipeline(units, stages, workers=workers)
+    return sorted(items, key=lambda item: item.id)
+
+
+def create_daily_rollup_items(
+        start_yyyymm: str,
+        end_yyyymm: str,
+        scaled_or_prelim: Union[str, Status],
+        base_cog_href: str,
+        base_nc_href: str,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        workers: Optional[Dict[str, int]] = None) -> List[Item]:
+    """Creates an Item for each month in a month range holding monthly rollups
+    of the daily data: total precipitation, mean average, maximum, and
+    minimum temperatures, and the number of days with valid data for all
+    variables, each stored as a COG. Each month's daily NetCDFs are read once,
+    in chunks of days (see `daily_rollup`), and months are rolled up
+    concurrently.
+
+    Args:
+        start_yyyymm (str): start month in YYYYMM format
+        end_yyyymm (str): end month in YYYYMM format
+        scaled_or_prelim (Union[str, Status]): either a string ("scaled" or
+            "prelim") or enumeration specifying whether to roll up final or
+            preliminary data
+        base_cog_href (str): COG storage location
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        workers (Optional[Dict[str, int]]): optional concurrency limits for
+            the "encode", "store", and "assemble" pipeline stages
+
+    Returns:
+        List[Item]: monthly rollup Items, sorted by id
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    status = Status(scaled_or_prelim)
+
+    def encode(year_month: Tuple[int, int],
+               upload_dir: Optional[str] = None) -> List[RollupUnit]:
+        year, month = year_month
+        bands = daily_rollup(year,
+                             month,
+                             status,
+                             base_nc_href,
+                             read_href_modifier=read_href_modifier)
+        unit = daily_rollup_unit(year, month, status, base_cog_href)
+        return [encode_rollup(unit, bands, upload_dir)]
+
+    years_months = [
+        (year, month)
+        for year, month in generate_years_months(start_yyyymm, end_yyyymm)
+    ]
+    return rollup_items(years_months,
+                        encode,
+                        base_cog_href,
+                        read_href_modifier=read_href_modifier,
+                        workers=workers)
+
+
+def create_seasonal_rollup_items(
+        start_year: int,
+        end_year: int,
+        base_cog_href: str,
+        base_nc_href: str,
+        periods: Optional[List[str]] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        workers: Optional[Dict[str, int]] = None) -> List[Item]:
+    """Creates an Item for each season and/or year in a year range holding
+    rollups of the monthly data: total precipitation, mean average, maximum,
+    and minimum temperatures, and the number of months with valid data for
+    all variables, each stored as a COG. Each year's months are read once
+    for all of its periods (see `seasonal_rollups`), and years are rolled up
+    concurrently. Winter ("djf") Items span December of the previous year to
+    February.
+
+    Args:
+        start_year (int): first year
+        end_year (int): last year
+        base_cog_href (str): COG storage location
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        periods (Optional[List[str]]): seasons ("djf", "mam", "jja", or "son")
+            and/or "annual", defaulting to all seasons and "annual"
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        workers (Optional[Dict[str, int]]): optional concurrency limits for
+            the "encode", "store", and "assemble" pipeline stages
+
+    Returns:
+        List[Item]: seasonal and annual rollup Items, sorted by id
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    selected_periods = periods or PERIODS
+
+    def encode(year: int,
+               upload_dir: Optional[str] = None) -> List[RollupUnit]:
+        period_bands = seasonal_rollups(year,
+                                        base_nc_href,
+                                        selected_periods,
+                                        read_href_modifier=read_href_modifier)
+        return [
+            encode_rollup(seasonal_rollup_unit(year, period, base_cog_href),
+                          bands, upload_dir)
+            for period, bands in period_bands.items()
+        ]
+
+    return rollup_items(list(range(start_year, end_year + 1)),
+                        encode,
+                        base_cog_href,
+                        read_href_modifier=read_href_modifier,
+                        workers=workers)
+
+
+def create_daily_rollup_collection(
+        start_yyyymm: str,
+        end_yyyymm: str,
+        scaled_or_prelim: Union[str, Status],
+        base_cog_href: str,
+        base_nc_href: str,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        workers: Optional[Dict[str, int]] = None) -> Collection:
+    """Creates a Collection of monthly rollups of daily data for all months in
+    the range from start_yyyymm to end_yyyymm (see
+    `create_daily_rollup_items`).
+
+    Args:
+        start_yyyymm (str): start month in YYYYMM format
+        end_yyyymm (str): end month in YYYYMM format
+        scaled_or_prelim (Union[str, Status]): either a string ("scaled" or
+            "prelim") or enumeration specifying whether to roll up final or
+            preliminary data
+        base_cog_href (str): COG storage location
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        workers (Optional[Dict[str, int]]): optional concurrency limits for
+            the pipeline stages
+
+    Returns:
+        Collection: STAC Collection with a rollup Item for each month
+    """
+    items = create_daily_rollup_items(start_yyyymm,
+                                      end_yyyymm,
+                                      scaled_or_prelim,
+                                      base_cog_href,
+                                      base_nc_href,
+                                      read_href_modifier=read_href_modifier,
+                                      workers=workers)
+    return rollup_collection(items, constants.MONTHLY_ROLLUP_COLLECTION_ID,
+                             constants.MONTHLY_ROLLUP_COLLECTION_TITLE,
+                             constants.MONTHLY_ROLLUP_COLLECTION_DESCRIPTION)
+
+
+def create_seasonal_rollup_collection(
+        start_year: int,
+        end_year: int,
+        base_cog_href: str,
+        base_nc_href: str,
+        periods: Optional[List[str]] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        workers: Optional[Dict[str, int]] = None) -> Collection:
+    """Creates a Collection of seasonal and/or annual rollups of monthly data
+    for all years in the range from start_year to end_year (see
+    `create_seasonal_rollup_items`).
+
+    Args:
+        start_year (int): first year
+        end_year (int): last year
+        base_cog_href (str): COG storage location
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        periods (Optional[List[str]]): seasons ("djf", "mam", "jja", or "son")
+            and/or "annual", defaulting to all seasons and "annual"
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        workers (Optional[Dict[str, int]]): optional concurrency limits for
+            the pipeline stages
+
+    Returns:
+        Collection: STAC Collection with a rollup Item for each period
+    """
+    items = create_seasonal_rollup_items(start_year,
+                                         end_year,
+                                         base_cog_href,
+                                         base_nc_href,
+                                         periods=periods,
+                                         read_href_modifier=read_href_modifier,
+                                         workers=workers)
+    return rollup_collection(items, constants.SEASONAL_ROLLUP_COLLECTION_ID,
+                             constants.SEASONAL_ROLLUP_COLLECTION_TITLE,
+                             constants.SEASONAL_ROLLUP_COLLECTION_DESCRIPTION)
+
+
+def rollup_collection(items: List[Item], collection_id: str, title: str,
+                      description: str) -> Collection:
+    """Creates a rollup Collection containing the supplied Items.
+
+    Args:
+        items (List[Item]): rollup Items
+        collection_id (str): Collection id
+        title (str): Collection title
+        description (str): Collection description
+
+    Returns:
+        Collection: STAC Collection with the Items
+    """
+    extent = Extent.from_items(items)
+
+    collection = Collection(
+        id=collection_id,
+        title=title,
+        description=description,
+        license=constants.LICENSE,
+        extent=extent,
+        providers=constants.PROVIDERS,
+    )
+    collection.add_items(items)
+
+    item_assets_ext = ItemAssetsExtension.ext(collection, add_if_missing=True)
+    item_assets_ext.item_assets = item_asset_definitions(items[0])
+
+    collection_projection = ProjectionExtension.summaries(collection,
+                                                          add_if_missing=True)
+    collection_projection.epsg = [constants.EPSG]
+
+    collection.add_link(constants.LICENSE_LINK)
+
+    return collection
@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from pystac import Collection, Item, StacIO
+from pystac.utils import make_relative_href
+
+from stactools.nclimgrid.merge import (COLLECTION_FILENAME, item_dest,
+                                       merged_collection_dict, save_item_dict)
+
+MAX_WORKERS = 8
+
+
+def save_collection(collection: Collection,
+                    destination: str,
+                    max_workers: int = MAX_WORKERS) -> None:
+    """Saves a Collection and its Items in the self-contained layout produced
+    by `normalize_hrefs` and `save` with CatalogType.SELF_CONTAINED, i.e.,
+    "collection.json" and "<id>/<id>.json" for each Item, with identical file
+    contents.
+
+    All hrefs are computed in a single pass rather than by walking the
+    catalog, and Item JSON is serialized and written in a thread pool with
+    the default StacIO serializer (orjson, if installed). The Collection and
+    Item objects are not modified.
+
+    Args:
+        collection (Collection): Collection to save
+        destination (str): directory in which to save the Collection
+        max_workers (int): maximum number of Items written concurrently
+    """
+    collection_dest = os.path.join(destination, COLLECTION_FILENAME)
+    items: List[Item] = list(collection.get_items())
+    item_dests = [item_dest(destination, item.id) for item in items]
+    collection_dict = collection.to_dict(include_self_link=False,
+                                         transform_hrefs=False)
+
+    def save_item(item: Item, dest: str) -> None:
+        save_item_dict(
+            item.to_dict(include_self_link=False, transform_hrefs=False),
+            collection_dict, item.get_self_href(), dest, collection_dest)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # list() re-raises the first exception from the workers
+        list(executor.map(save_item, items, item_dests))
+
+    # keep pystac's Item link fields, e.g., media type, in Item order
+    item_links = [
+        link for link in collection_dict["links"] if link["rel"] == "item"
+    ]
+    for link, dest in zip(item_links, item_dests):
+        link["href"] = make_relative_href(dest, collection_dest)
+    StacIO.default().save_json(
+        collection_dest,
+        merged_collection_dict(collection_dict, collection_dict["extent"],
+                               item_links, collection_dest))
@@ -0,0 +1,127 @@
+import posixpath
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from stactools.core.io import ReadHrefModifier
+
+# seconds a signed href or prefix is reused before signing again
+SIGNING_TTL = 45 * 60
+# seconds before a token's own expiry at which it is no longer reused
+EXPIRY_MARGIN = 60
+
+
+class CachedReadHrefModifier:
+    """Memoizes a read_href_modifier, e.g., one that signs hrefs with a SAS
+    token by requesting a token and appending it as a query string.
+
+    When modifying an href only appends a query string, the query string is
+    reused for every href with the same prefix (directory), so that signing
+    costs one call per prefix rather than one per href. Other modifications,
+    and those of hrefs that already have a query string, are memoized per
+    href. Cached modifications expire after ttl seconds, or shortly before the
+    expiry time of a token carrying one (the "se" parameter of an Azure SAS
+    token), whichever is sooner. Hrefs with different prefixes are signed
+    concurrently.
+
+    Args:
+        read_href_modifier (ReadHrefModifier): modifier to memoize
+        ttl (float): seconds a modification is reused
+        clock (Callable[[], float]): source of the current time in seconds
+    """
+
+    def __init__(self,
+                 read_href_modifier: ReadHrefModifier,
+                 ttl: float = SIGNING_TTL,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.read_href_modifier = read_href_modifier
+        self.ttl = ttl
+        self.clock = clock
+        # prefix or href -> (query string or modified href, expiry time)
+        self._queries: Dict[str, Tuple[str, float]] = dict()
+        self._hrefs: Dict[str, Tuple[str, float]] = dict()
+        self._lock = threading.Lock()
+        self._prefix_locks: Dict[str, threading.Lock] = dict()
+
+    def __call__(self, href: str) -> str:
+        prefix = posixpath.dirname(href)
+        modified = self._cached(href, prefix)
+        if modified is not None:
+            return modified
+        # signing runs outside the shared lock, so that it only holds up
+        # other hrefs with the same prefix, which can then reuse its result
+        with self._prefix_lock(prefix):
+            modified = self._cached(href, prefix)
+            if modified is not None:
+                return modified
+            now = self.clock()
+            modified = self.read_href_modifier(href)
+            base, _, query = modified.partition("?")
+            expiry = self.expiry(query, now)
+            with self._lock:
+                # an href with a query string of its own never equals base
+                if base == href and query:
+                    self._queries[prefix] = (query, expiry)
+                else:
+                    self._hrefs[href] = (modified, expiry)
+            return modified
+
+    def _cached(self, href: str, prefix: str) -> Optional[str]:
+        with self._lock:
+            now = self.clock()
+            if "?" not in href:
+                query, expiry = self._queries.get(prefix, ("", now))
+                if expiry > now:
+                    return f"{href}?{query}"
+            modified, expiry = self._hrefs.get(href, ("", now))
+            if expiry > now:
+                return modified
+            return None
+
+    def _prefix_lock(self, prefix: str) -> threading.Lock:
+        with self._lock:
+            return self._prefix_locks.setdefault(prefix, threading.Lock())
+
+    def expiry(self, query: str, now: float) -> float:
+        """Computes the time at which a modification expires.
+
+        Args:
+            query (str): query string of the modified href
+            now (float): time of the modification in seconds
+
+        Returns:
+            float: expiry time in seconds
+        """
+        expiry = now + self.ttl
+        token_expiry = parse_qs(query).get("se")
+        if token_expiry:
+            try:
+                expires = datetime.fromisoformat(token_expiry[0].replace(
+                    "Z", "+00:00"))
+            except ValueError:
+                return expiry
+            if expires.tzinfo is None:
+                expires = expires.replace(tzinfo=timezone.utc)
+            expiry = min(expiry, expires.timestamp() - EXPIRY_MARGIN)
+        return expiry
+
+
+def cache_read_href_modifier(
+    read_href_modifier: Optional[ReadHrefModifier]
+) -> Optional[ReadHrefModifier]:
+    """Wraps a read_href_modifier in a `CachedReadHrefModifier`, unless it is
+    None or already cached.
+
+    Args:
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+
+    Returns:
+        Optional[ReadHrefModifier]: memoized read_href_modifier
+    """
+    if read_href_modifier is None or isinstance(read_href_modifier,
+                                                CachedReadHrefModifier):
+        return read_href_modifier
+    return CachedReadHrefModifier(read_href_modifier)
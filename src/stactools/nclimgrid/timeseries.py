@@ -0,0 +1,350 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from itertools import repeat
+from posixpath import join as urljoin
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+
+import numpy
+import rasterio
+import xarray
+from stactools.core.io import ReadHrefModifier
+
+from stactools.nclimgrid import daily_stac, monthly_stac
+from stactools.nclimgrid.constants import (NODATA, SHAPE, TRANSFORM, VARIABLES,
+                                           Status)
+from stactools.nclimgrid.errors import BadInput
+from stactools.nclimgrid.signing import cache_read_href_modifier
+from stactools.nclimgrid.utils import generate_years_months, open_nc
+
+MAX_WORKERS = 8
+
+
+def point_pixels(lons: Sequence[float],
+                 lats: Sequence[float]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Maps longitude and latitude coordinates to NClimGrid pixel rows and
+    columns, with row 0 at the northern edge of the grid.
+
+    Args:
+        lons (Sequence[float]): point longitudes
+        lats (Sequence[float]): point latitudes
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: pixel rows and columns
+    """
+    x_size, _, x_origin, _, y_size, y_origin = TRANSFORM
+    cols = numpy.floor((numpy.asarray(lons) - x_origin) / x_size).astype(int)
+    rows = numpy.floor((numpy.asarray(lats) - y_origin) / y_size).astype(int)
+    outside = (cols < 0) | (cols >= SHAPE[0]) | (rows < 0) | (rows >= SHAPE[1])
+    if outside.any():
+        raise BadInput(
+            f"Points {numpy.flatnonzero(outside).tolist()} are outside the "
+            "NClimGrid grid")
+    return rows, cols
+
+
+def read_cog_points(cog_href: str, rows: numpy.ndarray,
+                    cols: numpy.ndarray) -> numpy.ndarray:
+    """Reads pixel values from a COG. Only the internal COG blocks containing
+    the pixels are read, each block once.
+
+    Args:
+        cog_href (str): COG location
+        rows (numpy.ndarray): pixel rows
+        cols (numpy.ndarray): pixel columns
+
+    Returns:
+        numpy.ndarray: pixel values, with nodata as NaN
+    """
+    values = numpy.full(rows.shape, numpy.nan, dtype="float32")
+    with rasterio.open(cog_href) as dataset:
+        block_height, block_width = dataset.block_shapes[0]
+        block_rows = rows // block_height
+        block_cols = cols // block_width
+        for block_row, block_col in set(zip(block_rows, block_cols)):
+            block = dataset.read(1,
+                                 window=dataset.block_window(
+                                     1, block_row, block_col))
+            in_block = (block_rows == block_row) & (block_cols == block_col)
+            values[in_block] = block[rows[in_block] % block_height,
+                                     cols[in_block] % block_width]
+    values[values == NODATA] = numpy.nan
+    return values
+
+
+def read_nc_points(nc_href: str, var: str, rows: numpy.ndarray,
+                   cols: numpy.ndarray,
+                   indices: Optional[List[int]]) -> numpy.ndarray:
+    """Reads pixel values for time slices of a NetCDF variable. Only the
+    requested time slices are read from remote NetCDFs, through a block cache.
+
+    Args:
+        nc_href (str): NetCDF location
+        var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
+        rows (numpy.ndarray): pixel rows
+        cols (numpy.ndarray): pixel columns
+        indices (Optional[List[int]]): 1-based indices into the NetCDF
+            timestack, or None for all time slices
+
+    Returns:
+        numpy.ndarray: 2D array of pixel values with dimensions (time, point),
+            with nodata as NaN
+    """
+    with open_nc(nc_href) as ds:
+        # NetCDF latitudes may be ascending, i.e., row 0 at the southern edge
+        nc_rows = rows
+        if ds["lat"].values[0] < ds["lat"].values[-1]:
+            nc_rows = SHAPE[1] - 1 - rows
+        data = ds[var]
+        if indices is not None:
+            data = data.isel(time=[index - 1 for index in indices])
+        values = data.isel(lat=xarray.DataArray(nc_rows, dims="point"),
+                           lon=xarray.DataArray(cols, dims="point")).values
+    values[values == NODATA] = numpy.nan
+    return values
+
+
+def nc_num_times(nc_href: str) -> int:
+    """Gets the number of time slices in a NetCDF, reading only its metadata.
+
+    Args:
+        nc_href (str): NetCDF location
+
+    Returns:
+        int: length of the NetCDF timestack
+    """
+    with open_nc(nc_href) as ds:
+        return ds.sizes["time"]
+
+
+def timeseries_dataset(lons: Sequence[float], lats: Sequence[float],
+                       times: List[datetime],
+                       values: Dict[str, numpy.ndarray]) -> xarray.Dataset:
+    """Creates a point time series Dataset.
+
+    Args:
+        lons (Sequence[float]): point longitudes
+        lats (Sequence[float]): point latitudes
+        times (List[datetime]): time of each value
+        values (Dict[str, numpy.ndarray]): 2D arrays of values with dimensions
+            (time, point), keyed by variable
+
+    Returns:
+        xarray.Dataset: Dataset with dimensions (time, point)
+    """
+    return xarray.Dataset(
+        {
+            var: (("time", "point"), data)
+            for var, data in values.items()
+        },
+        coords={
+            "time": times,
+            "lon": ("point", list(lons)),
+            "lat": ("point", list(lats))
+        })
+
+
+def monthly_point_timeseries(
+        lons: Sequence[float],
+        lats: Sequence[float],
+        start_yyyymm: str,
+        end_yyyymm: str,
+        base_cog_href: Optional[str] = None,
+        base_nc_href: Optional[str] = None,
+        variables: Optional[List[str]] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        max_workers: int = MAX_WORKERS) -> xarray.Dataset:
+    """Extracts monthly time series of NClimGrid data at points, from either
+    the monthly NetCDF archive or monthly COGs.
+
+    Args:
+        lons (Sequence[float]): point longitudes
+        lats (Sequence[float]): point latitudes
+        start_yyyymm (str): start month in YYYYMM format
+        end_yyyymm (str): end month in YYYYMM format
+        base_cog_href (Optional[str]): COG storage location, used if
+            base_nc_href is not supplied
+        base_nc_href (Optional[str]): optional href to the base of a NetCDF
+            directory structure
+        variables (Optional[List[str]]): weather variables to extract,
+            defaults to all variables
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        max_workers (int): maximum number of files read concurrently
+
+    Returns:
+        xarray.Dataset: Dataset with dimensions (time, point)
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    variables = variables or VARIABLES
+    rows, cols = point_pixels(lons, lats)
+    indices = monthly_stac.month_indices(start_yyyymm, end_yyyymm)
+    times = [datetime(year, month, 1) for year, month, _ in indices]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if base_nc_href:
+            nc_indices = [idx for _, _, idx in indices]
+            futures = {
+                var:
+                executor.submit(
+                    read_nc_points,
+                    modify_href(nc_href(base_nc_href, f"nclimgrid_{var}.nc"),
+                                read_href_modifier), var, rows, cols,
+                    nc_indices)
+                for var in variables
+            }
+            values = {var: future.result() for var, future in futures.items()}
+        elif base_cog_href:
+            values = dict()
+            for var in variables:
+                cog_hrefs = [
+                    modify_href(
+                        monthly_stac.get_cog_href(year, month, var,
+                                                  base_cog_href),
+                        read_href_modifier) for year, month, _ in indices
+                ]
+                values[var] = numpy.stack(
+                    list(
+                        executor.map(
+                            partial(read_cog_points, rows=rows, cols=cols),
+                            cog_hrefs)))
+        else:
+            raise BadInput("Either base_cog_href or base_nc_href is required")
+
+    return timeseries_dataset(lons, lats, times, values)
+
+
+def daily_point_timeseries(
+        lons: Sequence[float],
+        lats: Sequence[float],
+        start_yyyymm: str,
+        end_yyyymm: str,
+        scaled_or_prelim: Union[str, Status],
+        base_cog_href: Optional[str] = None,
+        base_nc_href: Optional[str] = None,
+        variables: Optional[List[str]] = None,
+        read_href_modifier: Optional[ReadHrefModifier] = None,
+        max_workers: int = MAX_WORKERS) -> xarray.Dataset:
+    """Extracts daily time series of NClimGrid data at points, from either the
+    daily NetCDF files or daily COGs. When reading NetCDFs, days without
+    preliminary data are NaN.
+
+    Args:
+        lons (Sequence[float]): point longitudes
+        lats (Sequence[float]): point latitudes
+        start_yyyymm (str): start month in YYYYMM format
+        end_yyyymm (str): end month in YYYYMM format
+        scaled_or_prelim (Union[str, Status]): either a string ("scaled" or
+            "prelim") or enumeration specifying whether to read final or
+            preliminary data
+        base_cog_href (Optional[str]): COG storage location, used if
+            base_nc_href is not supplied
+        base_nc_href (Optional[str]): optional href to the base of a NetCDF
+            directory structure
+        variables (Optional[List[str]]): weather variables to extract,
+            defaults to all variables
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        max_workers (int): maximum number of files read concurrently
+
+    Returns:
+        xarray.Dataset: Dataset with dimensions (time, point)
+    """
+    read_href_modifier = cache_read_href_modifier(read_href_modifier)
+    variables = variables or VARIABLES
+    status = Status(scaled_or_prelim)
+    rows, cols = point_pixels(lons, lats)
+    years_months = generate_years_months(start_yyyymm, end_yyyymm)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if base_nc_href:
+            month_hrefs = [{
+                var:
+                modify_href(
+                    nc_href(base_nc_href,
+                            daily_stac.daily_nc_href(year, month, status,
+                                                     var)), read_href_modifier)
+                for var in variables
+            } for year, month in years_months]
+            # each NetCDF holds consecutive days from the start of the month,
+            # e.g., only the days published so far for "prelim" data, so the
+            # days read are those held by all of the month's NetCDFs
+            month_indices = []
+            for hrefs in month_hrefs:
+                num_days = min(executor.map(nc_num_times, set(hrefs.values())))
+                month_indices.append(list(range(1, num_days + 1)))
+            times = [
+                datetime(year, month, index)
+                for (year, month), indices in zip(years_months, month_indices)
+                for index in indices
+            ]
+            values = dict()
+            for var in variables:
+                values[var] = numpy.concatenate(
+                    list(
+                        executor.map(read_nc_points,
+                                     [hrefs[var] for hrefs in month_hrefs],
+                                     repeat(var), repeat(rows), repeat(cols),
+                                     month_indices)))
+        elif base_cog_href:
+            days = [(year, month, day) for year, month in years_months
+                    for day in range(
+                        1,
+                        daily_stac.num_valid_days(
+                            year,
+                            month,
+                            status,
+                            base_cog_href,
+                            read_href_modifier=read_href_modifier) + 1)]
+            times = [datetime(*day) for day in days]
+            values = dict()
+            for var in variables:
+                cog_hrefs = [
+                    modify_href(
+                        daily_stac.get_cog_href(year, month, day, var, status,
+                                                base_cog_href),
+                        read_href_modifier) for year, month, day in days
+                ]
+                values[var] = numpy.stack(
+                    list(
+                        executor.map(
+                            partial(read_cog_points, rows=rows, cols=cols),
+                            cog_hrefs)))
+        else:
+            raise BadInput("Either base_cog_href or base_nc_href is required")
+
+    return timeseries_dataset(lons, lats, times, values)
+
+
+def nc_href(base_nc_href: str, nc_href_end: str) -> str:
+    """Joins a NetCDF path to a local or remote base NetCDF href.
+
+    Args:
+        base_nc_href (str): href to the base of a NetCDF directory structure
+        nc_href_end (str): partial path to a NetCDF file
+
+    Returns:
+        str: NetCDF href
+    """
+    if urlparse(base_nc_href).scheme:
+        return urljoin(base_nc_href, nc_href_end)
+    return os.path.join(base_nc_href, nc_href_end)
+
+
+def modify_href(href: str,
+                read_href_modifier: Optional[ReadHrefModifier]) -> str:
+    """Applies an optional read_href_modifier to an href.
+
+    Args:
+        href (str): href to modify
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+
+    Returns:
+        str: modified href
+    """
+    if read_href_modifier:
+        return read_href_modifier(href)
+    return href
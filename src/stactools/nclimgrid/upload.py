@@ -0,0 +1,92 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from typing import List
+
+from stactools.nclimgrid.errors import CogUploadError
+from stactools.nclimgrid.utils import UPLOAD_BLOCKSIZE, upload_cog
+
+
+class CogUploader:
+    """Uploads COGs to remote storage in background threads. COGs are created
+    in local scratch space and submitted for upload, allowing creation of the
+    next COG to overlap with the upload of the previous ones. The number of
+    COGs awaiting upload is bounded to limit scratch space use.
+
+    Args:
+        max_workers (int): maximum number of concurrent uploads
+        block_size (int): upload block (part) size in bytes
+    """
+
+    def __init__(self,
+                 max_workers: int = 4,
+                 block_size: int = UPLOAD_BLOCKSIZE):
+        self.block_size = block_size
+        self._temp_dir = TemporaryDirectory()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = threading.BoundedSemaphore(2 * max_workers)
+        self._futures: List[Future] = []
+
+    def __enter__(self) -> "CogUploader":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def scratch_path(self, cog_href: str) -> str:
+        """Generates a local scratch path at which to create a COG prior to
+        upload.
+
+        Args:
+            cog_href (str): remote COG storage location
+
+        Returns:
+            str: local COG path
+        """
+        return os.path.join(self._temp_dir.name, os.path.basename(cog_href))
+
+    def submit(self, cog_path: str, cog_href: str) -> None:
+        """Submits a local COG for upload. Blocks if the maximum number of COGs
+        are already awaiting upload. The local COG is removed once uploaded.
+
+        Args:
+            cog_path (str): local COG path
+            cog_href (str): remote COG storage location
+        """
+        self._pending.acquire()
+        try:
+            future = self._executor.submit(self._upload, cog_path, cog_href)
+        except Exception:
+            self._pending.release()
+            raise
+        self._futures.append(future)
+
+    def wait(self) -> None:
+        """Waits for all submitted uploads to complete.
+
+        Raises:
+            CogUploadError: if any upload failed
+        """
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self) -> None:
+        """Waits for all submitted uploads to complete and removes the scratch
+        space."""
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown()
+            self._temp_dir.cleanup()
+
+    def _upload(self, cog_path: str, cog_href: str) -> None:
+        try:
+            upload_cog(cog_path, cog_href, block_size=self.block_size)
+            os.remove(cog_path)
+        except Exception as e:
+            raise CogUploadError(
+                f"Failed to upload '{cog_path}' to '{cog_href}'.") from e
+        finally:
+            self._pending.release()
@@ -1,45 +1,218 @@
+import base64
+import hashlib
+import json
+import os
+import posixpath
+import re
 import subprocess
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Tuple
+from functools import partial
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+from urllib.parse import urlparse
 
 import fsspec
-from pystac import Asset, MediaType
+import numpy
+import rasterio
+import xarray
+from fsspec import AbstractFileSystem
+from pystac import Asset, Item, MediaType
+from pystac.extensions.eo import Band, EOExtension
+from pystac.extensions.item_assets import AssetDefinition
+from pystac.extensions.raster import (DataType, RasterBand, RasterExtension,
+                                      Statistics)
+from rasterio.transform import Affine
 
-from stactools.nclimgrid.constants import COG_ASSET_TITLE, EPSG
-from stactools.nclimgrid.errors import BadInput
+from stactools.nclimgrid import constants
+from stactools.nclimgrid.constants import (BAND_DESCRIPTION, COG_ASSET_TITLE,
+                                           CONNECTION_LIMIT, EPSG,
+                                           KEEPALIVE_TIMEOUT,
+                                           MULTIBAND_COG_ASSET_KEY,
+                                           MULTIBAND_COG_ASSET_TITLE, NODATA,
+                                           TRANSFORM)
+from stactools.nclimgrid.errors import BadInput, DownloadError
 
 BLOCKSIZE = 2**22
+# roughly the compressed size of a single NetCDF time slice
+RANGE_BLOCKSIZE = 2**20
+DOWNLOAD_RETRIES = 5
+# seconds before the first download retry, doubled for each retry
+DOWNLOAD_BACKOFF = 1.0
+MD5_PATTERN = re.compile(r"[0-9a-f]{32}")
+# large enough to meet the minimum part size of S3 multipart uploads
+UPLOAD_BLOCKSIZE = 2**23
+# approximate ceiling on memory used by time-chunked NetCDF reductions
+REDUCTION_MEMORY_LIMIT = 2**27
+# memory used by a NaN-skipping reduction, relative to the data reduced
+REDUCTION_OVERHEAD = 3
 
 
-def cog_nc(nc_path: str, cog_path: str, var: str, index: int) -> int:
-    """Create a COG for a given time index into a NetCDF variable.
+def cog_array(array: numpy.ndarray,
+              cog_path: str,
+              description: Optional[str] = None) -> int:
+    """Create a single-band COG on the NClimGrid grid from an array, e.g., a
+    band computed from NetCDF data. Floating point bands use NaN as nodata.
 
     Args:
-        nc_path (str): local path to NetCDF file
+        array (numpy.ndarray): 2D band data with row 0 at the northern edge
         cog_path (str): local path to COG storage location
-        var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
-        index (int): 1-based index into NetCDF timestack
+        description (Optional[str]): optional band description
 
     Returns:
         int: COG creation status (0=success)
     """
-    gdal_path = f"netcdf:{nc_path}:{var}"
-    args = [
-        "gdal_translate", "-of", "COG", "-a_srs", f"EPSG:{EPSG}", "-co",
-        "compress=deflate", "-b", f"{index}"
-    ]
-    args.append(gdal_path)
-    args.append(cog_path)
-    result = subprocess.run(args, capture_output=True)
+    return cog_bands([array],
+                     cog_path,
+                     descriptions=[description] if description else None)
+
+
+def cog_bands(bands: List[numpy.ndarray],
+              cog_path: str,
+              descriptions: Optional[List[str]] = None,
+              nodata: Optional[float] = None,
+              scales: Optional[List[float]] = None,
+              offsets: Optional[List[float]] = None,
+              predictor: bool = False) -> int:
+    """Create a COG on the NClimGrid grid with a band for each array, e.g.,
+    time slices already read from NetCDF variables, so the source data is not
+    read again. Floating point bands use NaN as nodata unless another nodata
+    value is given.
+
+    Args:
+        bands (List[numpy.ndarray]): 2D band data of a single dtype, with row
+            0 at the northern edge (see `read_nc_slice`)
+        cog_path (str): local path to COG storage location
+        descriptions (Optional[List[str]]): optional band descriptions
+        nodata (Optional[float]): optional nodata value
+        scales (Optional[List[float]]): optional scale of each band
+        offsets (Optional[List[float]]): optional offset of each band
+        predictor (bool): option to use horizontal differencing, which
+            improves compression of integer bands
+
+    Returns:
+        int: COG creation status (0=success)
+    """
+    dtype = bands[0].dtype
+    if nodata is None and numpy.issubdtype(dtype, numpy.floating):
+        nodata = numpy.nan
+    profile = dict(driver="GTiff",
+                   width=bands[0].shape[1],
+                   height=bands[0].shape[0],
+                   count=len(bands),
+                   dtype=dtype.name,
+                   transform=Affine(*TRANSFORM),
+                   nodata=nodata)
+
+    with TemporaryDirectory() as temp_dir:
+        bands_path = os.path.join(temp_dir, "bands.tif")
+        with rasterio.open(bands_path, "w", **profile) as dataset:
+            for band, array in enumerate(bands, start=1):
+                dataset.write(array, band)
+                if descriptions:
+                    dataset.set_band_description(band, descriptions[band - 1])
+            if scales:
+                dataset.scales = scales
+            if offsets:
+                dataset.offsets = offsets
+
+        args = [
+            "gdal_translate", "-of", "COG", "-a_srs", f"EPSG:{EPSG}", "-co",
+            "compress=deflate"
+        ]
+        if predictor:
+            args.extend(["-co", "predictor=2"])
+        args.extend([bands_path, cog_path])
+        result = subprocess.run(args, capture_output=True)
     return result.returncode
 
 
-def create_cog_asset(cog_href: str, var: str) -> Tuple[str, Asset]:
+def quantize(array: numpy.ndarray, var: str) -> numpy.ndarray:
+    """Packs a band into int16 with the variable's scale and offset (see
+    `constants.QUANTIZED_SCALE` and `constants.QUANTIZED_OFFSET`), rounding
+    to the nearest step. NaN and nodata (-999) values are packed as
+    `constants.QUANTIZED_NODATA`, and values outside the packed range are
+    clipped to it.
+
+    Args:
+        array (numpy.ndarray): band data
+        var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
+
+    Returns:
+        numpy.ndarray: packed int16 band
+    """
+    limit = numpy.iinfo(constants.QUANTIZED_DTYPE).max
+    invalid = ~numpy.isfinite(array) | (array == NODATA)
+    packed = numpy.subtract(array,
+                            constants.QUANTIZED_OFFSET[var],
+                            dtype=numpy.float64)
+    packed /= constants.QUANTIZED_SCALE[var]
+    numpy.rint(packed, out=packed)
+    numpy.clip(packed, -limit, limit, out=packed)
+    packed[invalid] = constants.QUANTIZED_NODATA
+    return packed.astype(constants.QUANTIZED_DTYPE)
+
+
+def dequantize(packed: numpy.ndarray, var: str) -> numpy.ndarray:
+    """Unpacks a quantized band (see `quantize`).
+
+    Args:
+        packed (numpy.ndarray): packed int16 band
+        var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
+
+    Returns:
+        numpy.ndarray: float32 band, with NaN where the band has no data
+    """
+    array = packed.astype(numpy.float32)
+    array *= constants.QUANTIZED_SCALE[var]
+    array += constants.QUANTIZED_OFFSET[var]
+    array[packed == constants.QUANTIZED_NODATA] = numpy.nan
+    return array
+
+
+def raster_band(var: str,
+                statistics: Optional[Dict[str, float]] = None,
+                quantized: bool = False) -> RasterBand:
+    """Creates the raster extension band of a variable's COG band.
+
+    Args:
+        var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
+        statistics (Optional[Dict[str, float]]): optional band statistics (see
+            `band_statistics`)
+        quantized (bool): whether the band is quantized (see `quantize`), in
+            which case its data type, nodata value, scale and offset are set
+
+    Returns:
+        RasterBand: raster extension band
+    """
+    band = RasterBand.create()
+    if statistics:
+        band.statistics = Statistics.create(**statistics)
+    if quantized:
+        band.data_type = DataType(constants.QUANTIZED_DTYPE)
+        band.nodata = constants.QUANTIZED_NODATA
+        band.scale = constants.QUANTIZED_SCALE[var]
+        band.offset = constants.QUANTIZED_OFFSET[var]
+    return band
+
+
+def create_cog_asset(cog_href: str,
+                     var: str,
+                     statistics: Optional[Dict[str, float]] = None,
+                     quantized: bool = False) -> Tuple[str, Asset]:
     """Creates a COG Asset.
 
     Args:
         cog_href (str): COG location
         var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
+        statistics (Optional[Dict[str, float]]): optional band statistics (see
+            `band_statistics`) to add to the Asset with the raster extension.
+            The raster extension must be added to the Asset's Item.
+        quantized (bool): whether the COG is quantized (see `quantize`), in
+            which case the band's data type, nodata value, scale and offset
+            are added with the raster extension
 
     Returns:
         str: Asset key
@@ -53,22 +226,634 @@ def create_cog_asset(cog_href: str, var: str) -> Tuple[str, Asset]:
                   roles=["data"],
                   title=title)
 
+    if statistics or quantized:
+        raster = RasterExtension.ext(asset)
+        raster.bands = [raster_band(var, statistics, quantized)]
+
     return key, asset
 
 
-def download_nc(nc_remote_url: str, nc_local_path: str) -> None:
-    """Downloads an online NetCDF.
+def create_multiband_cog_asset(cog_href: str,
+                               variables: List[str],
+                               statistics: Optional[Dict[str,
+                                                         Dict[str,
+                                                              float]]] = None,
+                               quantized: bool = False) -> Tuple[str, Asset]:
+    """Creates the Asset for a COG with a band for each variable. Bands are
+    described with the eo extension, which must be added to the Asset's Item.
+
+    Args:
+        cog_href (str): COG location
+        variables (List[str]): weather variables, in band order
+        statistics (Optional[Dict[str, Dict[str, float]]]): optional band
+            statistics (see `band_statistics`) for each variable to add to the
+            Asset with the raster extension. The raster extension must be
+            added to the Asset's Item.
+        quantized (bool): whether the COG is quantized (see `quantize`), in
+            which case each band's data type, nodata value, scale and offset
+            are added with the raster extension
+
+    Returns:
+        str: Asset key
+        Asset: STAC Asset
+    """
+    asset = Asset(href=cog_href,
+                  media_type=MediaType.COG,
+                  roles=["data"],
+                  title=MULTIBAND_COG_ASSET_TITLE)
+
+    EOExtension.ext(asset).bands = [
+        Band.create(name=var, description=BAND_DESCRIPTION[var])
+        for var in variables
+    ]
+    if statistics or quantized:
+        RasterExtension.ext(asset).bands = [
+            raster_band(var, (statistics or dict()).get(var), quantized)
+            for var in variables
+        ]
+
+    return MULTIBAND_COG_ASSET_KEY, asset
+
+
+def create_item_cog_asset(cog_href: str,
+                          variables: List[str],
+                          statistics: Optional[Dict[str, Dict[str,
+                                                              float]]] = None,
+                          quantized: bool = False) -> Tuple[str, Asset]:
+    """Creates the Asset for a COG holding one variable (see
+    `create_cog_asset`) or a band for each of several variables (see
+    `create_multiband_cog_asset`).
+
+    Args:
+        cog_href (str): COG location
+        variables (List[str]): weather variables, in band order
+        statistics (Optional[Dict[str, Dict[str, float]]]): optional band
+            statistics for each variable
+        quantized (bool): whether the COG is quantized (see `quantize`)
+
+    Returns:
+        str: Asset key
+        Asset: STAC Asset
+    """
+    if len(variables) == 1:
+        return create_cog_asset(cog_href, variables[0],
+                                (statistics
+                                 or dict()).get(variables[0]), quantized)
+    return create_multiband_cog_asset(cog_href, variables, statistics,
+                                      quantized)
+
+
+def item_asset_definitions(item: Item) -> Dict[str, Any]:
+    """Creates Collection item_assets definitions from the Assets of an Item.
+    Hrefs and band statistics, which differ between Items, are omitted.
+
+    Args:
+        item (Item): STAC Item
+
+    Returns:
+        Dict[str, Any]: `AssetDefinition` of each Asset, keyed by Asset key
+    """
+    item_assets: Dict[str, Any] = dict()
+    for key, asset in item.get_assets().items():
+        asset_as_dict = asset.to_dict()
+        asset_as_dict.pop("href")
+        for band in asset_as_dict.get("raster:bands", []):
+            band.pop("statistics", None)
+        item_assets[key] = AssetDefinition(asset_as_dict)
+    return item_assets
+
+
+def band_statistics(array: numpy.ndarray) -> Dict[str, float]:
+    """Computes statistics of a band, excluding NaN and nodata (-999) values.
+
+    Args:
+        array (numpy.ndarray): band data
+
+    Returns:
+        Dict[str, float]: minimum, maximum, mean, stddev, and valid_percent
+            of the band. Only valid_percent is included if no data is valid.
+    """
+    valid = array[numpy.isfinite(array) & (array != NODATA)]
+    statistics = {"valid_percent": 100 * valid.size / array.size}
+    if valid.size:
+        statistics.update({
+            "minimum": float(valid.min()),
+            "maximum": float(valid.max()),
+            "mean": float(valid.mean(dtype=numpy.float64)),
+            "stddev": float(valid.std(dtype=numpy.float64))
+        })
+    return statistics
+
+
+class FilesystemPool:
+    """Filesystems shared by every download, existence check and upload in a
+    run, one for each fsspec filesystem type. HTTP(S) filesystems share a
+    single session whose connections are kept alive and reused, rather than
+    connecting (and negotiating TLS) for every file.
+
+    Args:
+        keepalive_timeout (float): seconds an idle HTTP connection is kept
+            open for reuse, or 0 to close connections after each request
+        connection_limit (int): maximum number of simultaneous HTTP
+            connections, or 0 for no limit
+    """
+
+    def __init__(self,
+                 keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+                 connection_limit: int = CONNECTION_LIMIT) -> None:
+        self.keepalive_timeout = keepalive_timeout
+        self.connection_limit = connection_limit
+        self._filesystems: Dict[Type[AbstractFileSystem],
+                                AbstractFileSystem] = dict()
+        self._lock = threading.Lock()
+
+    def filesystem(self, href: str) -> Tuple[AbstractFileSystem, str]:
+        """Returns the pooled filesystem for an href, creating it on first
+        use.
+
+        Args:
+            href (str): local or remote file location
+
+        Returns:
+            Tuple[AbstractFileSystem, str]: filesystem and the href's path
+                within it
+        """
+        protocol, _ = fsspec.core.split_protocol(href)
+        cls = fsspec.get_filesystem_class(protocol or "file")
+        with self._lock:
+            if cls not in self._filesystems:
+                options = dict()
+                if protocol in ("http", "https"):
+                    options["get_client"] = partial(
+                        _pooled_http_client,
+                        keepalive_timeout=self.keepalive_timeout,
+                        connection_limit=self.connection_limit)
+                self._filesystems[cls] = cls(skip_instance_cache=True,
+                                             **options)
+            fs = self._filesystems[cls]
+        return fs, fsspec.core.strip_protocol(href)
+
+
+async def _pooled_http_client(keepalive_timeout: float, connection_limit: int,
+                              **kwargs: Any) -> Any:
+    import aiohttp
+
+    if keepalive_timeout:
+        connector = aiohttp.TCPConnector(limit=connection_limit,
+                                         keepalive_timeout=keepalive_timeout)
+    else:
+        connector = aiohttp.TCPConnector(limit=connection_limit,
+                                         force_close=True)
+    return aiohttp.ClientSession(connector=connector, **kwargs)
+
+
+_filesystem_pool = FilesystemPool()
+
+
+def configure_filesystems(keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+                          connection_limit: int = CONNECTION_LIMIT) -> None:
+    """Replaces the filesystems shared by the run (see `FilesystemPool`) with
+    filesystems using new connection settings.
+
+    Args:
+        keepalive_timeout (float): seconds an idle HTTP connection is kept
+            open for reuse, or 0 to close connections after each request
+        connection_limit (int): maximum number of simultaneous HTTP
+            connections, or 0 for no limit
+    """
+    global _filesystem_pool
+    _filesystem_pool = FilesystemPool(keepalive_timeout, connection_limit)
+
+
+def get_filesystem(href: str) -> Tuple[AbstractFileSystem, str]:
+    """Returns the filesystem shared by the run for an href.
+
+    Args:
+        href (str): local or remote file location
+
+    Returns:
+        Tuple[AbstractFileSystem, str]: filesystem and the href's path within
+            it
+    """
+    return _filesystem_pool.filesystem(href)
+
+
+def open_href(href: str, mode: str = "rb") -> Any:
+    """Opens a file with the filesystem shared by the run (see
+    `get_filesystem`). Parent directories are created when writing.
+
+    Args:
+        href (str): local or remote file location
+        mode (str): file mode, e.g., "rb" or "w"
+
+    Returns:
+        Any: file-like object
+    """
+    fs, path = get_filesystem(href)
+    if "w" in mode:
+        fs.makedirs(posixpath.dirname(path), exist_ok=True)
+    return fs.open(path, mode)
+
+
+def href_exists(href: str) -> bool:
+    """Returns true if there is a file at the given href. Uses the filesystem
+    shared by the run, and its file information (an HTTP HEAD request for
+    online files) rather than fetching the file.
+
+    Args:
+        href (str): file location
+
+    Returns:
+        bool: True if the href exists, False if not
+    """
+    return href_info(href) is not None
+
+
+def href_info(href: str) -> Optional[Dict[str, Any]]:
+    """Fetches the file information of the file at the given href (see
+    `href_exists`), e.g., its size and, for some online storage, its ETag.
+
+    Args:
+        href (str): file location
+
+    Returns:
+        Optional[Dict[str, Any]]: the file information, or None if the href
+            does not exist
+    """
+    fs, path = get_filesystem(href)
+    try:
+        return fs.info(path)
+    except FileNotFoundError:
+        return None
+
+
+def download_nc(nc_remote_url: str,
+                nc_local_path: str,
+                sha256: Optional[str] = None,
+                retries: int = DOWNLOAD_RETRIES,
+                backoff: float = DOWNLOAD_BACKOFF,
+                block_size: int = BLOCKSIZE) -> None:
+    """Downloads an online NetCDF. Data is written to a partial file, which is
+    moved to nc_local_path once complete. If the download fails partway, it
+    is retried with exponential backoff, continuing from the end of the
+    partial file with range requests rather than starting again. Permanent
+    failures, e.g., HTTP 403 or 404 responses, are not retried.
+
+    The online file's validators (its ETag, Last-Modified time, and size; see
+    `download_validators`) are recorded next to the partial file, and a
+    partial file left by an earlier download of a since-republished file is
+    discarded rather than continued. Once complete, the downloaded file's
+    size is verified, as is its checksum: against sha256 if given, or else
+    against the MD5 digest published by the server (a Content-MD5 header or
+    an MD5 ETag) where there is one.
 
     Args:
         nc_remote_url (str): online NetCDF location
         nc_local_path (str): location to download NetCDF file
+        sha256 (Optional[str]): optional SHA-256 hex digest that the
+            downloaded file must match
+        retries (int): maximum number of times to retry a failed download
+        backoff (float): seconds to wait before the first retry, doubled
+            for each subsequent retry
+        block_size (int): size of the range requests in bytes
+    """
+    os.makedirs(os.path.dirname(nc_local_path) or ".", exist_ok=True)
+    partial_path = f"{nc_local_path}.partial"
+    validators_path = f"{partial_path}.json"
+    fs, path = get_filesystem(nc_remote_url)
+
+    info: Dict[str, Any] = dict()
+    for attempt in range(retries + 1):
+        try:
+            info = fs.info(path)
+            validators = download_validators(info)
+            offset = 0
+            if os.path.exists(partial_path):
+                offset = os.path.getsize(partial_path)
+                if (offset > info["size"]
+                        or _read_validators(validators_path) != validators):
+                    # the online file has changed since the partial download
+                    os.remove(partial_path)
+                    offset = 0
+            if not offset:
+                with open(validators_path, "w") as f:
+                    json.dump(validators, f)
+            with fs.open(path, "rb", block_size=block_size) as source:
+                source.seek(offset)
+                with open(partial_path, "ab") as target:
+                    data = source.read(block_size)
+                    while data:
+                        target.write(data)
+                        data = source.read(block_size)
+            # the next attempt starts again if the file was republished
+            if download_validators(fs.info(path)) != validators:
+                raise DownloadError(
+                    f"'{nc_remote_url}' changed during its download.")
+            break
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            if attempt == retries or is_permanent_error(e):
+                raise DownloadError(
+                    f"Failed to download '{nc_remote_url}' after "
+                    f"{attempt + 1} attempts.") from e
+            time.sleep(backoff * 2**attempt)
+
+    size = info["size"]
+    try:
+        if os.path.getsize(partial_path) != size:
+            raise DownloadError(
+                f"Downloaded size of '{nc_remote_url}' does not match its "
+                f"size of {size} bytes.")
+        if sha256:
+            checksum_matches = hash_file(partial_path) == sha256
+        else:
+            md5 = published_md5(info)
+            checksum_matches = not md5 or hash_file(partial_path, "md5") == md5
+        if not checksum_matches:
+            raise DownloadError(
+                f"Downloaded '{nc_remote_url}' does not match its checksum.")
+    except DownloadError:
+        os.remove(partial_path)
+        raise
+    finally:
+        if os.path.exists(validators_path):
+            os.remove(validators_path)
+    os.replace(partial_path, nc_local_path)
+
+
+def download_validators(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Extracts the values that change when an online file is republished
+    from its file information: its size and, where available, its ETag and
+    Last-Modified (or, for local files, modification) time.
+
+    Args:
+        info (Dict[str, Any]): file information (see `href_info`)
+
+    Returns:
+        Dict[str, Any]: validators, keyed by lowercase name
+    """
+    validators = {"size": info.get("size")}
+    for key, value in info.items():
+        if key.lower() in ("etag", "last-modified", "last_modified", "mtime"):
+            validators[key.lower().replace("_", "-")] = str(value)
+    return validators
+
+
+def published_md5(info: Dict[str, Any]) -> Optional[str]:
+    """Finds the MD5 digest of an online file's contents published by its
+    server, from a Content-MD5 header or an ETag that is an MD5 digest, as
+    set by, e.g., S3 and Azure Blob Storage for files uploaded in a single
+    part.
+
+    Args:
+        info (Dict[str, Any]): file information (see `href_info`)
+
+    Returns:
+        Optional[str]: hexadecimal MD5 digest, or None if none is published
+    """
+    for key, value in info.items():
+        if key.lower() == "content-md5" and value:
+            return base64.b64decode(value).hex()
+    for key, value in info.items():
+        if key.lower() == "etag" and value:
+            etag = str(value).strip('"').lower()
+            if MD5_PATTERN.fullmatch(etag):
+                return etag
+    return None
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """Checks if a failed request would fail again if retried, e.g., because
+    access is denied. Other client errors (HTTP 4xx) are permanent, except
+    for timeouts (408) and rate limiting (429).
+
+    Args:
+        error (Exception): request error
+
+    Returns:
+        bool: True if the request should not be retried
+    """
+    if isinstance(error, (FileNotFoundError, PermissionError)):
+        return True
+    status = getattr(error, "status", None)
+    return (isinstance(status, int) and 400 <= status < 500
+            and status not in (408, 429))
+
+
+def _read_validators(validators_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(validators_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def upload_cog(cog_local_path: str,
+               cog_remote_href: str,
+               block_size: int = UPLOAD_BLOCKSIZE) -> None:
+    """Uploads a local COG to remote storage. Data is written in blocks of
+    block_size bytes, which filesystems supporting multipart uploads send as
+    individual parts.
+
+    Args:
+        cog_local_path (str): local COG location
+        cog_remote_href (str): remote COG storage location
+        block_size (int): upload block (part) size in bytes
     """
-    with fsspec.open(nc_remote_url) as source:
-        with fsspec.open(nc_local_path, "wb") as target:
-            data = True
+    fs, path = get_filesystem(cog_remote_href)
+    with open(cog_local_path, "rb") as source:
+        with fs.open(path, "wb", block_size=block_size) as target:
+            data = source.read(block_size)
             while data:
-                data = source.read(BLOCKSIZE)
                 target.write(data)
+                data = source.read(block_size)
+
+
+def read_nc_slice(nc_path: str, var: str, index: int) -> numpy.ndarray:
+    """Reads a single time slice of a NetCDF variable.
+
+    Args:
+        nc_path (str): local path to NetCDF file
+        var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
+        index (int): 1-based index into NetCDF timestack
+
+    Returns:
+        numpy.ndarray: 2D array of variable data
+    """
+    with xarray.open_dataset(nc_path) as ds:
+        return ds[var].isel(time=index - 1).values
+
+
+def read_nc_band(nc_path: str, var: str,
+                 index: int) -> Tuple[numpy.ndarray, bool]:
+    """Reads a single time slice of a NetCDF variable, along with the order of
+    its rows. COG bands have row 0 at the northern edge of the grid (see
+    `cog_bands`), so a slice whose latitudes ascend is flipped before it is
+    stored.
+
+    Args:
+        nc_path (str): local path to NetCDF file
+        var (str): weather variable ("prcp", "tavg", "tmax", or "tmin")
+        index (int): 1-based index into NetCDF timestack
+
+    Returns:
+        Tuple[numpy.ndarray, bool]: 2D array of variable data, and True if
+            row 0 is at the southern edge of the grid
+    """
+    with xarray.open_dataset(nc_path) as ds:
+        data = ds[var].isel(time=index - 1)
+        lat = data["lat"].values
+        return data.values, bool(lat[0] < lat[-1])
+
+
+def nc_time_means(
+        data: xarray.DataArray,
+        memory_limit: int = REDUCTION_MEMORY_LIMIT) -> Iterator[numpy.ndarray]:
+    """Computes the spatial mean of each time slice of a NetCDF variable,
+    skipping NaN values. Time slices are read and reduced in chunks sized so
+    that memory use stays below approximately memory_limit bytes, whatever
+    the length of the timestack; at least one time slice is read at a time.
+
+    Args:
+        data (xarray.DataArray): lazily loaded NetCDF variable with dimensions
+            (time, lat, lon)
+        memory_limit (int): approximate memory ceiling in bytes
+
+    Returns:
+        Iterator[numpy.ndarray]: means of the time slices in each chunk, in
+            time order
+    """
+    for chunk in nc_time_chunks(data, memory_limit, REDUCTION_OVERHEAD):
+        yield chunk.mean(dim=("lat", "lon"), skipna=True).values
+
+
+def nc_slice_hashes(data: xarray.DataArray,
+                    memory_limit: int = REDUCTION_MEMORY_LIMIT) -> List[str]:
+    """Computes a SHA-256 hash of each time slice of a NetCDF variable,
+    matching `hash_array` of the slice. Time slices are read in chunks sized
+    so that memory use stays below approximately memory_limit bytes, and each
+    slice is hashed in place within its chunk, without copying.
+
+    Args:
+        data (xarray.DataArray): lazily loaded NetCDF variable with dimensions
+            (time, lat, lon)
+        memory_limit (int): approximate memory ceiling in bytes
+
+    Returns:
+        List[str]: hexadecimal hash digest of each time slice, in time order
+    """
+    hashes = []
+    for chunk in nc_time_chunks(data, memory_limit):
+        values = numpy.ascontiguousarray(chunk.values)
+        for time_slice in values:
+            hashes.append(
+                hashlib.sha256(memoryview(time_slice).cast("B")).hexdigest())
+    return hashes
+
+
+def nc_time_chunks(data: xarray.DataArray,
+                   memory_limit: int,
+                   overhead: int = 1) -> Iterator[xarray.DataArray]:
+    """Splits a NetCDF variable into chunks of consecutive time slices, sized
+    so that processing a chunk uses approximately memory_limit bytes at most;
+    each chunk holds at least one time slice.
+
+    Args:
+        data (xarray.DataArray): lazily loaded NetCDF variable with dimensions
+            (time, lat, lon)
+        memory_limit (int): approximate memory ceiling in bytes
+        overhead (int): memory used to process a chunk, relative to the size
+            of its data
+
+    Returns:
+        Iterator[xarray.DataArray]: lazily loaded chunks, in time order
+    """
+    slice_bytes = (data.sizes["lat"] * data.sizes["lon"] *
+                   data.dtype.itemsize * overhead)
+    chunk_size = max(1, memory_limit // slice_bytes)
+    for start in range(0, data.sizes["time"], chunk_size):
+        yield data.isel(time=slice(start, start + chunk_size))
+
+
+def hash_array(array: numpy.ndarray) -> str:
+    """Computes a SHA-256 hash of array data.
+
+    Args:
+        array (numpy.ndarray): array to hash
+
+    Returns:
+        str: hexadecimal hash digest
+    """
+    return hashlib.sha256(numpy.ascontiguousarray(array).tobytes()).hexdigest()
+
+
+def hash_file(href: str, algorithm: str = "sha256") -> str:
+    """Computes a hash of a file's contents.
+
+    Args:
+        href (str): file location
+        algorithm (str): hashlib hash algorithm, SHA-256 by default
+
+    Returns:
+        str: hexadecimal hash digest
+    """
+    digest = hashlib.new(algorithm)
+    with open_href(href) as f:
+        data = True
+        while data:
+            data = f.read(BLOCKSIZE)
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def extract_nc_slices(nc_remote_url: str,
+                      nc_local_path: str,
+                      variables: List[str],
+                      indices: List[int],
+                      block_size: int = RANGE_BLOCKSIZE) -> None:
+    """Extracts time slices of online NetCDF variables to a local NetCDF. Only
+    the byte ranges of the online NetCDF that hold the requested time slices
+    (and file metadata) are read, using range requests and block caching,
+    rather than downloading the entire file.
+
+    Args:
+        nc_remote_url (str): online NetCDF location
+        nc_local_path (str): location to save the extracted NetCDF file
+        variables (List[str]): weather variables to extract
+        indices (List[int]): 1-based indices into NetCDF timestack, in the
+            order they are to be stored in the local NetCDF
+        block_size (int): size of range requests and cached blocks in bytes
+    """
+    os.makedirs(os.path.dirname(nc_local_path), exist_ok=True)
+    with open_nc(nc_remote_url, block_size=block_size) as ds:
+        subset = ds[variables].isel(time=[index - 1 for index in indices])
+        subset.to_netcdf(nc_local_path)
+
+
+@contextmanager
+def open_nc(nc_href: str,
+            block_size: int = RANGE_BLOCKSIZE) -> Iterator[xarray.Dataset]:
+    """Opens a local or online NetCDF. Online NetCDFs are read lazily with
+    range requests and block caching, so only the byte ranges holding the data
+    that is accessed (and file metadata) are read.
+
+    Args:
+        nc_href (str): NetCDF location
+        block_size (int): size of range requests and cached blocks in bytes
+
+    Returns:
+        Iterator[xarray.Dataset]: the opened NetCDF
+    """
+    if urlparse(nc_href).scheme:
+        fs, path = get_filesystem(nc_href)
+        with fs.open(path, block_size=block_size,
+                     cache_type="blockcache") as source:
+            with xarray.open_dataset(source, engine="h5netcdf") as ds:
+                yield ds
+    else:
+        with xarray.open_dataset(nc_href) as ds:
+            yield ds
 
 
 def generate_years_months(start_month_str: str,
@@ -120,3 +905,45 @@ def generate_years_months(start_month_str: str,
         years_months.extend(month_list(end_year, end_year, 1, end_month))
 
     return years_months
+
+
+def parse_shard(shard_str: str) -> Tuple[int, int]:
+    """Parses a shard specification string.
+
+    Args:
+        shard_str (str): shard in "i/N" format, where i is the 1-based shard
+            index and N is the number of shards, e.g., "2/4"
+
+    Returns:
+        Tuple[int, int]: shard index and number of shards
+    """
+    try:
+        index_str, count_str = shard_str.split("/")
+        shard = (int(index_str), int(count_str))
+    except ValueError:
+        raise BadInput("Incorrect shard format, should be i/N")
+    if not 1 <= shard[0] <= shard[1]:
+        raise BadInput("Shard index must be between 1 and the shard count")
+    return shard
+
+
+def shard_list(values: List[Any], shard: Tuple[int, int]) -> List[Any]:
+    """Selects a deterministic, contiguous portion of a list, e.g., of months,
+    so that a Collection build can be split across machines. Concatenating
+    every shard in order reproduces the original list.
+
+    Args:
+        values (List[Any]): list to split
+        shard (Tuple[int, int]): 1-based shard index and number of shards
+
+    Returns:
+        List[Any]: the values in the shard
+    """
+    index, count = shard
+    if not 1 <= index <= count:
+        raise BadInput("Shard index must be between 1 and the shard count")
+    start = len(values) * (index - 1) // count
+    end = len(values) * index // count
+    if start == end:
+        raise BadInput(f"Shard {index}/{count} contains no months")
+    return values[start:end]
@@ -0,0 +1,219 @@
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from posixpath import join as urljoin
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from pystac import Item
+from stactools.core.io import ReadHrefModifier
+
+from stactools.nclimgrid.constants import POLL_INTERVAL, VARIABLES, Status
+from stactools.nclimgrid.daily_stac import (daily_items, daily_nc_href,
+                                            get_local_ncs, get_remote_ncs,
+                                            num_cog_prelim_days,
+                                            num_nc_prelim_days)
+from stactools.nclimgrid.errors import MaybeAsyncError
+from stactools.nclimgrid.index import add_to_index
+from stactools.nclimgrid.manifest import CogManifest
+from stactools.nclimgrid.signing import cache_read_href_modifier
+from stactools.nclimgrid.upload import CogUploader
+from stactools.nclimgrid.utils import get_filesystem
+
+logger = logging.getLogger(__name__)
+
+# file information fields identifying a version of a file, in order of
+# preference: HTTP and S3 ETags, HTTP and S3 modification times, local mtime
+FINGERPRINT_FIELDS = ["ETag", "Last-Modified", "LastModified", "mtime"]
+
+
+class DailyWatcher:
+    """Watches the preliminary daily NetCDF files of a month, which NOAA
+    updates in place as new days arrive, and creates daily Items for only the
+    days that have become valid since the last poll.
+
+    Each poll compares the ETag (or modification time) and size of each
+    variable's NetCDF with the previous poll. When they change, the NetCDFs
+    are read (downloaded, if remote), and COGs and Items are created only for
+    valid days after the last day already published. On the first poll of a
+    month, the days already published are those with existing COGs at
+    base_cog_href, so a restarted watcher resumes where it left off.
+
+    Args:
+        base_cog_href (str): COG storage location
+        base_nc_href (str): local path or remote url to the base of a NetCDF
+            directory structure
+        read_href_modifier (Optional[ReadHrefModifier]): argument to modify
+            remote hrefs
+        skip_unchanged (bool): option to skip creating COGs whose source data
+            is unchanged since the COG was last created
+        multiband (bool): option to store all variables in a single COG per
+            day rather than a COG per variable
+        quantized (bool): option to store each variable as int16 with a
+            scale and offset (see `utils.quantize`) rather than as float32
+        index_path (Optional[str]): optional local path of a SQLite index
+            in which to record the Items created by each poll (see
+            `index.ItemIndex`)
+    """
+
+    def __init__(self,
+                 base_cog_href: str,
+                 base_nc_href: str,
+                 read_href_modifier: Optional[ReadHrefModifier] = None,
+                 skip_unchanged: bool = False,
+                 multiband: bool = False,
+                 quantized: bool = False,
+                 index_path: Optional[str] = None) -> None:
+        self.base_cog_href = base_cog_href
+        self.base_nc_href = base_nc_href
+        self.read_href_modifier = cache_read_href_modifier(read_href_modifier)
+        self.skip_unchanged = skip_unchanged
+        self.multiband = multiband
+        self.quantized = quantized
+        self.index_path = index_path
+        # (year, month) -> NetCDF fingerprints at the last poll
+        self.fingerprints: Dict[Tuple[int, int], Dict[str, str]] = dict()
+        # (year, month) -> number of days with published Items
+        self.published_days: Dict[Tuple[int, int], int] = dict()
+
+    def poll(self, year: int, month: int) -> List[Item]:
+        """Checks a month's preliminary NetCDFs for changes, creating Items
+        (and COGs) for the days that have become valid.
+
+        Args:
+            year (int): year of interest (1970 to present)
+            month (int): month of interest
+
+        Returns:
+            List[Item]: Items for the newly valid days, empty if the NetCDFs
+                are unchanged or do not exist yet
+        """
+        try:
+            fingerprints = self.nc_fingerprints(year, month)
+        except FileNotFoundError:
+            return []
+        if fingerprints == self.fingerprints.get((year, month)):
+            return []
+
+        published_days = self.published_days.get((year, month))
+        if published_days is None:
+            published_days = num_cog_prelim_days(
+                year,
+                month,
+                self.base_cog_href,
+                read_href_modifier=self.read_href_modifier,
+                multiband=self.multiband)
+
+        manifest = None
+        if self.skip_unchanged:
+            manifest = CogManifest.from_base_cog_href(
+                self.base_cog_href, read_href_modifier=self.read_href_modifier)
+        uploader = None
+        if urlparse(self.base_cog_href).scheme:
+            uploader = CogUploader()
+
+        items = []
+        try:
+            with TemporaryDirectory() as temp_dir:
+                if urlparse(self.base_nc_href).scheme:
+                    nc_local_paths = get_remote_ncs(
+                        self.base_nc_href,
+                        temp_dir,
+                        year,
+                        month,
+                        Status.PRELIM,
+                        read_href_modifier=self.read_href_modifier)
+                else:
+                    nc_local_paths = get_local_ncs(self.base_nc_href, year,
+                                                   month, Status.PRELIM)
+                # NOAA may be partway through updating the variables; the
+                # fingerprints are not recorded, so the next poll checks again
+                try:
+                    num_days = num_nc_prelim_days(nc_local_paths)
+                except MaybeAsyncError as e:
+                    logger.warning(f"{year}{month:02d}: {e}")
+                    return []
+
+                for day in range(published_days + 1, num_days + 1):
+                    items.extend(
+                        daily_items(year,
+                                    month,
+                                    Status.PRELIM,
+                                    self.base_cog_href,
+                                    nc_local_paths=nc_local_paths,
+                                    day=day,
+                                    manifest=manifest,
+                                    uploader=uploader,
+                                    multiband=self.multiband,
+                                    quantized=self.quantized))
+        finally:
+            if manifest:
+                manifest.save()
+            if uploader:
+                uploader.close()
+
+        self.fingerprints[(year, month)] = fingerprints
+        self.published_days[(year, month)] = max(published_days, num_days)
+        add_to_index(self.index_path, items)
+        return items
+
+    def watch(self,
+              callback: Callable[[List[Item]], None],
+              interval: float = POLL_INTERVAL,
+              year: Optional[int] = None,
+              month: Optional[int] = None,
+              max_polls: Optional[int] = None) -> None:
+        """Polls for new days until interrupted, passing the Items created by
+        each poll to a callback.
+
+        Args:
+            callback (Callable[[List[Item]], None]): called with the Items
+                created by each poll that creates Items
+            interval (float): seconds between polls
+            year (Optional[int]): year to watch, defaults to the current year
+                (UTC) at each poll
+            month (Optional[int]): month to watch, defaults to the current
+                month (UTC) at each poll
+            max_polls (Optional[int]): optional number of polls after which to
+                stop
+        """
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            if polls:
+                time.sleep(interval)
+            now = datetime.now(timezone.utc)
+            items = self.poll(year or now.year, month or now.month)
+            if items:
+                callback(items)
+            polls += 1
+
+    def nc_fingerprints(self, year: int, month: int) -> Dict[str, str]:
+        """Identifies the current version of each variable's preliminary
+        NetCDF, without reading it.
+
+        Args:
+            year (int): data year
+            month (int): data month
+
+        Returns:
+            Dict[str, str]: version identifier of each NetCDF, keyed by
+                variable name
+        """
+        fingerprints = dict()
+        for var in VARIABLES:
+            nc_href_end = daily_nc_href(year, month, Status.PRELIM, var)
+            if urlparse(self.base_nc_href).scheme:
+                nc_href = urljoin(self.base_nc_href, nc_href_end)
+                if self.read_href_modifier:
+                    nc_href = self.read_href_modifier(nc_href)
+            else:
+                nc_href = os.path.join(self.base_nc_href, nc_href_end)
+            fs, path = get_filesystem(nc_href)
+            info = fs.info(path)
+            version = next(
+                (info[field] for field in FINGERPRINT_FIELDS if field in info),
+                "")
+            fingerprints[var] = f"{version}:{info.get('size')}"
+        return fingerprints
@@ -0,0 +1,114 @@
+import hashlib
+import itertools
+import os
+import re
+import threading
+from contextlib import contextmanager
+from email.utils import formatdate
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Serves files from a directory, supporting single byte range requests
+    and counting the number of file bytes sent and connections accepted.
+    Connections are kept alive between requests. Responses carry an ETag (the
+    file's MD5 digest, unless the server's etag is set) and a Last-Modified
+    time. If the server's drop_every is set, every drop_every-th GET response
+    is cut off halfway through by closing the connection. If the server's
+    get_error is set, GET requests fail with that status."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1  # type: ignore
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def send_validators(self, path: str) -> None:
+        etag = self.server.etag  # type: ignore
+        if etag is None:
+            with open(path, "rb") as f:
+                etag = hashlib.md5(f.read()).hexdigest()
+        self.send_header("ETag", f'"{etag}"')
+        self.send_header("Last-Modified",
+                         formatdate(os.path.getmtime(path), usegmt=True))
+
+    def do_GET(self) -> None:
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        get_error = self.server.get_error  # type: ignore
+        if get_error:
+            next(self.server.gets)  # type: ignore
+            self.send_error(get_error)
+            return
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = RANGE_PATTERN.fullmatch(self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)), size - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_validators(path)
+        self.end_headers()
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start + 1)
+        drop_every = self.server.drop_every  # type: ignore
+        count = next(self.server.gets)  # type: ignore
+        if drop_every and count % drop_every == 0:
+            data = data[:len(data) // 2]
+            self.close_connection = True
+        self.server.bytes_sent += len(data)  # type: ignore
+        self.wfile.write(data)
+
+    def do_HEAD(self) -> None:
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.send_validators(path)
+        self.end_headers()
+
+
+@contextmanager
+def serve_directory(directory: str,
+                    drop_every: int = 0) -> Iterator[ThreadingHTTPServer]:
+    """Serves a directory over HTTP on a local port for the duration of the
+    context. The base url is available as the server's `url` attribute. If
+    drop_every is set, every drop_every-th GET response is cut off. The
+    server's etag and get_error attributes may be set to serve a fixed ETag
+    or failing GET requests."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                 partial(RangeRequestHandler,
+                                         directory=directory))
+    server.bytes_sent = 0  # type: ignore
+    server.connections = 0  # type: ignore
+    server.drop_every = drop_every  # type: ignore
+    server.etag = None  # type: ignore
+    server.get_error = 0  # type: ignore
+    server.gets = itertools.count(1)  # type: ignore
+    server.url = f"http://127.0.0.1:{server.server_port}"  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,59 @@
+from typing import Any, Callable, Optional, Sequence
+
+import netCDF4
+import numpy
+import pandas
+
+from stactools.nclimgrid.constants import SHAPE
+
+TIME_UNITS = "days since 1800-01-01"
+
+
+def write_synthetic_nc(path: str,
+                       variables: Sequence[str],
+                       num_times: int,
+                       time_slice: Callable[[str, int], Any],
+                       start: str = "1895-01-01",
+                       freq: str = "MS",
+                       lat: Optional[Sequence[float]] = None,
+                       lon: Optional[Sequence[float]] = None) -> None:
+    """Writes a synthetic NetCDF laid out like the NClimGrid NetCDFs: float32
+    variables on (time, lat, lon) with one zlib chunk per time slice and
+    descending latitudes. Time slices are written one at a time, so full-size
+    files can be written without holding all of their data in memory.
+
+    Args:
+        path (str): Path of the NetCDF to write.
+        variables (Sequence[str]): Names of the variables to write.
+        num_times (int): Number of time slices.
+        time_slice (Callable[[str, int], Any]): Returns the data of a
+            variable at a 0-based time index, as a (lat, lon) array or a
+            scalar filling the slice.
+        start (str): Date of the first time slice.
+        freq (str): Pandas frequency of the time slices.
+        lat (Optional[Sequence[float]]): Latitudes, defaulting to the
+            full-size NClimGrid grid.
+        lon (Optional[Sequence[float]]): Longitudes, defaulting to the
+            full-size NClimGrid grid.
+    """
+    lats = numpy.linspace(49.3542, 24.5625,
+                          SHAPE[1]) if lat is None else numpy.asarray(lat)
+    lons = numpy.linspace(-124.6875, -67.0208,
+                          SHAPE[0]) if lon is None else numpy.asarray(lon)
+    times = pandas.date_range(start, periods=num_times, freq=freq)
+    with netCDF4.Dataset(path, "w") as nc:
+        nc.createDimension("time", num_times)
+        nc.createDimension("lat", len(lats))
+        nc.createDimension("lon", len(lons))
+        time = nc.createVariable("time", "f8", ("time", ))
+        time.units = TIME_UNITS
+        time[:] = netCDF4.date2num(times.to_pydatetime(), TIME_UNITS)
+        nc.createVariable("lat", "f4", ("lat", ))[:] = lats
+        nc.createVariable("lon", "f4", ("lon", ))[:] = lons
+        for var in variables:
+            data = nc.createVariable(var,
+                                     "f4", ("time", "lat", "lon"),
+                                     zlib=True,
+                                     chunksizes=(1, len(lats), len(lons)))
+            for index in range(num_times):
+                data[index] = time_slice(var, index)
@@ -0,0 +1,121 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy
+import xarray
+
+from stactools.nclimgrid import aggregate, monthly_stac
+from stactools.nclimgrid.errors import BadInput
+from tests.test_watch import NC_DIR, append_day
+
+# approximately Kansas
+BBOX = [-102.03, 37.01, -94.61, 39.98]
+POLYGON = {
+    "type":
+    "Polygon",
+    "coordinates": [[[-102.03, 37.01], [-94.61, 37.01], [-94.61, 39.98],
+                     [-102.03, 37.01]]]
+}
+
+
+class AreaAggregateTest(unittest.TestCase):
+
+    def test_area_mask(self):
+        bounds, mask = aggregate.area_mask(BBOX)
+        self.assertEqual(mask.shape,
+                         (bounds[1] - bounds[0], bounds[3] - bounds[2]))
+        self.assertTrue(mask.all())
+        self.assertIs(aggregate.area_mask(list(BBOX))[1], mask)
+
+        _, triangle = aggregate.area_mask(POLYGON)
+        self.assertLess(triangle.sum(), mask.sum() * 0.6)
+
+        _, tiny = aggregate.area_mask([-95.001, 39.001, -95.0, 39.002])
+        self.assertEqual(tiny.sum(), 1)
+        with self.assertRaises(BadInput):
+            aggregate.area_mask([0.0, 0.0, 1.0, 1.0])
+
+    def test_monthly_nc_matches_cogs(self):
+        base_nc_href = "tests/test-data/netcdf/monthly"
+        from_ncs = list(
+            aggregate.monthly_area_means(BBOX,
+                                         "189501",
+                                         "189502",
+                                         base_nc_href=base_nc_href))
+        self.assertEqual([time.month for time, _ in from_ncs], [1, 2])
+        with xarray.open_dataset(
+                os.path.join(base_nc_href, "nclimgrid_tavg.nc")) as ds:
+            expected = ds["tavg"].sel(
+                lat=slice(BBOX[3], BBOX[1]),
+                lon=slice(BBOX[0], BBOX[2])).mean(dim=["lat", "lon"]).values
+        numpy.testing.assert_allclose([means["tavg"] for _, means in from_ncs],
+                                      expected)
+
+        with TemporaryDirectory() as temp_dir:
+            monthly_stac.create_monthly_items("189501",
+                                              "189502",
+                                              temp_dir,
+                                              base_nc_href=base_nc_href)
+            from_cogs = list(
+                aggregate.monthly_area_means(BBOX,
+                                             "189501",
+                                             "189502",
+                                             base_cog_href=temp_dir,
+                                             batch_size=1))
+        self.assertEqual([time for time, _ in from_cogs],
+                         [time for time, _ in from_ncs])
+        for (_, cog_means), (_, nc_means) in zip(from_cogs, from_ncs):
+            for var, mean in nc_means.items():
+                self.assertAlmostEqual(cog_means[var], mean, places=4)
+
+    def test_daily_nc_matches_cogs(self):
+        from_cogs = list(
+            aggregate.daily_area_means(
+                POLYGON,
+                "202201",
+                "202201",
+                "prelim",
+                base_cog_href="tests/test-data/cog/daily"))
+        from_ncs = list(
+            aggregate.daily_area_means(
+                POLYGON,
+                "202201",
+                "202201",
+                "prelim",
+                base_nc_href="tests/test-data/netcdf/daily"))
+
+        self.assertEqual(len(from_cogs), 1)
+        self.assertEqual(list(from_cogs[0][1]),
+                         ["prcp", "tavg", "tmax", "tmin"])
+        self.assertEqual(from_cogs[0][0], from_ncs[0][0])
+        for var, mean in from_ncs[0][1].items():
+            self.assertAlmostEqual(from_cogs[0][1][var], mean, places=4)
+
+    def test_daily_nc_reads_common_days(self):
+        with TemporaryDirectory() as temp_dir:
+            shutil.copytree("tests/test-data/netcdf/daily",
+                            os.path.join(temp_dir, "daily"))
+            # a prcp NetCDF from a later update, holding one more day
+            append_day(
+                os.path.join(
+                    temp_dir, "daily",
+                    os.path.relpath(NC_DIR, "tests/test-data/netcdf/daily"),
+                    "prcp-202201-grd-prelim.nc"), "prcp")
+            means = list(
+                aggregate.daily_area_means(POLYGON,
+                                           "202201",
+                                           "202201",
+                                           "prelim",
+                                           base_nc_href=os.path.join(
+                                               temp_dir, "daily")))
+
+        self.assertEqual([time.day for time, _ in means], [1])
+
+    def test_masked_means(self):
+        batch = numpy.array([[[1.0, 2.0], [-999.0, 4.0]],
+                             [[numpy.nan, numpy.nan], [-999.0, 8.0]]])
+        mask = numpy.array([[True, True], [True, False]])
+        numpy.testing.assert_equal(aggregate.masked_means(batch, mask),
+                                   [1.5, numpy.nan])
@@ -1,9 +1,20 @@
 import glob
 import os
+import shutil
+import subprocess
+import sys
 import unittest
 from tempfile import TemporaryDirectory
 
+import netCDF4
+
 from stactools.nclimgrid import constants, daily_stac
+from stactools.nclimgrid.constants import SHAPE, VARIABLES
+from stactools.nclimgrid.errors import BadInput, ExistError
+from stactools.nclimgrid.memory import MemoryMonitor
+from stactools.nclimgrid.utils import REDUCTION_MEMORY_LIMIT
+from tests.http_server import serve_directory
+from tests.synthetic_nc import write_synthetic_nc
 
 
 class DailyStacTestLocal(unittest.TestCase):
@@ -33,6 +44,29 @@ class DailyStacTestLocal(unittest.TestCase):
         self.assertEqual(items[0].id, f"{year}{month:02d}-grd-scaled-01")
         self.assertEqual(len(items[0].assets), 4)
 
+    def test_create_singleitem_pre1970_createcogs_range_read(self):
+        year = 1951
+        month = 1
+        day = 1
+        scaled_or_prelim = constants.Status.SCALED
+
+        with serve_directory('tests/test-data/netcdf/daily') as server, \
+                TemporaryDirectory() as temp_dir:
+            base_cog_href = temp_dir
+            items = daily_stac.create_daily_items(year,
+                                                  month,
+                                                  scaled_or_prelim,
+                                                  base_cog_href,
+                                                  base_nc_href=server.url,
+                                                  day=day,
+                                                  range_read=True)
+            num_cogs = len(glob.glob(os.path.join(base_cog_href, "*.tif")))
+
+        self.assertEqual(num_cogs, 4)
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0].id, f"{year}{month:02d}-grd-scaled-01")
+        self.assertEqual(len(items[0].assets), 4)
+
     def test_create_singleitem_pre1970_existingcogs(self):
         base_cog_href = 'tests/test-data/cog/daily'
         year = 1951
@@ -121,6 +155,148 @@ class DailyStacTestLocal(unittest.TestCase):
         self.assertEqual(items[0].id, f"{year}{month:02d}-grd-prelim-01")
         self.assertEqual(len(items[0].assets), 4)
 
+    def test_create_singleitem_prelim_day_without_data(self):
+        base_nc_href = 'tests/test-data/netcdf/daily'
+        year = 2022
+        month = 1
+        scaled_or_prelim = constants.Status.PRELIM
+
+        nc_local_paths = daily_stac.get_local_ncs(base_nc_href, year, month,
+                                                  scaled_or_prelim)
+        self.assertTrue(daily_stac.nc_prelim_day_is_valid(nc_local_paths, 1))
+        self.assertFalse(daily_stac.nc_prelim_day_is_valid(nc_local_paths, 2))
+
+        with TemporaryDirectory() as temp_dir:
+            with self.assertRaises(ExistError):
+                daily_stac.create_daily_items(year,
+                                              month,
+                                              scaled_or_prelim,
+                                              temp_dir,
+                                              base_nc_href=base_nc_href,
+                                              day=2)
+            num_cogs = len(glob.glob(os.path.join(temp_dir, "*.tif")))
+        with self.assertRaises(ExistError):
+            daily_stac.create_daily_items(year,
+                                          month,
+                                          scaled_or_prelim,
+                                          'tests/test-data/cog/daily',
+                                          day=2)
+
+        self.assertEqual(num_cogs, 0)
+
+    def test_create_singleitem_skip_unchanged(self):
+        base_nc_href = 'tests/test-data/netcdf/daily'
+        year = 2022
+        month = 1
+        day = 1
+        scaled_or_prelim = constants.Status.PRELIM
+
+        with TemporaryDirectory() as temp_dir:
+            base_cog_href = temp_dir
+            daily_stac.create_daily_items(year,
+                                          month,
+                                          scaled_or_prelim,
+                                          base_cog_href,
+                                          base_nc_href=base_nc_href,
+                                          day=day,
+                                          skip_unchanged=True)
+            cog_paths = glob.glob(os.path.join(base_cog_href, "*.tif"))
+            mtimes = {path: os.path.getmtime(path) for path in cog_paths}
+
+            items = daily_stac.create_daily_items(year,
+                                                  month,
+                                                  scaled_or_prelim,
+                                                  base_cog_href,
+                                                  base_nc_href=base_nc_href,
+                                                  day=day,
+                                                  skip_unchanged=True)
+            remtimes = {path: os.path.getmtime(path) for path in cog_paths}
+
+        self.assertEqual(len(cog_paths), 4)
+        self.assertEqual(mtimes, remtimes)
+        self.assertEqual(len(items[0].assets), 4)
+
+    def test_create_items_changed_only(self):
+        with TemporaryDirectory() as temp_dir:
+            base_nc_href = os.path.join(temp_dir, "netcdf")
+            base_cog_href = os.path.join(temp_dir, "cog")
+            nc_dir = os.path.join(base_nc_href, "beta/by-month/2022/01")
+            shutil.copytree(
+                "tests/test-data/netcdf/daily/beta/by-month/2022/01", nc_dir)
+            os.makedirs(base_cog_href)
+            cog_path = os.path.join(base_cog_href,
+                                    "tmax-202201-grd-prelim-01.tif")
+
+            def create_items():
+                return [
+                    item.id for item in daily_stac.create_daily_items(
+                        2022,
+                        1,
+                        "prelim",
+                        base_cog_href,
+                        base_nc_href=base_nc_href,
+                        changed_only=True)
+                ]
+
+            first_ids = create_items()
+            mtime = os.path.getmtime(cog_path)
+            unchanged_ids = create_items()
+            unchanged_mtime = os.path.getmtime(cog_path)
+
+            # revise the first day and append a second
+            for var in VARIABLES:
+                with netCDF4.Dataset(
+                        os.path.join(nc_dir, f"{var}-202201-grd-prelim.nc"),
+                        "a") as nc:
+                    nc["time"][1] = nc["time"][0] + 1
+                    nc[var][1] = nc[var][0]
+                    if var == "tmax":
+                        nc[var][0] = nc[var][0] + 1
+            changed_ids = create_items()
+            changed_mtime = os.path.getmtime(cog_path)
+
+            self.assertTrue(
+                os.path.exists(
+                    os.path.join(base_cog_href,
+                                 "nclimgrid-slice-hashes.json")))
+
+        self.assertEqual(first_ids, ["202201-grd-prelim-01"])
+        self.assertEqual(unchanged_ids, [])
+        self.assertEqual(mtime, unchanged_mtime)
+        self.assertEqual(changed_ids,
+                         ["202201-grd-prelim-01", "202201-grd-prelim-02"])
+        self.assertNotEqual(mtime, changed_mtime)
+
+    def test_create_collection_changed_only(self):
+        with TemporaryDirectory() as temp_dir:
+            base_cog_href = os.path.join(temp_dir, "cog")
+            os.makedirs(base_cog_href)
+
+            def create_collection():
+                return daily_stac.create_daily_collection(
+                    "202201",
+                    "202201",
+                    "prelim",
+                    base_cog_href,
+                    base_nc_href="tests/test-data/netcdf/daily",
+                    changed_only=True)
+
+            collection = create_collection()
+            with self.assertRaises(ExistError):
+                create_collection()
+            with self.assertRaises(BadInput):
+                daily_stac.create_daily_collection(
+                    "202201",
+                    "202201",
+                    "prelim",
+                    base_cog_href,
+                    base_nc_href="tests/test-data/netcdf/daily",
+                    pipelined=True,
+                    changed_only=True)
+
+        self.assertEqual([item.id for item in collection.get_all_items()],
+                         ["202201-grd-prelim-01"])
+
     def test_create_collection_prelim_createcogs(self):
         start_yyyymm = "202201"
         end_yyyymm = "202201"
@@ -144,6 +320,71 @@ class DailyStacTestLocal(unittest.TestCase):
         self.assertEqual(num_cogs, 4)
         self.assertEqual(len(list(collection.get_all_items())), 1)
         self.assertEqual(collection.id, "nclimgrid-daily")
+        # statistics differ between Items, so only Items carry them
+        item = next(collection.get_all_items())
+        self.assertIn("statistics",
+                      item.assets["prcp-cog"].to_dict()["raster:bands"][0])
+        for definition in collection.extra_fields["item_assets"].values():
+            for band in definition.get("raster:bands", []):
+                self.assertNotIn("statistics", band)
+
+    def test_create_collection_prelim_createcogs_pipelined(self):
+        start_yyyymm = "202201"
+        end_yyyymm = "202201"
+        scaled_or_prelim = constants.Status.PRELIM
+        base_nc_href = 'tests/test-data/netcdf/daily'
+        destination = "test_collection"
+
+        with TemporaryDirectory() as temp_dir:
+            base_cog_href = temp_dir
+            collection = daily_stac.create_daily_collection(
+                start_yyyymm,
+                end_yyyymm,
+                scaled_or_prelim,
+                base_cog_href,
+                base_nc_href=base_nc_href,
+                pipelined=True)
+            num_cogs = len(glob.glob(os.path.join(base_cog_href, "*.tif")))
+
+        collection.normalize_hrefs(destination)
+        collection.validate()
+
+        items = list(collection.get_all_items())
+        self.assertEqual(num_cogs, 4)
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0].id, "202201-grd-prelim-01")
+        self.assertEqual(len(items[0].assets), 4)
+
+    def test_create_collection_prelim_multiband(self):
+        start_yyyymm = "202201"
+        end_yyyymm = "202201"
+        scaled_or_prelim = constants.Status.PRELIM
+        base_nc_href = 'tests/test-data/netcdf/daily'
+
+        with TemporaryDirectory() as temp_dir:
+            base_cog_href = temp_dir
+            collection = daily_stac.create_daily_collection(
+                start_yyyymm,
+                end_yyyymm,
+                scaled_or_prelim,
+                base_cog_href,
+                base_nc_href=base_nc_href,
+                multiband=True)
+            cog_paths = glob.glob(os.path.join(base_cog_href, "*.tif"))
+            existing = daily_stac.create_daily_collection(start_yyyymm,
+                                                          end_yyyymm,
+                                                          scaled_or_prelim,
+                                                          base_cog_href,
+                                                          multiband=True)
+
+        items = list(collection.get_all_items())
+        self.assertEqual([os.path.basename(path) for path in cog_paths],
+                         ["202201-grd-prelim-01.tif"])
+        self.assertEqual(len(items), 1)
+        self.assertEqual(list(items[0].assets), ["cog"])
+        self.assertEqual(len(items[0].assets["cog"].extra_fields["eo:bands"]),
+                         4)
+        self.assertEqual(len(list(existing.get_all_items())), 1)
 
     def test_create_collection_prelim_existingcogs(self):
         base_cog_href = 'tests/test-data/cog/daily'
@@ -161,6 +402,229 @@ class DailyStacTestLocal(unittest.TestCase):
         self.assertEqual(len(list(collection.get_all_items())), 1)
         self.assertEqual(collection.id, "nclimgrid-daily")
 
+    def test_create_items_existingcogs_online(self):
+        with TemporaryDirectory() as temp_dir:
+            # a month of COGs, copied from the first day
+            for var in VARIABLES:
+                for day in range(1, 32):
+                    shutil.copy(
+                        f"tests/test-data/cog/daily/"
+                        f"{var}-195101-grd-scaled-01.tif",
+                        os.path.join(temp_dir,
+                                     f"{var}-195101-grd-scaled-{day:02d}.tif"))
+
+            with serve_directory(temp_dir) as server:
+                items = daily_stac.create_daily_items(1951, 1, "scaled",
+                                                      server.url)
+
+        # existence checks reuse a single pooled connection
+        self.assertEqual(len(items), 31)
+        self.assertEqual(server.connections, 1)
+
+    def test_create_items_batch(self):
+        # the scaled test NetCDF holds a single day, so the prelim month is
+        # created twice
+        units = [(2022, 1, "prelim"), (2022, 1, constants.Status.PRELIM)]
+        with serve_directory('tests/test-data/netcdf/daily') as server, \
+                TemporaryDirectory() as temp_dir:
+            batch = daily_stac.create_daily_items_batch(
+                units, temp_dir, base_nc_href=server.url)
+            # Items are generated as each month is created
+            first = next(batch)
+            self.assertEqual(first.id, "202201-grd-prelim-01")
+            items = [first] + list(batch)
+            num_cogs = len(glob.glob(os.path.join(temp_dir, "*.tif")))
+
+            expected = []
+            for year, month, status in units:
+                expected.extend(
+                    daily_stac.create_daily_items(
+                        year,
+                        month,
+                        status,
+                        temp_dir,
+                        base_nc_href='tests/test-data/netcdf/daily'))
+
+        self.assertEqual(num_cogs, 4)
+        self.assertEqual(len(items), 2)
+        self.assertEqual([item.to_dict() for item in items],
+                         [item.to_dict() for item in expected])
+
+
+# default netCDF-C chunk cache size
+NETCDF_CHUNK_CACHE_MIB = 64
+
+# peak RSS growth, in MiB, of num_nc_prelim_days; the peak (VmHWM) is reset
+# before the call through /proc/self/clear_refs
+PEAK_RSS_SCRIPT = """
+import sys
+
+from stactools.nclimgrid import daily_stac
+from stactools.nclimgrid.constants import VARIABLES
+
+
+def status_kib(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+
+
+nc_local_paths = {var: sys.argv[1] for var in VARIABLES}
+daily_stac.num_nc_prelim_days(nc_local_paths, memory_limit=1)
+with open("/proc/self/clear_refs", "w") as f:
+    f.write("5")
+before = status_kib("VmRSS:")
+num_days = daily_stac.num_nc_prelim_days(nc_local_paths,
+                                         memory_limit=int(sys.argv[2]))
+print(num_days, (status_kib("VmHWM:") - before) / 1024)
+"""
+
+
+def write_synthetic_month(nc_path: str, num_days: int,
+                          num_valid_days: int) -> None:
+    """Writes a full-size NetCDF month of all variables, with nodata (-999)
+    after the valid days."""
+    write_synthetic_nc(nc_path,
+                       VARIABLES,
+                       num_days,
+                       lambda var, day: 10.0
+                       if day < num_valid_days else -999.0,
+                       start="2022-01-01",
+                       freq="D")
+
+
+@unittest.skipUnless(os.path.exists("/proc/self/clear_refs"),
+                     "peak RSS can only be reset on Linux")
+class PrelimDaysMemoryTest(unittest.TestCase):
+
+    def peak_rss_growth(self, nc_path: str, memory_limit: int):
+        result = subprocess.run([
+            sys.executable, "-c", PEAK_RSS_SCRIPT, nc_path,
+            str(memory_limit)
+        ],
+                                capture_output=True,
+                                text=True,
+                                check=True)
+        num_days, growth = result.stdout.split()
+        return int(num_days), float(growth)
+
+    def test_num_nc_prelim_days_memory_ceiling(self):
+        memory_limit = 2**25
+        with TemporaryDirectory() as temp_dir:
+            nc_path = os.path.join(temp_dir, "month.nc")
+            write_synthetic_month(nc_path, 31, 20)
+            num_days, growth = self.peak_rss_growth(nc_path, memory_limit)
+            _, unbounded_growth = self.peak_rss_growth(nc_path, 2**40)
+
+        # the NetCDF library's chunk cache is allocated regardless of chunking
+        ceiling = memory_limit / 2**20 + NETCDF_CHUNK_CACHE_MIB
+        self.assertEqual(num_days, 20)
+        self.assertLess(growth, ceiling)
+        # reducing the whole month at once exceeds the ceiling
+        self.assertGreater(unbounded_growth, ceiling)
+
+
+# bytes in a full-size float32 time slice of a variable
+SLICE_BYTES = SHAPE[0] * SHAPE[1] * 4
+# Python allocations: a chunk of time slices being reduced (see
+# `daily_stac.num_nc_prelim_days`) and a few slices being cogged
+PYTHON_CEILING = REDUCTION_MEMORY_LIMIT + 8 * SLICE_BYTES
+# resident set: the Python ceiling, the NetCDF library's chunk cache, and
+# native library overheads. Holding a full-size month of all variables takes
+# 31 * 4 * SLICE_BYTES, about 400 MiB.
+RSS_CEILING = PYTHON_CEILING + (NETCDF_CHUNK_CACHE_MIB + 64) * 2**20
+
+
+@unittest.skipUnless(os.path.exists("/proc/self/clear_refs"),
+                     "peak RSS can only be reset on Linux")
+class DailyBuildMemoryTest(unittest.TestCase):
+    """Checks that peak memory use while creating COGs and Items from
+    full-size NetCDFs is independent of the number of days and months built,
+    i.e., that NetCDFs are not held in memory. Only the first days of each
+    synthetic month are valid, keeping COG creation short."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = TemporaryDirectory()
+        cls.nc_path = os.path.join(cls.temp_dir.name, "month.nc")
+        write_synthetic_month(cls.nc_path, 31, 2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def base_nc_href(self, temp_dir: str, num_months: int) -> str:
+        """Links the synthetic month into a prelim NetCDF directory structure
+        for each month of 2022."""
+        base_nc_href = os.path.join(temp_dir, "nc")
+        for month in range(1, num_months + 1):
+            for var in VARIABLES:
+                nc_href = os.path.join(
+                    base_nc_href,
+                    daily_stac.daily_nc_href(2022, month,
+                                             constants.Status.PRELIM, var))
+                os.makedirs(os.path.dirname(nc_href), exist_ok=True)
+                os.symlink(self.nc_path, nc_href)
+        return base_nc_href
+
+    def assert_ceilings(self, monitor: MemoryMonitor) -> None:
+        for name, peak in monitor.peaks.items():
+            with self.subTest(stage=name):
+                self.assertLess(peak.python, PYTHON_CEILING)
+                self.assertLess(peak.rss, RSS_CEILING)
+
+    def test_day_memory_ceiling(self):
+        with TemporaryDirectory() as temp_dir:
+            base_nc_href = self.base_nc_href(temp_dir, 1)
+            with MemoryMonitor() as monitor:
+                with monitor.stage("build"):
+                    items = daily_stac.create_daily_items(
+                        2022,
+                        1,
+                        "prelim",
+                        temp_dir,
+                        base_nc_href=base_nc_href,
+                        day=2)
+
+        self.assertEqual(len(items), 1)
+        self.assertEqual(list(monitor.peaks), ["build"])
+        self.assert_ceilings(monitor)
+
+    def test_month_memory_ceiling(self):
+        with TemporaryDirectory() as temp_dir:
+            base_nc_href = self.base_nc_href(temp_dir, 1)
+            with MemoryMonitor() as monitor:
+                collection = daily_stac.create_daily_collection(
+                    "202201",
+                    "202201",
+                    "prelim",
+                    temp_dir,
+                    base_nc_href=base_nc_href,
+                    pipelined=True,
+                    monitor=monitor)
+
+        self.assertEqual(len(list(collection.get_all_items())), 2)
+        self.assertEqual(sorted(monitor.peaks),
+                         ["assemble", "encode", "fetch", "store"])
+        self.assert_ceilings(monitor)
+
+    def test_year_memory_ceiling(self):
+        with TemporaryDirectory() as temp_dir:
+            base_nc_href = self.base_nc_href(temp_dir, 12)
+            with MemoryMonitor() as monitor:
+                collection = daily_stac.create_daily_collection(
+                    "202201",
+                    "202212",
+                    "prelim",
+                    temp_dir,
+                    base_nc_href=base_nc_href,
+                    monitor=monitor)
+
+        self.assertEqual(len(list(collection.get_all_items())), 24)
+        self.assertEqual(sorted(monitor.peaks), ["encode", "fetch"])
+        self.assert_ceilings(monitor)
+
 
 # --Remote Data Tests: Not used for GitHub CI--
 # class DailyStacTestRemote(unittest.TestCase):
@@ -0,0 +1,130 @@
+import os
+import shutil
+import unittest
+from datetime import date
+from tempfile import TemporaryDirectory
+
+from stactools.nclimgrid import daily_stac, monthly_stac
+from stactools.nclimgrid.constants import VARIABLES, Status
+from stactools.nclimgrid.index import ItemIndex
+from stactools.nclimgrid.merge import merge_items
+
+BASE_COG_HREF = "tests/test-data/cog/daily"
+
+
+def copy_scaled_cogs(cog_dir: str) -> None:
+    """Copies the 2022-01-01 prelim COGs as scaled COGs."""
+    for var in VARIABLES:
+        shutil.copy(
+            os.path.join(BASE_COG_HREF, f"{var}-202201-grd-prelim-01.tif"),
+            os.path.join(cog_dir, f"{var}-202201-grd-scaled-01.tif"))
+
+
+class ItemIndexTest(unittest.TestCase):
+
+    def test_daily(self):
+        with TemporaryDirectory() as temp_dir:
+            index_path = os.path.join(temp_dir, "items.db")
+            prelim_items = daily_stac.create_daily_items(2022,
+                                                         1,
+                                                         Status.PRELIM,
+                                                         BASE_COG_HREF,
+                                                         day=1,
+                                                         index_path=index_path)
+            copy_scaled_cogs(temp_dir)
+            scaled_items = daily_stac.create_daily_items(2022,
+                                                         1,
+                                                         Status.SCALED,
+                                                         temp_dir,
+                                                         day=1)
+
+            with ItemIndex(index_path) as item_index:
+                # re-adding an Item replaces it
+                self.assertEqual(item_index.add(prelim_items + scaled_items),
+                                 2)
+                all_ids = item_index.ids("daily")
+                preferred_ids = item_index.ids("daily", preferred=True)
+                prelim_ids = item_index.ids("daily", status="prelim")
+                statuses = item_index.statuses()
+                missing = item_index.missing_days(date(2022, 1, 1),
+                                                  date(2022, 1, 3))
+                missing_scaled = item_index.missing_days(date(2021, 12, 31),
+                                                         date(2022, 1, 1),
+                                                         status=Status.SCALED)
+                record = item_index.get("202201-grd-prelim-01")
+                self.assertIsNone(item_index.get("202201-grd-prelim-02"))
+                self.assertEqual(item_index.ids("monthly"), [])
+
+        self.assertEqual(all_ids,
+                         ["202201-grd-prelim-01", "202201-grd-scaled-01"])
+        self.assertEqual(preferred_ids, ["202201-grd-scaled-01"])
+        self.assertEqual(prelim_ids, ["202201-grd-prelim-01"])
+        self.assertEqual(statuses, {date(2022, 1, 1): ["prelim", "scaled"]})
+        self.assertEqual(missing, [date(2022, 1, 2), date(2022, 1, 3)])
+        self.assertEqual(missing_scaled, [date(2021, 12, 31)])
+        self.assertEqual(record["cadence"], "daily")
+        self.assertEqual(record["start_date"], "2022-01-01")
+        self.assertEqual(record["status"], "prelim")
+        self.assertEqual(record["assets"], {
+            key: asset.href
+            for key, asset in prelim_items[0].assets.items()
+        })
+
+    def test_monthly(self):
+        with TemporaryDirectory() as temp_dir:
+            index_path = os.path.join(temp_dir, "items.db")
+            monthly_stac.create_monthly_collection(
+                "189501",
+                "189502",
+                temp_dir,
+                base_nc_href="tests/test-data/netcdf/monthly",
+                index_path=index_path)
+
+            with ItemIndex(index_path) as item_index:
+                ids = item_index.ids("monthly",
+                                     start=date(1895, 2, 1),
+                                     end=date(1895, 3, 1))
+                missing = item_index.missing_months("189412", "189503")
+
+        self.assertEqual(ids, ["nclimgrid-189502"])
+        self.assertEqual(missing, [(1894, 12), (1895, 3)])
+
+    def test_merge_items(self):
+        with TemporaryDirectory() as temp_dir:
+            index_path = os.path.join(temp_dir, "items.db")
+            prelim_item = daily_stac.create_daily_items(2022,
+                                                        1,
+                                                        Status.PRELIM,
+                                                        BASE_COG_HREF,
+                                                        day=1)[0]
+            prelim_dir = os.path.join(temp_dir, "prelim")
+            prelim_item.set_self_href(
+                os.path.join(prelim_dir, f"{prelim_item.id}.json"))
+            prelim_item.make_asset_hrefs_relative()
+            prelim_item.save_object(include_self_link=False)
+            scaled_dir = os.path.join(temp_dir, "scaled")
+            os.makedirs(scaled_dir)
+            copy_scaled_cogs(scaled_dir)
+            scaled_item = daily_stac.create_daily_items(2022,
+                                                        1,
+                                                        Status.SCALED,
+                                                        scaled_dir,
+                                                        day=1)[0]
+            scaled_item.set_self_href(
+                os.path.join(scaled_dir, f"{scaled_item.id}.json"))
+            scaled_item.save_object(include_self_link=False)
+
+            merge_items([prelim_dir, scaled_dir],
+                        os.path.join(temp_dir, "merged"),
+                        index_path=index_path)
+
+            with ItemIndex(index_path) as item_index:
+                ids = item_index.ids("daily")
+                record = item_index.get(scaled_item.id)
+
+        self.assertEqual(ids, [scaled_item.id])
+        self.assertEqual(
+            record["assets"], {
+                key: os.path.abspath(asset.href)
+                for key, asset in scaled_item.assets.items()
+            })
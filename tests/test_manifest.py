@@ -0,0 +1,121 @@
+import os
+import subprocess
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import numpy
+import rasterio
+
+from stactools.nclimgrid.constants import VARIABLES
+from stactools.nclimgrid.manifest import (MANIFEST_FILENAME, CogManifest,
+                                          cog_ncs_if_changed)
+
+NC_PATHS = {
+    var:
+    f"tests/test-data/netcdf/daily/beta/by-month/2022/01/"
+    f"{var}-202201-grd-prelim.nc"
+    for var in VARIABLES
+}
+
+
+class CogManifestTest(unittest.TestCase):
+
+    def test_unchanged_after_save_and_read(self):
+        with TemporaryDirectory() as temp_dir:
+            cog_href = os.path.join(temp_dir, "prcp-202201-grd-prelim-01.tif")
+            with open(cog_href, "wb") as f:
+                f.write(b"cog")
+
+            manifest = CogManifest.from_base_cog_href(temp_dir)
+            self.assertFalse(manifest.is_unchanged(cog_href, "abc"))
+            manifest.update(cog_href, "abc")
+            manifest.save()
+            self.assertTrue(
+                os.path.exists(os.path.join(temp_dir, MANIFEST_FILENAME)))
+
+            manifest = CogManifest.from_base_cog_href(temp_dir)
+            self.assertTrue(manifest.is_unchanged(cog_href, "abc"))
+            self.assertFalse(manifest.is_unchanged(cog_href, "def"))
+
+    def test_changed_cog(self):
+        with TemporaryDirectory() as temp_dir:
+            cog_href = os.path.join(temp_dir, "prcp-202201-grd-prelim-01.tif")
+            with open(cog_href, "wb") as f:
+                f.write(b"cog")
+            manifest = CogManifest.from_base_cog_href(temp_dir)
+            manifest.update(cog_href, "abc")
+
+            with open(cog_href, "wb") as f:
+                f.write(b"modified cog")
+            self.assertFalse(manifest.is_unchanged(cog_href, "abc"))
+
+            os.remove(cog_href)
+            self.assertFalse(manifest.is_unchanged(cog_href, "abc"))
+
+    def test_unchanged_without_reading_cog(self):
+        hrefs = []
+
+        def sign(href):
+            hrefs.append(href)
+            return href
+
+        with TemporaryDirectory() as temp_dir:
+            cog_href = os.path.join(temp_dir, "prcp-202201-grd-prelim-01.tif")
+            with open(cog_href, "wb") as f:
+                f.write(b"cog")
+            manifest = CogManifest.from_base_cog_href(temp_dir,
+                                                      read_href_modifier=sign)
+            manifest.update(cog_href, "abc")
+            self.assertEqual(
+                manifest.entries[os.path.basename(cog_href)]["size"], 3)
+
+            # the recorded COG hash is trusted; only the size is checked
+            with mock.patch("stactools.nclimgrid.manifest.hash_file",
+                            side_effect=AssertionError):
+                self.assertTrue(manifest.is_unchanged(cog_href, "abc"))
+            # entries recorded without a size only check existence
+            del manifest.entries[os.path.basename(cog_href)]["size"]
+            self.assertTrue(manifest.is_unchanged(cog_href, "abc"))
+
+        # the manifest and COG are read through the modified hrefs
+        self.assertEqual(
+            hrefs,
+            [os.path.join(temp_dir, MANIFEST_FILENAME), cog_href, cog_href])
+
+
+class CogNcsIfChangedTest(unittest.TestCase):
+
+    def test_cog_from_single_read(self):
+        with TemporaryDirectory() as temp_dir:
+            cog_href = os.path.join(temp_dir, "202201-grd-prelim-01.tif")
+            manifest = CogManifest.from_base_cog_href(temp_dir)
+            with mock.patch("stactools.nclimgrid.utils.subprocess.run",
+                            wraps=subprocess.run) as run:
+                created, statistics = cog_ncs_if_changed(NC_PATHS,
+                                                         cog_href,
+                                                         VARIABLES,
+                                                         1,
+                                                         manifest=manifest)
+            with rasterio.open(cog_href) as dataset:
+                tmax = dataset.read(3)
+                descriptions = dataset.descriptions
+            unchanged, unchanged_statistics = cog_ncs_if_changed(
+                NC_PATHS, cog_href, VARIABLES, 1, manifest=manifest)
+
+        # the COG is written from the slices read for statistics and hashing,
+        # rather than by GDAL reading the NetCDFs again
+        self.assertTrue(created)
+        self.assertEqual(run.call_count, 1)
+        self.assertFalse(any("netcdf:" in arg
+                             for arg in run.call_args.args[0]))
+        with rasterio.open(
+                "tests/test-data/cog/daily/tmax-202201-grd-prelim-01.tif"
+        ) as dataset:
+            expected = dataset.read(1)
+        numpy.testing.assert_array_equal(tmax, expected)
+        self.assertEqual(descriptions, tuple(VARIABLES))
+        self.assertEqual(statistics["tmax"]["maximum"],
+                         float(numpy.nanmax(expected)))
+        self.assertFalse(unchanged)
+        self.assertEqual(unchanged_statistics, statistics)
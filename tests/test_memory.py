@@ -0,0 +1,47 @@
+import time
+import tracemalloc
+import unittest
+
+import numpy
+
+from stactools.nclimgrid.memory import MemoryMonitor, monitor_stage
+from stactools.nclimgrid.pipeline import run_pipeline
+
+MIB = 2**20
+
+
+class MemoryMonitorTest(unittest.TestCase):
+
+    def test_stage_peaks(self):
+        with MemoryMonitor() as monitor:
+            with monitor.stage("allocate"):
+                array = numpy.ones(64 * MIB, dtype=numpy.uint8)
+                del array
+            # the allocation is freed before this stage runs
+            with monitor_stage(monitor, "idle"):
+                time.sleep(2 * monitor.interval)
+            with monitor_stage(None, "unmonitored"):
+                pass
+
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(list(monitor.peaks), ["allocate", "idle"])
+        self.assertGreaterEqual(monitor.peaks["allocate"].python, 64 * MIB)
+        self.assertGreaterEqual(monitor.peaks["allocate"].rss, 32 * MIB)
+        self.assertLess(monitor.peaks["idle"].python, 8 * MIB)
+
+    def test_run_pipeline(self):
+
+        def fetch(unit):
+            return [numpy.ones(16 * MIB, dtype=numpy.uint8)]
+
+        def encode(unit):
+            return [int(unit.sum())]
+
+        with MemoryMonitor() as monitor:
+            results = run_pipeline(range(2), [("fetch", fetch),
+                                              ("encode", encode)],
+                                   monitor=monitor)
+
+        self.assertEqual(results, [16 * MIB, 16 * MIB])
+        self.assertEqual(sorted(monitor.peaks), ["encode", "fetch"])
+        self.assertGreaterEqual(monitor.peaks["fetch"].python, 16 * MIB)
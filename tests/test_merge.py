@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+from pystac import CatalogType, Collection
+
+from stactools.nclimgrid import daily_stac, monthly_stac
+from stactools.nclimgrid.constants import VARIABLES, Status
+from stactools.nclimgrid.merge import merge_items
+
+
+class MergeItemsTest(unittest.TestCase):
+
+    def test_merge_shards(self):
+        base_nc_href = "tests/test-data/netcdf/monthly"
+        start_yyyymm = "189501"
+        end_yyyymm = "189502"
+
+        with TemporaryDirectory() as temp_dir:
+            base_cog_href = os.path.join(temp_dir, "cogs")
+            os.makedirs(base_cog_href)
+            collection = monthly_stac.create_monthly_collection(
+                start_yyyymm,
+                end_yyyymm,
+                base_cog_href,
+                base_nc_href=base_nc_href)
+
+            shard_hrefs = []
+            for shard in [(1, 2), (2, 2)]:
+                shard_collection = monthly_stac.create_monthly_collection(
+                    start_yyyymm,
+                    end_yyyymm,
+                    base_cog_href,
+                    base_nc_href=base_nc_href,
+                    shard=shard)
+                self.assertEqual(len(list(shard_collection.get_items())), 1)
+                shard_dir = os.path.join(temp_dir, f"shard-{shard[0]}")
+                shard_collection.catalog_type = CatalogType.SELF_CONTAINED
+                shard_collection.normalize_hrefs(shard_dir)
+                shard_collection.save()
+                shard_hrefs.append(shard_collection.get_self_href())
+
+            destination = os.path.join(temp_dir, "merged")
+            merge_items(shard_hrefs, destination)
+            merged = Collection.from_file(
+                os.path.join(destination, "collection.json"))
+            merged.validate_all()
+
+            self.assertEqual(merged.extent.to_dict(),
+                             collection.extent.to_dict())
+            self.assertEqual(merged.extra_fields["item_assets"],
+                             collection.extra_fields["item_assets"])
+            self.assertEqual([item.id for item in merged.get_items()],
+                             [item.id for item in collection.get_items()])
+            for item in merged.get_items():
+                expected = collection.get_item(item.id)
+                self.assertEqual(item.to_dict()["properties"],
+                                 expected.to_dict()["properties"])
+                self.assertEqual(item.assets.keys(), expected.assets.keys())
+
+    def test_merge_dedupe_prefers_scaled(self):
+        base_cog_href = "tests/test-data/cog/daily"
+        prelim_item = daily_stac.create_daily_items(2022,
+                                                    1,
+                                                    Status.PRELIM,
+                                                    base_cog_href,
+                                                    day=1)[0]
+
+        with TemporaryDirectory() as temp_dir:
+            scaled_cog_href = os.path.join(temp_dir, "cogs")
+            os.makedirs(scaled_cog_href)
+            for var in VARIABLES:
+                shutil.copy(
+                    os.path.join(base_cog_href,
+                                 f"{var}-202201-grd-prelim-01.tif"),
+                    os.path.join(scaled_cog_href,
+                                 f"{var}-202201-grd-scaled-01.tif"))
+            scaled_item = daily_stac.create_daily_items(2022,
+                                                        1,
+                                                        Status.SCALED,
+                                                        scaled_cog_href,
+                                                        day=1)[0]
+
+            scaled_dir = os.path.join(temp_dir, "scaled")
+            scaled_item.set_self_href(
+                os.path.join(scaled_dir, f"{scaled_item.id}.json"))
+            scaled_item.save_object(include_self_link=False)
+            prelim_ndjson = os.path.join(temp_dir, "prelim.ndjson")
+            with open(prelim_ndjson, "w") as f:
+                f.write(json.dumps(prelim_item.to_dict()) + "\n")
+
+            for sources in [[scaled_dir, prelim_ndjson],
+                            [prelim_ndjson, scaled_dir]]:
+                destination = os.path.join(temp_dir, "merged")
+                merge_items(sources, destination)
+                merged = Collection.from_file(
+                    os.path.join(destination, "collection.json"))
+                merged.validate_all()
+
+                self.assertEqual(merged.id, "nclimgrid-daily")
+                self.assertEqual([item.id for item in merged.get_items()],
+                                 [scaled_item.id])
+                self.assertEqual(sorted(os.listdir(destination)),
+                                 sorted(["collection.json", scaled_item.id]))
+                self.assertEqual(merged.extra_fields["item_assets"].keys(),
+                                 scaled_item.assets.keys())
+                shutil.rmtree(destination)
@@ -1,9 +1,55 @@
+import json
+import subprocess
+import sys
 import unittest
 
 import stactools.nclimgrid
 
+# seconds to import the package and create its commands, on top of
+# stactools.core, which the stac CLI has already imported
+IMPORT_TIME_BUDGET = 0.25
+# libraries that should only be imported when a command is run
+DEFERRED_MODULES = ["xarray", "netCDF4", "h5netcdf", "pandas", "aiohttp"]
+
+IMPORT_SCRIPT = """
+import json
+import sys
+import time
+
+import click
+import stactools.core
+
+start = time.perf_counter()
+import stactools.nclimgrid
+from stactools.nclimgrid import commands
+commands.create_nclimgrid_command(click.Group())
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": list(sys.modules)}))
+"""
+
 
 class TestModule(unittest.TestCase):
 
     def test_version(self):
         self.assertIsNotNone(stactools.nclimgrid.__version__)
+
+    def test_lazy_attributes(self):
+        from stactools.nclimgrid import daily_stac, monthly_stac
+
+        self.assertIs(stactools.nclimgrid.create_daily_items,
+                      daily_stac.create_daily_items)
+        self.assertIs(stactools.nclimgrid.create_monthly_collection,
+                      monthly_stac.create_monthly_collection)
+        with self.assertRaises(AttributeError):
+            stactools.nclimgrid.create_yearly_items
+
+    def test_import_time(self):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT],
+                                check=True,
+                                capture_output=True,
+                                text=True).stdout
+        result = json.loads(output)
+
+        imported = {module.split(".")[0] for module in result["modules"]}
+        self.assertEqual(imported & set(DEFERRED_MODULES), set())
+        self.assertLess(result["elapsed"], IMPORT_TIME_BUDGET)
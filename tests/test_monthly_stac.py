@@ -3,7 +3,16 @@ import os
 import unittest
 from tempfile import TemporaryDirectory
 
+import fsspec
+import numpy
+import rasterio
+from pystac.extensions.eo import EOExtension
+from pystac.extensions.raster import RasterExtension
+
 from stactools.nclimgrid import monthly_stac
+from stactools.nclimgrid.constants import VARIABLES
+from stactools.nclimgrid.memory import MemoryMonitor
+from tests.http_server import serve_directory
 
 
 class MonthlyStacTestLocal(unittest.TestCase):
@@ -22,6 +31,15 @@ class MonthlyStacTestLocal(unittest.TestCase):
                 base_nc_href=base_nc_href)
             num_cogs = len(glob.glob(os.path.join(base_cog_href, "*.tif")))
 
+            # statistics match the COG data
+            asset = items[0].assets["tavg-cog"]
+            statistics = RasterExtension.ext(asset).bands[0].statistics
+            with rasterio.open(asset.href) as dataset:
+                data = dataset.read(1, masked=True)
+            self.assertAlmostEqual(statistics.minimum, float(data.min()))
+            self.assertAlmostEqual(statistics.maximum, float(data.max()))
+            self.assertAlmostEqual(statistics.mean, float(data.mean()), 4)
+
         for item in items:
             item.validate()
 
@@ -30,6 +48,45 @@ class MonthlyStacTestLocal(unittest.TestCase):
         self.assertEqual(items[0].id, "nclimgrid-189501")
         self.assertEqual(len(items[0].assets), 4)
 
+    def test_create_items_createcogs_remote_storage(self):
+        base_nc_href = 'tests/test-data/netcdf/monthly'
+        base_cog_href = 'memory://nclimgrid/monthly'
+        start_yyyymm = "189501"
+        end_yyyymm = "189502"
+
+        items = monthly_stac.create_monthly_items(start_yyyymm,
+                                                  end_yyyymm,
+                                                  base_cog_href,
+                                                  base_nc_href=base_nc_href)
+
+        fs = fsspec.filesystem("memory")
+        cog_paths = fs.glob("nclimgrid/monthly/*.tif")
+        fs.rm("nclimgrid", recursive=True)
+
+        self.assertEqual(len(cog_paths), 8)
+        self.assertEqual(len(items), 2)
+        self.assertEqual(items[0].assets["prcp-cog"].href,
+                         f"{base_cog_href}/nclimgrid-prcp-189501.tif")
+
+    def test_create_items_createcogs_range_read(self):
+        nc_dir = 'tests/test-data/netcdf/monthly'
+        start_yyyymm = "189502"
+        end_yyyymm = "189502"
+
+        with serve_directory(
+                nc_dir) as server, TemporaryDirectory() as temp_dir:
+            base_cog_href = temp_dir
+            items = monthly_stac.create_monthly_items(start_yyyymm,
+                                                      end_yyyymm,
+                                                      base_cog_href,
+                                                      base_nc_href=server.url,
+                                                      range_read=True)
+            num_cogs = len(glob.glob(os.path.join(base_cog_href, "*.tif")))
+
+        self.assertEqual(num_cogs, 4)
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0].id, "nclimgrid-189502")
+
     def test_create_items_existingcogs(self):
         base_cog_href = 'tests/test-data/cog/monthly'
         start_yyyymm = "189501"
@@ -84,6 +141,169 @@ class MonthlyStacTestLocal(unittest.TestCase):
         self.assertEqual(num_cogs, 8)
         self.assertEqual(len(list(collection.get_all_items())), 2)
         self.assertEqual(collection.id, "nclimgrid-monthly")
+        # statistics differ between Items, so only Items carry them
+        for definition in collection.extra_fields["item_assets"].values():
+            for band in definition.get("raster:bands", []):
+                self.assertNotIn("statistics", band)
+
+    def test_create_collection_pipelined_monitor(self):
+        with TemporaryDirectory() as temp_dir:
+            with MemoryMonitor() as monitor:
+                collection = monthly_stac.create_monthly_collection(
+                    "189501",
+                    "189502",
+                    temp_dir,
+                    base_nc_href="tests/test-data/netcdf/monthly",
+                    pipelined=True,
+                    monitor=monitor)
+
+        self.assertEqual(len(list(collection.get_all_items())), 2)
+        self.assertEqual(sorted(monitor.peaks),
+                         ["assemble", "encode", "fetch", "store"])
+
+    def test_create_items_pipelined(self):
+        base_nc_href = "tests/test-data/netcdf/monthly"
+        start_yyyymm = "189501"
+        end_yyyymm = "189502"
+
+        with TemporaryDirectory() as temp_dir:
+            base_cog_href = temp_dir
+            items = monthly_stac.create_monthly_items(
+                start_yyyymm,
+                end_yyyymm,
+                base_cog_href,
+                base_nc_href=base_nc_href)
+            pipelined_items = monthly_stac.create_monthly_items_pipelined(
+                start_yyyymm,
+                end_yyyymm,
+                base_cog_href,
+                base_nc_href=base_nc_href)
+
+        self.assertEqual([item.to_dict() for item in pipelined_items],
+                         [item.to_dict() for item in items])
+
+    def test_create_items_multiband(self):
+        base_nc_href = "tests/test-data/netcdf/monthly"
+        start_yyyymm = "189501"
+        end_yyyymm = "189502"
+
+        with TemporaryDirectory() as temp_dir:
+            base_cog_href = temp_dir
+            items = monthly_stac.create_monthly_items(
+                start_yyyymm,
+                end_yyyymm,
+                base_cog_href,
+                base_nc_href=base_nc_href,
+                multiband=True)
+            cog_paths = sorted(glob.glob(os.path.join(base_cog_href, "*.tif")))
+            pipelined_items = monthly_stac.create_monthly_items_pipelined(
+                start_yyyymm,
+                end_yyyymm,
+                base_cog_href,
+                base_nc_href=base_nc_href,
+                multiband=True)
+            existing_items = monthly_stac.create_monthly_items(start_yyyymm,
+                                                               end_yyyymm,
+                                                               base_cog_href,
+                                                               multiband=True)
+
+            # bands hold each variable, in order, as in single-band COGs
+            asset = items[0].assets["cog"]
+            with rasterio.open(asset.href) as dataset:
+                self.assertEqual(dataset.count, 4)
+                self.assertEqual(list(dataset.descriptions), VARIABLES)
+                tavg = dataset.read(2)
+            single_items = monthly_stac.create_monthly_items(
+                start_yyyymm,
+                start_yyyymm,
+                base_cog_href,
+                base_nc_href=base_nc_href)
+            with rasterio.open(
+                    single_items[0].assets["tavg-cog"].href) as dataset:
+                numpy.testing.assert_array_equal(dataset.read(1), tavg)
+
+        self.assertEqual([os.path.basename(path) for path in cog_paths],
+                         ["nclimgrid-189501.tif", "nclimgrid-189502.tif"])
+        self.assertEqual(list(items[0].assets), ["cog"])
+        self.assertEqual(
+            [band.name for band in EOExtension.ext(asset).bands or []],
+            VARIABLES)
+        statistics = RasterExtension.ext(asset).bands[1].statistics
+        self.assertEqual(
+            statistics.to_dict(),
+            RasterExtension.ext(single_items[0].assets["tavg-cog"]).bands[0].
+            statistics.to_dict())
+        self.assertEqual([item.to_dict() for item in pipelined_items],
+                         [item.to_dict() for item in items])
+        self.assertEqual(list(existing_items[0].assets), ["cog"])
+        for item in items:
+            item.validate()
+
+        collection = monthly_stac.monthly_collection(items)
+        self.assertTrue(EOExtension.has_extension(collection))
+
+    def test_create_items_quantized(self):
+        base_nc_href = "tests/test-data/netcdf/monthly"
+        yyyymm = "189501"
+
+        with TemporaryDirectory() as temp_dir:
+            float_dir = os.path.join(temp_dir, "float")
+            os.makedirs(float_dir)
+            float_item = monthly_stac.create_monthly_items(
+                yyyymm, yyyymm, float_dir, base_nc_href=base_nc_href)[0]
+            items = monthly_stac.create_monthly_items(
+                yyyymm,
+                yyyymm,
+                temp_dir,
+                base_nc_href=base_nc_href,
+                quantized=True)
+            pipelined_items = monthly_stac.create_monthly_items_pipelined(
+                yyyymm,
+                yyyymm,
+                temp_dir,
+                base_nc_href=base_nc_href,
+                quantized=True)
+            multiband_item = monthly_stac.create_monthly_items(
+                yyyymm,
+                yyyymm,
+                temp_dir,
+                base_nc_href=base_nc_href,
+                multiband=True,
+                quantized=True)[0]
+
+            for var in VARIABLES:
+                band = RasterExtension.ext(
+                    items[0].assets[f"{var}-cog"]).bands[0]
+                with rasterio.open(items[0].assets[f"{var}-cog"].href) as q:
+                    self.assertEqual(q.dtypes[0], "int16")
+                    self.assertEqual(q.nodata, band.nodata)
+                    self.assertEqual((q.scales[0], q.offsets[0]),
+                                     (band.scale, band.offset))
+                    unpacked = q.read(1, masked=True) * band.scale
+                    unpacked += band.offset
+                with rasterio.open(float_item.assets[f"{var}-cog"].href) as f:
+                    expected = f.read(1, masked=True)
+                numpy.testing.assert_array_equal(unpacked.mask, expected.mask)
+                self.assertLessEqual(
+                    numpy.abs(unpacked - expected).max(),
+                    band.scale / 2 + 1e-4)
+                self.assertEqual(band.data_type, "int16")
+                self.assertEqual(
+                    band.statistics.to_dict(),
+                    RasterExtension.ext(float_item.assets[f"{var}-cog"]).
+                    bands[0].statistics.to_dict())
+
+            with rasterio.open(multiband_item.assets["cog"].href) as dataset:
+                self.assertEqual(dataset.dtypes, ("int16", ) * 4)
+                self.assertEqual(list(dataset.descriptions), VARIABLES)
+            multiband_bands = RasterExtension.ext(
+                multiband_item.assets["cog"]).bands
+
+        self.assertEqual([band.scale for band in multiband_bands],
+                         [0.05, 0.01, 0.01, 0.01])
+        self.assertEqual([item.to_dict() for item in pipelined_items],
+                         [item.to_dict() for item in items])
+        items[0].validate()
 
     def test_create_collection_existingcogs(self):
         start_yyyymm = "189501"
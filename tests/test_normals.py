@@ -0,0 +1,119 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy
+import rasterio
+import xarray
+
+from stactools.nclimgrid import normals
+from stactools.nclimgrid.constants import NORMALS_ASSET_TITLE, VARIABLES
+from tests.synthetic_nc import write_synthetic_nc
+
+BASE_MONTHLY_NC_HREF = "tests/test-data/netcdf/monthly"
+
+
+def write_archive(nc_dir: str, num_months: int) -> None:
+    """Writes a small synthetic monthly archive starting in January 1895, with
+    descending latitudes and a missing value in March 1896."""
+    rng = numpy.random.default_rng(0)
+    for var in VARIABLES:
+        # earlier months are unchanged as the archive grows
+        values = rng.uniform(0, 30, (36, 3, 4)).astype(numpy.float32)
+        values[14, 0, 0] = numpy.nan
+        write_synthetic_nc(os.path.join(nc_dir, f"nclimgrid_{var}.nc"), [var],
+                           num_months,
+                           lambda var, index: values[index],
+                           lat=[49.0, 48.0, 47.0],
+                           lon=[-124.0, -123.0, -122.0, -121.0])
+
+
+class NormalsStateTest(unittest.TestCase):
+
+    def test_incremental_update(self):
+        with TemporaryDirectory() as temp_dir:
+            write_archive(temp_dir, 24)
+            state = normals.NormalsState.from_base_cog_href(temp_dir, 3)
+            self.assertEqual(
+                normals.update_normals(state, 3, 1895, 1897, temp_dir),
+                ([1895, 1896], []))
+            state.save()
+
+            # a new year arrives, then the period moves forward a year
+            write_archive(temp_dir, 36)
+            state = normals.NormalsState.from_base_cog_href(temp_dir, 3)
+            self.assertEqual(state.years, {1895, 1896})
+            self.assertEqual(
+                normals.update_normals(state, 3, 1895, 1897, temp_dir),
+                ([1897], []))
+            self.assertEqual(
+                normals.update_normals(state,
+                                       3,
+                                       1896,
+                                       1897,
+                                       temp_dir,
+                                       memory_limit=1), ([], [1895]))
+            self.assertEqual(
+                normals.update_normals(state, 3, 1896, 1897, temp_dir),
+                ([], []))
+
+            fresh = normals.NormalsState("unused")
+            normals.update_normals(fresh, 3, 1896, 1897, temp_dir)
+            with xarray.open_dataset(
+                    os.path.join(temp_dir, "nclimgrid_tmax.nc")) as ds:
+                expected = numpy.nanmean(ds["tmax"].values[[14, 26]], axis=0)
+
+        bands = state.normals()
+        self.assertEqual(list(bands), list(NORMALS_ASSET_TITLE))
+        for key, band in fresh.normals().items():
+            numpy.testing.assert_allclose(bands[key], band, rtol=1e-6)
+        numpy.testing.assert_allclose(bands["tmax-normal"],
+                                      expected,
+                                      rtol=1e-6)
+        numpy.testing.assert_array_equal(
+            bands["valid-count"], [[1, 2, 2, 2], [2, 2, 2, 2], [2, 2, 2, 2]])
+
+    def test_empty_state(self):
+        state = normals.NormalsState("unused")
+        with self.assertRaises(ValueError):
+            state.normals()
+        with TemporaryDirectory() as temp_dir:
+            state = normals.NormalsState.from_base_cog_href(temp_dir, 1)
+            state.save()
+            self.assertEqual(
+                normals.NormalsState.from_base_cog_href(temp_dir, 1).years,
+                set())
+
+
+class NormalsTest(unittest.TestCase):
+
+    def test_create_normals_collection(self):
+        with TemporaryDirectory() as temp_dir:
+            collection = normals.create_normals_collection(
+                temp_dir,
+                BASE_MONTHLY_NC_HREF,
+                start_year=1895,
+                end_year=1924,
+                months=[1, 2, 3])
+            collection.validate()
+            # the test NetCDFs hold January and February 1895
+            items = {item.id: item for item in collection.get_all_items()}
+            self.assertEqual(sorted(items), [
+                "nclimgrid-normals-1895-1924-01",
+                "nclimgrid-normals-1895-1924-02"
+            ])
+            item = items["nclimgrid-normals-1895-1924-02"]
+            self.assertEqual(item.properties["start_datetime"],
+                             "1895-02-01T00:00:00Z")
+            self.assertEqual(item.properties["end_datetime"],
+                             "1895-02-28T23:59:59Z")
+            with rasterio.open(item.assets["prcp-normal"].href) as dataset:
+                prcp = dataset.read(1)
+            self.assertTrue(
+                os.path.exists(
+                    os.path.join(temp_dir, "nclimgrid-normals-state-02.npz")))
+
+        with xarray.open_dataset(
+                os.path.join(BASE_MONTHLY_NC_HREF, "nclimgrid_prcp.nc")) as ds:
+            expected = ds["prcp"].values[1]
+        numpy.testing.assert_array_equal(prcp, expected)
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+import unittest
+
+from stactools.nclimgrid.pipeline import SharedScratch, run_pipeline
+
+
+class RunPipelineTest(unittest.TestCase):
+
+    def test_fan_out(self):
+
+        def expand(unit):
+            return [unit] * unit
+
+        def square(unit):
+            return [unit * unit]
+
+        results = run_pipeline(range(5), [("fetch", expand),
+                                          ("encode", square)])
+        self.assertEqual(sorted(results), [1, 4, 4, 9, 9, 9, 16, 16, 16, 16])
+
+    def test_stages_overlap(self):
+        running = set()
+        overlapped = threading.Event()
+        lock = threading.Lock()
+
+        def stage(name):
+
+            def function(unit):
+                with lock:
+                    running.add(name)
+                    if len(running) > 1:
+                        overlapped.set()
+                time.sleep(0.01)
+                with lock:
+                    running.discard(name)
+                return [unit]
+
+            return function
+
+        results = run_pipeline(range(20), [("fetch", stage("fetch")),
+                                           ("encode", stage("encode"))],
+                               workers={
+                                   "fetch": 1,
+                                   "encode": 1
+                               })
+        self.assertEqual(sorted(results), list(range(20)))
+        self.assertTrue(overlapped.is_set())
+
+    def test_concurrency_limit(self):
+        active = 0
+        max_active = 0
+        lock = threading.Lock()
+
+        def encode(unit):
+            nonlocal active, max_active
+            with lock:
+                active += 1
+                max_active = max(max_active, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+            return [unit]
+
+        run_pipeline(range(20), [("encode", encode)], workers={"encode": 3})
+        self.assertLessEqual(max_active, 3)
+        self.assertGreater(max_active, 1)
+
+    def test_error_propagates(self):
+
+        def fail(unit):
+            if unit == 3:
+                raise ValueError("bad unit")
+            return [unit]
+
+        with self.assertRaises(ValueError):
+            run_pipeline(range(100), [("fetch", fail), ("encode", fail)])
+
+    def test_error_fails_fast(self):
+        fetched = []
+        encoded = []
+
+        def fetch(unit):
+            fetched.append(unit)
+            return [unit]
+
+        def encode(unit):
+            if unit == 0:
+                time.sleep(0.1)
+                raise ValueError("bad unit")
+            time.sleep(0.5)
+            encoded.append(unit)
+            return [unit]
+
+        start = time.perf_counter()
+        with self.assertRaises(ValueError):
+            run_pipeline(range(100), [("fetch", fetch), ("encode", encode)],
+                         workers={"encode": 2},
+                         queue_size=1)
+        elapsed = time.perf_counter() - start
+        num_fetched = len(fetched)
+        num_encoded = len(encoded)
+        time.sleep(0.7)
+
+        # the unit already encoding is waited for, but no more are started
+        # or fetched, and no work continues once the pipeline has returned
+        self.assertLess(elapsed, 1)
+        self.assertEqual(num_encoded, 1)
+        self.assertEqual(len(encoded), num_encoded)
+        self.assertEqual(len(fetched), num_fetched)
+        self.assertLess(num_fetched, 10)
+
+
+class SharedScratchTest(unittest.TestCase):
+
+    def test_removed_after_release(self):
+        scratch = SharedScratch()
+        scratch.retain(2)
+        scratch.release()
+        self.assertTrue(os.path.exists(scratch.name))
+        scratch.release()
+        self.assertFalse(os.path.exists(scratch.name))
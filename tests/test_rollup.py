@@ -0,0 +1,150 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy
+import rasterio
+import xarray
+
+from stactools.nclimgrid import rollup
+from stactools.nclimgrid.constants import NODATA, ROLLUP_VARIABLES, Status
+from tests.test_watch import NC_DIR, append_day
+
+BASE_DAILY_NC_HREF = "tests/test-data/netcdf/daily"
+BASE_MONTHLY_NC_HREF = "tests/test-data/netcdf/monthly"
+
+
+def read_cog(cog_href: str) -> numpy.ndarray:
+    with rasterio.open(cog_href) as dataset:
+        return dataset.read(1)
+
+
+class RollupAccumulatorTest(unittest.TestCase):
+
+    def test_rollup(self):
+        prcp = numpy.array([[[1.0, numpy.nan]], [[2.0, numpy.nan]],
+                            [[NODATA, numpy.nan]]])
+        tavg = numpy.array([[[10.0, 1.0]], [[numpy.nan, 2.0]], [[20.0, 3.0]]])
+        chunks = {"prcp": prcp, "tavg": tavg, "tmax": tavg, "tmin": tavg}
+
+        accumulator = rollup.RollupAccumulator()
+        # adding in chunks of time slices gives the same result
+        accumulator.add({var: chunk[:2] for var, chunk in chunks.items()})
+        accumulator.add({var: chunk[2:] for var, chunk in chunks.items()})
+        bands = accumulator.rollup()
+
+        self.assertEqual(list(bands), list(ROLLUP_VARIABLES))
+        numpy.testing.assert_array_equal(bands["prcp-total"],
+                                         [[3.0, numpy.nan]])
+        numpy.testing.assert_array_equal(bands["tavg-mean"], [[15.0, 2.0]])
+        numpy.testing.assert_array_equal(bands["valid-count"], [[1, 0]])
+        self.assertEqual(bands["tmin-mean"].dtype, numpy.float32)
+        self.assertEqual(bands["valid-count"].dtype, numpy.int16)
+
+        with self.assertRaises(ValueError):
+            rollup.RollupAccumulator().rollup()
+
+    def test_period_months(self):
+        self.assertEqual(rollup.period_months(1895, "annual"), (0, 12))
+        self.assertEqual(rollup.period_months(1895, "djf"), (-1, 2))
+        self.assertEqual(rollup.period_months(1896, "son"), (20, 23))
+
+
+class RollupTest(unittest.TestCase):
+
+    def test_daily_rollup_items(self):
+        with TemporaryDirectory() as temp_dir:
+            items = rollup.create_daily_rollup_items("202201",
+                                                     "202201",
+                                                     "prelim",
+                                                     temp_dir,
+                                                     BASE_DAILY_NC_HREF,
+                                                     workers={"encode": 1})
+            self.assertEqual([item.id for item in items],
+                             ["202201-grd-prelim-monthly"])
+            item = items[0]
+            self.assertEqual(item.properties["start_datetime"],
+                             "2022-01-01T00:00:00Z")
+            self.assertEqual(item.properties["end_datetime"],
+                             "2022-01-31T23:59:59Z")
+            self.assertEqual(list(item.assets), list(ROLLUP_VARIABLES))
+
+            # the test NetCDFs hold a single day
+            tmax = read_cog(item.assets["tmax-mean"].href)
+            count = read_cog(item.assets["valid-count"].href)
+            expected = read_cog(
+                "tests/test-data/cog/daily/tmax-202201-grd-prelim-01.tif")
+            collection = rollup.rollup_collection(items, "id", "title",
+                                                  "description")
+            collection.validate()
+
+        numpy.testing.assert_array_equal(tmax, expected)
+        self.assertEqual(set(numpy.unique(count)), {0, 1})
+        numpy.testing.assert_array_equal(count == 1, numpy.isfinite(expected))
+        self.assertEqual(
+            item.assets["tmax-mean"].to_dict()["raster:bands"][0]["statistics"]
+            ["maximum"], float(numpy.nanmax(expected)))
+
+    def test_daily_rollup_common_days(self):
+        expected = rollup.daily_rollup(2022, 1, Status.PRELIM,
+                                       BASE_DAILY_NC_HREF)
+        with TemporaryDirectory() as temp_dir:
+            shutil.copytree(BASE_DAILY_NC_HREF,
+                            os.path.join(temp_dir, "daily"))
+            # a prcp NetCDF from a later update, holding one more day
+            append_day(
+                os.path.join(temp_dir, "daily",
+                             os.path.relpath(NC_DIR, BASE_DAILY_NC_HREF),
+                             "prcp-202201-grd-prelim.nc"), "prcp")
+            bands = rollup.daily_rollup(2022,
+                                        1,
+                                        Status.PRELIM,
+                                        os.path.join(temp_dir, "daily"),
+                                        memory_limit=1)
+
+        self.assertEqual(list(bands), list(expected))
+        for key, band in bands.items():
+            numpy.testing.assert_array_equal(band, expected[key])
+
+    def test_seasonal_rollup_items(self):
+        with TemporaryDirectory() as temp_dir:
+            collection = rollup.create_seasonal_rollup_collection(
+                1895, 1895, temp_dir, BASE_MONTHLY_NC_HREF)
+            collection.validate()
+            items = {item.id: item for item in collection.get_all_items()}
+
+            # the test NetCDFs hold January and February 1895
+            self.assertEqual(sorted(items),
+                             ["nclimgrid-1895-annual", "nclimgrid-1895-djf"])
+            djf = items["nclimgrid-1895-djf"]
+            self.assertEqual(djf.properties["start_datetime"],
+                             "1894-12-01T00:00:00Z")
+            self.assertEqual(djf.properties["end_datetime"],
+                             "1895-02-28T23:59:59Z")
+            prcp = read_cog(djf.assets["prcp-total"].href)
+            tmin = read_cog(djf.assets["tmin-mean"].href)
+            count = read_cog(djf.assets["valid-count"].href)
+            annual_tmin = read_cog(
+                items["nclimgrid-1895-annual"].assets["tmin-mean"].href)
+
+        with xarray.open_dataset(
+                os.path.join(BASE_MONTHLY_NC_HREF, "nclimgrid_prcp.nc")) as ds:
+            expected_prcp = ds["prcp"].values.sum(axis=0)
+        with xarray.open_dataset(
+                os.path.join(BASE_MONTHLY_NC_HREF, "nclimgrid_tmin.nc")) as ds:
+            expected_tmin = ds["tmin"].values.mean(axis=0)
+        numpy.testing.assert_allclose(prcp, expected_prcp, rtol=1e-6)
+        numpy.testing.assert_allclose(tmin, expected_tmin, rtol=1e-6)
+        numpy.testing.assert_array_equal(annual_tmin, tmin)
+        self.assertEqual(count.max(), 2)
+
+    def test_seasonal_rollups_chunked(self):
+        # a single month per chunk gives the same rollups
+        whole = rollup.seasonal_rollups(1895, BASE_MONTHLY_NC_HREF, ["djf"])
+        chunked = rollup.seasonal_rollups(1895,
+                                          BASE_MONTHLY_NC_HREF, ["djf", "mam"],
+                                          memory_limit=1)
+        self.assertEqual(list(chunked), ["djf"])
+        for key, band in whole["djf"].items():
+            numpy.testing.assert_array_equal(chunked["djf"][key], band)
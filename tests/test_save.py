@@ -0,0 +1,45 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from pystac import CatalogType
+
+from stactools.nclimgrid import daily_stac, monthly_stac
+from stactools.nclimgrid.save import save_collection
+
+
+def read_tree(directory: str) -> dict:
+    """Reads every file below a directory, keyed by relative path."""
+    files = dict()
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, directory)] = f.read()
+    return files
+
+
+class SaveCollectionTest(unittest.TestCase):
+
+    def assert_same_as_pystac_save(self, collection):
+        with TemporaryDirectory() as temp_dir:
+            fast_dir = os.path.join(temp_dir, "fast")
+            save_collection(collection, fast_dir)
+
+            pystac_dir = os.path.join(temp_dir, "pystac")
+            collection.catalog_type = CatalogType.SELF_CONTAINED
+            collection.set_self_href(pystac_dir)
+            collection.normalize_hrefs(pystac_dir)
+            collection.save()
+
+            self.assertEqual(read_tree(fast_dir), read_tree(pystac_dir))
+
+    def test_daily_collection(self):
+        collection = daily_stac.create_daily_collection(
+            "202201", "202201", "prelim", "tests/test-data/cog/daily")
+        self.assert_same_as_pystac_save(collection)
+
+    def test_monthly_collection(self):
+        collection = monthly_stac.create_monthly_collection(
+            "189501", "189501", os.path.abspath("tests/test-data/cog/monthly"))
+        self.assert_same_as_pystac_save(collection)
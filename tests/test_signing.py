@@ -0,0 +1,151 @@
+import os
+import shutil
+import threading
+import unittest
+from tempfile import TemporaryDirectory
+from typing import List
+
+from stactools.nclimgrid import daily_stac
+from stactools.nclimgrid.constants import VARIABLES
+from stactools.nclimgrid.signing import (CachedReadHrefModifier,
+                                         cache_read_href_modifier)
+from tests.http_server import serve_directory
+
+
+class Signer:
+    """Appends a numbered token to hrefs, recording the hrefs signed."""
+
+    def __init__(self, token_suffix: str = "") -> None:
+        self.token_suffix = token_suffix
+        self.signed: List[str] = []
+
+    def __call__(self, href: str) -> str:
+        self.signed.append(href)
+        separator = "&" if "?" in href else "?"
+        return f"{href}{separator}token={len(self.signed)}{self.token_suffix}"
+
+
+class CachedReadHrefModifierTest(unittest.TestCase):
+
+    def test_signs_once_per_prefix(self):
+        signer = Signer()
+        modifier = CachedReadHrefModifier(signer)
+        hrefs = [
+            f"https://account.blob.core.windows.net/{container}/{name}.tif"
+            for container in ["a", "b"] for name in range(5)
+        ]
+
+        signed = [modifier(href) for href in hrefs]
+
+        self.assertEqual(signed, [
+            f"{href}?token={1 + index // 5}"
+            for index, href in enumerate(hrefs)
+        ])
+        self.assertEqual(signer.signed, [hrefs[0], hrefs[5]])
+
+    def test_ttl(self):
+        now = 1000.0
+        signer = Signer()
+        modifier = CachedReadHrefModifier(signer, ttl=60, clock=lambda: now)
+        href = "https://example.com/cogs/a.tif"
+
+        self.assertEqual(modifier(href), f"{href}?token=1")
+        now += 59
+        self.assertEqual(modifier(href), f"{href}?token=1")
+        now += 1
+        self.assertEqual(modifier(href), f"{href}?token=2")
+
+    def test_token_expiry(self):
+        # SAS token expiring two minutes after 2022-01-01T00:00:00Z
+        now = 1640995200.0
+        signer = Signer("&se=2022-01-01T00%3A02%3A00Z")
+        modifier = CachedReadHrefModifier(signer, clock=lambda: now)
+        href = "https://example.com/cogs/a.tif"
+
+        modifier(href)
+        now += 59
+        modifier(href)
+        now += 1
+        modifier(href)
+
+        self.assertEqual(len(signer.signed), 2)
+
+    def test_other_modifications_memoized_per_href(self):
+        modified: List[str] = []
+
+        def mirror(href: str) -> str:
+            modified.append(href)
+            return href.replace("https://example.com",
+                                "https://mirror.example.com")
+
+        modifier = CachedReadHrefModifier(mirror)
+        hrefs = ["https://example.com/cogs/a.tif"] * 2 + [
+            "https://example.com/cogs/b.tif"
+        ]
+
+        self.assertEqual([modifier(href) for href in hrefs], [
+            "https://mirror.example.com/cogs/a.tif",
+            "https://mirror.example.com/cogs/a.tif",
+            "https://mirror.example.com/cogs/b.tif"
+        ])
+        self.assertEqual(modified, hrefs[1:])
+
+    def test_href_with_query(self):
+        signer = Signer()
+        modifier = CachedReadHrefModifier(signer)
+        href = "https://example.com/cogs/a.tif"
+
+        self.assertEqual(modifier(href), f"{href}?token=1")
+        # signed itself rather than given the prefix's query string
+        self.assertEqual(modifier(f"{href}?version=2"),
+                         f"{href}?version=2&token=2")
+        self.assertEqual(modifier(f"{href}?version=2"),
+                         f"{href}?version=2&token=2")
+        self.assertEqual(len(signer.signed), 2)
+
+    def test_signs_prefixes_concurrently(self):
+        release = threading.Event()
+        signer = Signer()
+
+        def slow_signer(href: str) -> str:
+            if "/slow/" in href:
+                release.wait(10)
+            return signer(href)
+
+        modifier = CachedReadHrefModifier(slow_signer)
+        slow = threading.Thread(target=modifier,
+                                args=("https://example.com/slow/a.tif", ))
+        slow.start()
+        try:
+            # signing another prefix is not held up by the pending signing
+            self.assertEqual(modifier("https://example.com/fast/a.tif"),
+                             "https://example.com/fast/a.tif?token=1")
+        finally:
+            release.set()
+            slow.join()
+        self.assertEqual(modifier("https://example.com/slow/b.tif"),
+                         "https://example.com/slow/b.tif?token=2")
+
+    def test_cache_read_href_modifier(self):
+        modifier = cache_read_href_modifier(Signer())
+        self.assertIsInstance(modifier, CachedReadHrefModifier)
+        self.assertIs(cache_read_href_modifier(modifier), modifier)
+        self.assertIsNone(cache_read_href_modifier(None))
+
+    def test_create_items_signs_once(self):
+        signer = Signer()
+        with TemporaryDirectory() as temp_dir:
+            for var in VARIABLES:
+                for day in range(1, 32):
+                    shutil.copy(
+                        f"tests/test-data/cog/daily/"
+                        f"{var}-195101-grd-scaled-01.tif",
+                        os.path.join(temp_dir,
+                                     f"{var}-195101-grd-scaled-{day:02d}.tif"))
+
+            with serve_directory(temp_dir) as server:
+                items = daily_stac.create_daily_items(
+                    1951, 1, "scaled", server.url, read_href_modifier=signer)
+
+        self.assertEqual(len(items), 31)
+        self.assertEqual(len(signer.signed), 1)
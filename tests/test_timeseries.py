@@ -0,0 +1,117 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import netCDF4
+import numpy
+import xarray
+
+from stactools.nclimgrid import monthly_stac, timeseries
+from stactools.nclimgrid.constants import SHAPE, WGS84_BBOX
+from stactools.nclimgrid.errors import BadInput
+from tests.http_server import serve_directory
+
+# Seattle, Kansas City, Miami
+LONS = [-122.33, -94.58, -80.19]
+LATS = [47.61, 39.10, 25.76]
+
+
+class PointTimeseriesTest(unittest.TestCase):
+
+    def test_point_pixels(self):
+        rows, cols = timeseries.point_pixels(
+            [WGS84_BBOX[0] + 0.01, WGS84_BBOX[2] - 0.01],
+            [WGS84_BBOX[3] - 0.01, WGS84_BBOX[1] + 0.01])
+        self.assertEqual(rows.tolist(), [0, SHAPE[1] - 1])
+        self.assertEqual(cols.tolist(), [0, SHAPE[0] - 1])
+        with self.assertRaises(BadInput):
+            timeseries.point_pixels([0.0], [0.0])
+
+    def test_monthly_nc_matches_cogs(self):
+        base_nc_href = "tests/test-data/netcdf/monthly"
+        with TemporaryDirectory() as temp_dir:
+            monthly_stac.create_monthly_items("189501",
+                                              "189502",
+                                              temp_dir,
+                                              base_nc_href=base_nc_href)
+            from_cogs = timeseries.monthly_point_timeseries(
+                LONS, LATS, "189501", "189502", base_cog_href=temp_dir)
+        from_ncs = timeseries.monthly_point_timeseries(
+            LONS, LATS, "189501", "189502", base_nc_href=base_nc_href)
+
+        self.assertEqual(from_ncs["tavg"].shape, (2, 3))
+        xarray.testing.assert_allclose(from_ncs, from_cogs)
+        with xarray.open_dataset(
+                os.path.join(base_nc_href, "nclimgrid_tavg.nc")) as ds:
+            expected = ds["tavg"].sel(lon=xarray.DataArray(LONS, dims="point"),
+                                      lat=xarray.DataArray(LATS, dims="point"),
+                                      method="nearest").values
+        numpy.testing.assert_allclose(from_ncs["tavg"].values, expected)
+
+    def test_monthly_remote_nc(self):
+        base_nc_href = "tests/test-data/netcdf/monthly"
+        with serve_directory(base_nc_href) as server:
+            remote = timeseries.monthly_point_timeseries(
+                LONS,
+                LATS,
+                "189502",
+                "189502",
+                base_nc_href=server.url,
+                variables=["prcp"])
+        local = timeseries.monthly_point_timeseries(LONS,
+                                                    LATS,
+                                                    "189502",
+                                                    "189502",
+                                                    base_nc_href=base_nc_href,
+                                                    variables=["prcp"])
+        xarray.testing.assert_equal(remote, local)
+
+    def test_daily_nc_matches_cogs(self):
+        from_cogs = timeseries.daily_point_timeseries(
+            LONS,
+            LATS,
+            "202201",
+            "202201",
+            "prelim",
+            base_cog_href="tests/test-data/cog/daily")
+        from_ncs = timeseries.daily_point_timeseries(
+            LONS,
+            LATS,
+            "202201",
+            "202201",
+            "prelim",
+            base_nc_href="tests/test-data/netcdf/daily")
+
+        self.assertEqual(list(from_cogs.data_vars),
+                         ["prcp", "tavg", "tmax", "tmin"])
+        self.assertEqual(from_cogs["tmax"].shape, (1, 3))
+        xarray.testing.assert_allclose(from_ncs, from_cogs)
+
+    def test_daily_nc_reads_common_days(self):
+        nc_dir = "tests/test-data/netcdf/daily"
+        with TemporaryDirectory() as temp_dir:
+            shutil.copytree(nc_dir, os.path.join(temp_dir, "daily"))
+            # a prcp NetCDF from a later update, holding one more day
+            prcp_path = os.path.join(temp_dir, "daily", "beta", "by-month",
+                                     "2022", "01", "prcp-202201-grd-prelim.nc")
+            with netCDF4.Dataset(prcp_path, "a") as nc:
+                nc["time"][1] = nc["time"][0] + 1
+                nc["prcp"][1] = nc["prcp"][0]
+
+            with mock.patch.object(timeseries,
+                                   "read_nc_points",
+                                   wraps=timeseries.read_nc_points) as read:
+                dataset = timeseries.daily_point_timeseries(
+                    LONS,
+                    LATS,
+                    "202201",
+                    "202201",
+                    "prelim",
+                    base_nc_href=os.path.join(temp_dir, "daily"))
+
+        self.assertEqual(dataset["prcp"].shape, (1, 3))
+        self.assertEqual(dataset["time"].dt.day.values.tolist(), [1])
+        self.assertEqual([call.args[4] for call in read.call_args_list],
+                         [[1]] * 4)
@@ -0,0 +1,45 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import fsspec
+
+from stactools.nclimgrid.errors import CogUploadError
+from stactools.nclimgrid.upload import CogUploader
+
+
+class CogUploaderTest(unittest.TestCase):
+
+    def test_upload_to_memory(self):
+        cog_hrefs = [f"memory://nclimgrid/cogs/{i}.tif" for i in range(10)]
+        with CogUploader(max_workers=2, block_size=16) as uploader:
+            for i, cog_href in enumerate(cog_hrefs):
+                cog_path = uploader.scratch_path(cog_href)
+                with open(cog_path, "wb") as f:
+                    f.write(bytes([i]) * 100)
+                uploader.submit(cog_path, cog_href)
+            uploader.wait()
+            num_scratch = len(os.listdir(uploader._temp_dir.name))
+
+        fs = fsspec.filesystem("memory")
+        for i, cog_href in enumerate(cog_hrefs):
+            self.assertEqual(fs.cat(cog_href), bytes([i]) * 100)
+        self.assertEqual(num_scratch, 0)
+        fs.rm("nclimgrid", recursive=True)
+
+    def test_upload_to_local_directory(self):
+        with TemporaryDirectory() as temp_dir:
+            cog_href = f"file://{temp_dir}/cog.tif"
+            with CogUploader() as uploader:
+                cog_path = uploader.scratch_path(cog_href)
+                with open(cog_path, "wb") as f:
+                    f.write(b"cog")
+                uploader.submit(cog_path, cog_href)
+            with open(os.path.join(temp_dir, "cog.tif"), "rb") as f:
+                self.assertEqual(f.read(), b"cog")
+
+    def test_upload_failure(self):
+        with self.assertRaises(CogUploadError):
+            with CogUploader() as uploader:
+                uploader.submit("does-not-exist.tif",
+                                "memory://nclimgrid/cogs/missing.tif")
@@ -0,0 +1,288 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy
+import xarray
+
+from stactools.nclimgrid import utils
+from stactools.nclimgrid.constants import (NODATA, QUANTIZED_NODATA,
+                                           QUANTIZED_SCALE, SHAPE)
+from stactools.nclimgrid.errors import BadInput, DownloadError
+from tests.http_server import serve_directory
+from tests.synthetic_nc import write_synthetic_nc
+
+
+def create_synthetic_nc(path: str, var: str, num_times: int) -> None:
+    """Writes a full-size NetCDF of random data."""
+    rng = numpy.random.default_rng(0)
+    write_synthetic_nc(
+        path, [var], num_times, lambda var, index: rng.random(
+            (SHAPE[1], SHAPE[0]), dtype="float32"))
+
+
+class ExtractNcSlicesTest(unittest.TestCase):
+
+    def test_range_read(self):
+        with TemporaryDirectory() as temp_dir:
+            nc_dir = os.path.join(temp_dir, "remote")
+            os.makedirs(nc_dir)
+            nc_path = os.path.join(nc_dir, "nclimgrid_tavg.nc")
+            create_synthetic_nc(nc_path, "tavg", 12)
+            local_path = os.path.join(temp_dir, "local", "nclimgrid_tavg.nc")
+
+            with serve_directory(nc_dir) as server:
+                utils.extract_nc_slices(f"{server.url}/nclimgrid_tavg.nc",
+                                        local_path, ["tavg"], [8, 3])
+                bytes_sent = server.bytes_sent
+
+            for local_index, index in enumerate([8, 3], start=1):
+                numpy.testing.assert_array_equal(
+                    utils.read_nc_slice(local_path, "tavg", local_index),
+                    utils.read_nc_slice(nc_path, "tavg", index))
+            self.assertLess(bytes_sent, os.path.getsize(nc_path) / 3)
+
+
+class ShardListTest(unittest.TestCase):
+
+    def test_shards_partition_list(self):
+        values = list(range(10))
+        shards = [utils.shard_list(values, (i, 3)) for i in range(1, 4)]
+        self.assertEqual(sum(shards, []), values)
+        self.assertEqual([len(shard) for shard in shards], [3, 3, 4])
+
+    def test_parse_shard(self):
+        self.assertEqual(utils.parse_shard("2/4"), (2, 4))
+        with self.assertRaises(BadInput):
+            utils.parse_shard("5/4")
+        with self.assertRaises(BadInput):
+            utils.parse_shard("2")
+
+
+class BandStatisticsTest(unittest.TestCase):
+
+    def test_masks_nodata(self):
+        array = numpy.array([[1, 2, numpy.nan], [NODATA, 3, 6]],
+                            dtype="float32")
+        statistics = utils.band_statistics(array)
+        self.assertEqual(statistics["minimum"], 1)
+        self.assertEqual(statistics["maximum"], 6)
+        self.assertEqual(statistics["mean"], 3)
+        self.assertAlmostEqual(statistics["stddev"], numpy.std([1, 2, 3, 6]))
+        self.assertEqual(statistics["valid_percent"], 100 * 4 / 6)
+
+    def test_no_valid_data(self):
+        array = numpy.full((2, 2), NODATA, dtype="float32")
+        self.assertEqual(utils.band_statistics(array), {"valid_percent": 0})
+
+
+class QuantizeTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        rng = numpy.random.default_rng(0)
+        for var, low, high in [("prcp", 0, 3000), ("tmax", -60, 60)]:
+            array = rng.uniform(low, high, SHAPE).astype("float32")
+            packed = utils.quantize(array, var)
+            self.assertEqual(packed.dtype, numpy.int16)
+            error = numpy.abs(utils.dequantize(packed, var) - array)
+            # half a step, plus float32 rounding of the unpacked values
+            self.assertLessEqual(error.max(),
+                                 QUANTIZED_SCALE[var] / 2 + high * 2e-7)
+
+    def test_nodata_and_clipping(self):
+        array = numpy.array([[numpy.nan, NODATA, -1, 5000]], dtype="float32")
+        packed = utils.quantize(array, "prcp")
+        self.assertEqual(packed.tolist(),
+                         [[QUANTIZED_NODATA, QUANTIZED_NODATA, -32767, 32767]])
+        unpacked = utils.dequantize(packed, "prcp")
+        self.assertTrue(numpy.isnan(unpacked[0, :2]).all())
+        numpy.testing.assert_allclose(unpacked[0, 2:], [0, 3276.7], atol=1e-3)
+
+
+class NcTimeMeansTest(unittest.TestCase):
+
+    def test_chunks_match_whole_reduction(self):
+        with TemporaryDirectory() as temp_dir:
+            nc_path = os.path.join(temp_dir, "nclimgrid_tavg.nc")
+            create_synthetic_nc(nc_path, "tavg", 5)
+            with xarray.open_dataset(nc_path) as ds:
+                expected = ds["tavg"].mean(dim=("lat", "lon")).values
+                # two time slices per chunk
+                slice_bytes = SHAPE[0] * SHAPE[1] * 4 * 3
+                chunks = list(utils.nc_time_means(ds["tavg"], 2 * slice_bytes))
+                single = list(utils.nc_time_means(ds["tavg"], 1))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(len(single), 5)
+        numpy.testing.assert_allclose(numpy.concatenate(chunks), expected)
+        numpy.testing.assert_allclose(numpy.concatenate(single), expected)
+
+    def test_slice_hashes(self):
+        with TemporaryDirectory() as temp_dir:
+            nc_path = os.path.join(temp_dir, "nclimgrid_tavg.nc")
+            create_synthetic_nc(nc_path, "tavg", 5)
+            expected = [
+                utils.hash_array(utils.read_nc_slice(nc_path, "tavg", index))
+                for index in range(1, 6)
+            ]
+            with xarray.open_dataset(nc_path) as ds:
+                # two time slices per chunk
+                slice_bytes = SHAPE[0] * SHAPE[1] * 4
+                hashes = utils.nc_slice_hashes(ds["tavg"], 2 * slice_bytes)
+
+        self.assertEqual(hashes, expected)
+        self.assertEqual(len(set(hashes)), 5)
+
+
+class DownloadNcTest(unittest.TestCase):
+
+    def test_resumes_dropped_connections(self):
+        nc_dir = "tests/test-data/netcdf/monthly"
+        nc_path = os.path.join(nc_dir, "nclimgrid_tavg.nc")
+        size = os.path.getsize(nc_path)
+        block_size = 2**16
+        with serve_directory(nc_dir, drop_every=3) as server, \
+                TemporaryDirectory() as temp_dir:
+            local_path = os.path.join(temp_dir, "nested", "nclimgrid_tavg.nc")
+            utils.download_nc(f"{server.url}/nclimgrid_tavg.nc",
+                              local_path,
+                              sha256=utils.hash_file(nc_path),
+                              backoff=0,
+                              block_size=block_size,
+                              retries=size // block_size)
+            bytes_sent = server.bytes_sent
+            num_drops = (next(server.gets) - 1) // 3
+            with open(local_path, "rb") as downloaded, open(nc_path,
+                                                            "rb") as source:
+                self.assertEqual(downloaded.read(), source.read())
+            self.assertEqual(os.listdir(os.path.dirname(local_path)),
+                             ["nclimgrid_tavg.nc"])
+
+        # downloads continue after each dropped response, losing at most the
+        # two blocks fsspec reads ahead rather than starting again
+        self.assertGreater(num_drops, 0)
+        self.assertLessEqual(bytes_sent, size + num_drops * 2 * block_size)
+
+    def test_checksum_mismatch(self):
+        nc_dir = "tests/test-data/netcdf/monthly"
+        with serve_directory(nc_dir) as server, \
+                TemporaryDirectory() as temp_dir:
+            local_path = os.path.join(temp_dir, "nclimgrid_tavg.nc")
+            with self.assertRaises(DownloadError):
+                utils.download_nc(f"{server.url}/nclimgrid_tavg.nc",
+                                  local_path,
+                                  sha256="0" * 64)
+            self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_discards_stale_partial(self):
+        nc_dir = "tests/test-data/netcdf/monthly"
+        nc_path = os.path.join(nc_dir, "nclimgrid_tavg.nc")
+        with serve_directory(nc_dir) as server, \
+                TemporaryDirectory() as temp_dir:
+            local_path = os.path.join(temp_dir, "nclimgrid_tavg.nc")
+            # a partial download of an earlier publication of the file
+            with open(f"{local_path}.partial", "wb") as f:
+                f.write(b"\0" * 1024)
+            with open(f"{local_path}.partial.json", "w") as f:
+                f.write('{"size": 1024, "etag": "\\"stale\\""}')
+            utils.download_nc(f"{server.url}/nclimgrid_tavg.nc", local_path)
+            with open(local_path, "rb") as downloaded, open(nc_path,
+                                                            "rb") as source:
+                self.assertEqual(downloaded.read(), source.read())
+            self.assertEqual(os.listdir(temp_dir), ["nclimgrid_tavg.nc"])
+
+    def test_published_checksum_mismatch(self):
+        nc_dir = "tests/test-data/netcdf/monthly"
+        with serve_directory(nc_dir) as server, \
+                TemporaryDirectory() as temp_dir:
+            server.etag = "0" * 32
+            local_path = os.path.join(temp_dir, "nclimgrid_tavg.nc")
+            with self.assertRaises(DownloadError):
+                utils.download_nc(f"{server.url}/nclimgrid_tavg.nc",
+                                  local_path)
+            self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_permanent_error_not_retried(self):
+        nc_dir = "tests/test-data/netcdf/monthly"
+        with serve_directory(nc_dir) as server, \
+                TemporaryDirectory() as temp_dir:
+            server.get_error = 403
+            local_path = os.path.join(temp_dir, "nclimgrid_tavg.nc")
+            with self.assertRaises(DownloadError):
+                utils.download_nc(f"{server.url}/nclimgrid_tavg.nc",
+                                  local_path,
+                                  retries=3,
+                                  backoff=0)
+            # a single GET request, not retried
+            self.assertEqual(next(server.gets), 2)
+
+    def test_gives_up_after_retries(self):
+        nc_dir = "tests/test-data/netcdf/monthly"
+        with serve_directory(nc_dir, drop_every=1) as server, \
+                TemporaryDirectory() as temp_dir:
+            local_path = os.path.join(temp_dir, "nclimgrid_tavg.nc")
+            with self.assertRaises(DownloadError):
+                utils.download_nc(f"{server.url}/nclimgrid_tavg.nc",
+                                  local_path,
+                                  retries=2,
+                                  backoff=0)
+
+
+class FilesystemPoolTest(unittest.TestCase):
+
+    def tearDown(self):
+        utils.configure_filesystems()
+
+    def test_href_exists(self):
+        cog_dir = "tests/test-data/cog/daily"
+        with serve_directory(cog_dir) as server:
+            exists = [
+                utils.href_exists(f"{server.url}/{cog_name}")
+                for cog_name in sorted(os.listdir(cog_dir))
+            ]
+            connections = server.connections
+            self.assertFalse(utils.href_exists(f"{server.url}/missing.tif"))
+
+        self.assertEqual(exists, [True] * 8)
+        self.assertEqual(connections, 1)
+        self.assertTrue(
+            utils.href_exists(
+                os.path.join(cog_dir, "prcp-195101-grd-scaled-01.tif")))
+        self.assertFalse(
+            utils.href_exists(os.path.join(cog_dir, "missing.tif")))
+
+    def test_hash_file(self):
+        cog_dir = "tests/test-data/cog/daily"
+        cog_names = sorted(os.listdir(cog_dir))
+        with serve_directory(cog_dir) as server:
+            hashes = [
+                utils.hash_file(f"{server.url}/{cog_name}")
+                for cog_name in cog_names
+            ]
+            connections = server.connections
+
+        self.assertEqual(hashes, [
+            utils.hash_file(os.path.join(cog_dir, cog_name))
+            for cog_name in cog_names
+        ])
+        self.assertEqual(connections, 1)
+
+    def test_shared_filesystem(self):
+        http_fs, path = utils.get_filesystem("http://example.com/a.nc")
+        https_fs, _ = utils.get_filesystem("https://example.com/b.nc")
+        self.assertIs(http_fs, https_fs)
+        self.assertEqual(path, "http://example.com/a.nc")
+
+        utils.configure_filesystems(keepalive_timeout=0)
+        self.assertIsNot(
+            utils.get_filesystem("http://example.com/a.nc")[0], http_fs)
+
+    def test_no_keepalive(self):
+        utils.configure_filesystems(keepalive_timeout=0)
+        cog_dir = "tests/test-data/cog/daily"
+        with serve_directory(cog_dir) as server:
+            for cog_name in os.listdir(cog_dir):
+                utils.href_exists(f"{server.url}/{cog_name}")
+            connections = server.connections
+
+        self.assertEqual(connections, 8)
@@ -0,0 +1,97 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+import click
+import netCDF4
+from click.testing import CliRunner
+
+from stactools.nclimgrid.commands import create_nclimgrid_command
+from stactools.nclimgrid.constants import VARIABLES
+from stactools.nclimgrid.errors import BadInput
+from stactools.nclimgrid.watch import DailyWatcher
+
+NC_DIR = "tests/test-data/netcdf/daily/beta/by-month/2022/01"
+
+
+def append_day(nc_path: str, var: str) -> None:
+    """Appends a day to a preliminary NetCDF in place, copying the data of
+    the first day, as NOAA does when new days arrive."""
+    with netCDF4.Dataset(nc_path, "a") as nc:
+        num_days = nc.dimensions["time"].size
+        nc["time"][num_days] = nc["time"][0] + num_days
+        nc[var][num_days] = nc[var][0]
+
+
+class DailyWatcherTest(unittest.TestCase):
+
+    def test_poll_creates_only_new_days(self):
+        with TemporaryDirectory() as temp_dir:
+            base_nc_href = os.path.join(temp_dir, "netcdf")
+            base_cog_href = os.path.join(temp_dir, "cog")
+            nc_dir = os.path.join(base_nc_href, "beta/by-month/2022/01")
+            shutil.copytree(NC_DIR, nc_dir)
+            os.makedirs(base_cog_href)
+
+            watcher = DailyWatcher(base_cog_href, base_nc_href)
+            first_items = watcher.poll(2022, 1)
+            cog_path = os.path.join(base_cog_href,
+                                    "prcp-202201-grd-prelim-01.tif")
+            cog_mtime = os.path.getmtime(cog_path)
+            unchanged_items = watcher.poll(2022, 1)
+
+            for var in VARIABLES:
+                append_day(os.path.join(nc_dir, f"{var}-202201-grd-prelim.nc"),
+                           var)
+            new_items = watcher.poll(2022, 1)
+            num_cogs = len(os.listdir(base_cog_href))
+            day_one_recreated = os.path.getmtime(cog_path) != cog_mtime
+
+            # a restarted watcher finds the published days from the COGs
+            restarted_items = DailyWatcher(base_cog_href,
+                                           base_nc_href).poll(2022, 1)
+
+        self.assertEqual([item.id for item in first_items],
+                         ["202201-grd-prelim-01"])
+        self.assertEqual(unchanged_items, [])
+        self.assertEqual([item.id for item in new_items],
+                         ["202201-grd-prelim-02"])
+        self.assertFalse(day_one_recreated)
+        self.assertEqual(num_cogs, 8)
+        self.assertEqual(restarted_items, [])
+
+    def test_poll_missing_month(self):
+        with TemporaryDirectory() as temp_dir:
+            watcher = DailyWatcher(temp_dir, temp_dir)
+            self.assertEqual(watcher.poll(2022, 2), [])
+
+    def test_watch(self):
+        with TemporaryDirectory() as temp_dir:
+            base_nc_href = os.path.join(temp_dir, "netcdf")
+            shutil.copytree(
+                NC_DIR, os.path.join(base_nc_href, "beta/by-month/2022/01"))
+            base_cog_href = os.path.join(temp_dir, "cog")
+            os.makedirs(base_cog_href)
+            polled = []
+
+            watcher = DailyWatcher(base_cog_href, base_nc_href)
+            watcher.watch(polled.append,
+                          interval=0,
+                          year=2022,
+                          month=1,
+                          max_polls=3)
+
+        self.assertEqual([[item.id for item in items] for items in polled],
+                         [["202201-grd-prelim-01"]])
+
+    def test_command_validates_month(self):
+        cli = click.Group()
+        create_nclimgrid_command(cli)
+        for yyyymm in ["2023", "202313", "2023-01"]:
+            with TemporaryDirectory() as temp_dir:
+                result = CliRunner().invoke(cli, [
+                    "nclimgrid", "watch-daily", temp_dir, temp_dir, NC_DIR,
+                    "--yyyymm", yyyymm, "--max_polls", "1"
+                ])
+            self.assertIsInstance(result.exception, BadInput)